@@ -1,9 +1,13 @@
+import hashlib
 import json
 import logging
 from string import Template
+from typing import Optional
 from sqlmodel import Session
-from src.ai.openAi.deepseek import get_deepseek_completion, handle_ds_response_block
-from src.ai.openAi.qwen import get_qwen_completion
+from src.ai.llmCache import llm_response_cache, make_cache_key
+from src.ai.llmRouter import llm_router
+from src.ai.semanticCache import semantic_cache
+from src.ai.openAi.deepseek import handle_ds_response_block
 from src.ai.pojo.openAiBo import OpenAiParam
 from src.ai.pojo.promptBo import PromptContent
 from src.common.enum.codeEnum import CodeEnum
@@ -12,36 +16,77 @@ from src.exception.aiException import AIException
 from src.pojo.bo.aiBo import GetJsonModel, ModelConfig
 from src.service.aiCodeService import get_code_value_by_code
 from src.service.apiInfoService import api_info_2_struct_str
-from src.utils.dateUtils import get_now_4_prompt
+from src.utils.dateUtils import get_today_4_prompt
 
 logger = logging.getLogger(__name__)
 
 
 
 
-async def do_api_2_llm(llm_prams: ModelConfig) -> str:
+def _semantic_scope(api_code: str, params: OpenAiParam) -> tuple[str, str]:
+    """
+    语义缓存的命名空间和问题: 最后一条消息作为问题, 其余消息(系统提示词等)和模型一起作为命名空间
+    :return: (命名空间, 问题)
+    """
+    messages = [m if isinstance(m, dict) else m.model_dump() for m in params.messages]
+    context = json.dumps(messages[:-1], ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    question = messages[-1].get("content") if messages else None
+    return f"{api_code}:{params.model}:{digest}", question if isinstance(question, str) else ""
+
+
+async def do_api_2_llm(llm_prams: ModelConfig, api_code: Optional[str] = None) -> str:
     """
     根据model入参自动选择调用模型类型 (依赖openai库的实现)
+    供应商失败或超时时由 llm_router 降级到其它供应商
     :param llm_prams: 模型配置参数及messages,messages必传
+    :param api_code: 传入时非流式调用先查语义缓存, 相近问题直接返回历史结果
     :return:
     """
     if llm_prams.messages is None:
         raise AIException.quick_raise("messages is required")
 
     params = OpenAiParam(**llm_prams.model_dump())
-    if "deepseek" in llm_prams.model:
-        response = await get_deepseek_completion(params)
+    use_semantic = not llm_prams.stream and semantic_cache.enabled_for(api_code)
+    if use_semantic:
+        namespace, question = _semantic_scope(api_code, params)
+        cached = semantic_cache.lookup(api_code, namespace, question)
+        if cached is not None:
+            return cached
 
-    elif "qwen" in llm_prams.model:
-        response = await get_qwen_completion(params)
-
-    else:
-        response = await get_deepseek_completion(params)
+    response = await llm_router.chat(params)
 
     if llm_prams.stream:
         result = response
     else:
         result = handle_ds_response_block(response)
+        if use_semantic:
+            semantic_cache.store(api_code, namespace, question, result)
+    return result
+
+
+async def do_api_2_llm_cached(llm_prams: ModelConfig, api_code: Optional[str] = None) -> str:
+    """
+    带缓存的非流式LLM调用, 以 模型+messages+温度 的哈希作为缓存键
+    只用于相同输入期望相同输出的场景(如结构化提取)
+    :param llm_prams: 模型配置参数及messages,messages必传
+    :param api_code: 精确缓存未命中时再查语义缓存
+    :return:
+    """
+    if llm_prams.stream or not llm_response_cache.enabled:
+        return await do_api_2_llm(llm_prams, api_code)
+    if llm_prams.messages is None:
+        raise AIException.quick_raise("messages is required")
+
+    params = OpenAiParam(**llm_prams.model_dump())
+    key = make_cache_key(params.model, params.messages, params.temperature)
+    cached = await llm_response_cache.get(key)
+    if cached is not None:
+        logger.debug(f"LLM缓存命中: model={params.model}, key={key[:12]}")
+        return cached
+
+    result = await do_api_2_llm(llm_prams, api_code)
+    await llm_response_cache.set(key, result)
     return result
 
 
@@ -72,6 +117,7 @@ async def sse_event_generator(response):
 async def normal_json_structure_extraction(query: str,model: str,structure: str):
     """
     通用JSON结构提取
+    只走精确缓存, 不走语义缓存: 提取的是日期、实体等精确参数, 相近的问题(如只差月份)结果不同
     :param query: 用户输入
     :param model: 调用模型
     :param structure: JSON结构信息
@@ -79,11 +125,12 @@ async def normal_json_structure_extraction(query: str,model: str,structure: str)
     """
     with Session(engine) as db:
         prompt_text = get_code_value_by_code(session=db, code_value=CodeEnum.JSON_STRUCTURE_EXTRACTION_PROMPT_CODE.value)
-        date_info = get_now_4_prompt()
+        # 日期精确到天, 同一天内相同的查询可以命中LLM缓存
+        date_info = get_today_4_prompt()
         prompt_template = Template(prompt_text)
         prompt = prompt_template.substitute(struct=structure,date_info=date_info)
         messages = [PromptContent.as_system(prompt), PromptContent.as_user(query)]
-        result = await do_api_2_llm(ModelConfig(model=model, messages=messages, stream=False))
+        result = await do_api_2_llm_cached(ModelConfig(model=model, messages=messages, stream=False))
         return result
 
 async def easy_json_structure_extraction(params :GetJsonModel):
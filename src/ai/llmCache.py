@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from src.utils.cacheUtils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCacheConfig:
+    # 是否启用LLM响应缓存
+    ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    # 内存缓存最大条目数
+    MAX_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", 2048))
+    # 缓存过期时间（秒）
+    TTL: float = float(os.getenv("LLM_CACHE_TTL", 86400))
+    # SQLite 持久化文件路径, 为空则只使用内存缓存
+    SQLITE_PATH: str = os.getenv("LLM_CACHE_SQLITE_PATH", "")
+
+
+def make_cache_key(model: Optional[str], messages: list, temperature: Optional[float]) -> str:
+    """
+    根据模型、消息和温度生成缓存键
+    :param model: 模型名称
+    :param messages: 消息列表(dict 或 pydantic 对象)
+    :param temperature: 温度
+    :return: sha256 十六进制摘要
+    """
+    normalized = [m.model_dump() if hasattr(m, "model_dump") else m for m in (messages or [])]
+    raw = json.dumps({"model": model, "messages": normalized, "temperature": temperature},
+                     ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _SQLiteTier:
+    """
+    LLM响应的磁盘缓存, 所有操作通过 asyncio.to_thread 执行, 不阻塞事件循环
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS llm_cache ("
+                               "cache_key TEXT PRIMARY KEY, value TEXT NOT NULL, expire_at REAL NOT NULL)")
+            self._conn.execute("DELETE FROM llm_cache WHERE expire_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expire_at FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0], row[1]
+
+    def set(self, key: str, value: str, expire_at: float):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO llm_cache (cache_key, value, expire_at) VALUES (?, ?, ?)",
+                               (key, value, expire_at))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """
+    LLM响应的精确匹配缓存
+
+    - 一级: 进程内 TTL + LRU
+    - 二级(可选): SQLite 文件, 进程重启后仍可命中; 命中后回填一级缓存
+    - 只缓存非流式的文本结果, 适用于结构化提取这类相同输入期望相同输出的调用
+    """
+
+    def __init__(self, config: type[LLMCacheConfig] = LLMCacheConfig):
+        self._config = config
+        self._memory: TTLCache[str, str] = TTLCache(max_size=config.MAX_SIZE, ttl=config.TTL)
+        self._disk: Optional[_SQLiteTier] = None
+        if config.SQLITE_PATH:
+            try:
+                self._disk = _SQLiteTier(config.SQLITE_PATH)
+            except sqlite3.Error as e:
+                logger.error(f"LLM缓存SQLite初始化失败, 只使用内存缓存: {str(e)}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.ENABLED
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None or self._disk is None:
+            return value
+        try:
+            row = await asyncio.to_thread(self._disk.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM缓存SQLite读取失败: {str(e)}")
+            return None
+        if row is None:
+            return None
+        value, expire_at = row
+        self._memory.set(key, value, ttl=expire_at - time.time())
+        return value
+
+    async def set(self, key: str, value: Any):
+        if not isinstance(value, str):
+            return
+        self._memory.set(key, value)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, value, time.time() + self._config.TTL)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM缓存SQLite写入失败: {str(e)}")
+
+    async def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "disk": self._disk is not None}
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+llm_response_cache = LLMResponseCache()
+
+
+def close_llm_cache():
+    """在 FastAPI 关闭时关闭SQLite连接"""
+    llm_response_cache.close()
@@ -0,0 +1,84 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Optional
+
+from openai import AsyncOpenAI
+
+from src.utils.metricsUtils import llm_request_duration_seconds, llm_time_to_first_token_seconds, llm_tokens_total
+
+logger = logging.getLogger(__name__)
+
+
+def _record_usage(provider: str, model: str, usage: Any):
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        llm_tokens_total.inc(prompt_tokens, provider=provider, model=model, type="prompt")
+    if completion_tokens:
+        llm_tokens_total.inc(completion_tokens, provider=provider, model=model, type="completion")
+
+
+class MeteredStream:
+    """
+    流式响应包装: 迭代方式与 AsyncStream 相同, 其它属性转发给原对象
+
+    - 第一个带内容的块到达时记录首 token 耗时
+    - 流结束(包括中途异常、被关闭)时记录总耗时, 块中带 usage 时记录 token 数
+    """
+
+    def __init__(self, stream: Any, provider: str, model: str, start: float):
+        self._stream = stream
+        self._provider = provider
+        self._model = model
+        self._start = start
+
+    def __getattr__(self, item):
+        return getattr(self._stream, item)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        first = True
+        status = "error"
+        usage = None
+        try:
+            async for chunk in self._stream:
+                if first and getattr(chunk, "choices", None):
+                    first = False
+                    llm_time_to_first_token_seconds.observe(time.perf_counter() - self._start,
+                                                            provider=self._provider, model=self._model)
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+            status = "ok"
+        finally:
+            llm_request_duration_seconds.observe(time.perf_counter() - self._start, provider=self._provider,
+                                                 model=self._model, stream="true", status=status)
+            _record_usage(self._provider, self._model, usage)
+
+
+async def metered_completion(client: AsyncOpenAI, provider: str, **kwargs) -> Any:
+    """
+    调用 chat.completions.create 并记录 LLM 指标
+    :param client: 客户端
+    :param provider: 供应商名称, 作为 provider 标签
+    :param kwargs: create 的参数
+    :return: 流式时为 MeteredStream, 否则为 ChatCompletion
+    """
+    model: Optional[str] = kwargs.get("model")
+    stream = bool(kwargs.get("stream"))
+    start = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**kwargs)
+    except Exception:
+        llm_request_duration_seconds.observe(time.perf_counter() - start, provider=provider, model=model,
+                                             stream=str(stream).lower(), status="error")
+        raise
+    if stream:
+        return MeteredStream(response, provider, model, start)
+    llm_request_duration_seconds.observe(time.perf_counter() - start, provider=provider, model=model,
+                                         stream="false", status="ok")
+    _record_usage(provider, model, getattr(response, "usage", None))
+    return response
@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from src.ai.llmMetrics import metered_completion
+from src.ai.pojo.openAiBo import OpenAiParam
+from src.exception.aiException import AIException
+from src.utils.dataUtils import nvl
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# 这些异常换一个供应商大概率能成功, 触发降级; 参数错误等其它异常直接抛出
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,   # 包含 APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class LLMRouterConfig:
+    # 单个 (api_key, base_url) 客户端的连接池上限
+    MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+    MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+    # 建立连接超时（秒）
+    CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", 10))
+    # 单次请求超时（秒）, 流式请求为拿到响应头的超时
+    REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", 300))
+    # SDK 自带的重试次数, 降级和对冲由路由负责, 默认关闭以免故障时延迟叠加
+    SDK_MAX_RETRIES: int = int(os.getenv("LLM_SDK_MAX_RETRIES", 0))
+    # 每个供应商的最大并发请求数
+    MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", 50))
+    # 降级顺序, 主供应商失败后依次尝试; 为空则不降级
+    FALLBACK_ORDER: List[str] = [p.strip() for p in os.getenv("LLM_FALLBACK_ORDER", "deepseek,qwen").split(",") if p.strip()]
+    # 对冲请求延迟（秒）: 非流式请求超过该时间未返回时, 并行向下一个供应商发起请求, 取先返回者; 0 为关闭
+    HEDGE_DELAY: float = float(os.getenv("LLM_HEDGE_DELAY", 0))
+    # 连续失败多少次后熔断
+    FAILURE_THRESHOLD: int = int(os.getenv("LLM_FAILURE_THRESHOLD", 3))
+    # 熔断时长（秒）, 熔断期间该供应商排在降级顺序最后
+    COOLDOWN: float = float(os.getenv("LLM_COOLDOWN", 30))
+
+
+class ProviderHealth:
+    """供应商健康状态: 连续失败计数、熔断截止时间、延迟的指数移动平均"""
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.total = 0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    def record_success(self, latency: float):
+        self.total += 1
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def record_failure(self, threshold: int, cooldown: float):
+        self.total += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= threshold:
+            self.open_until = time.monotonic() + cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": self.latency_ewma,
+            "total": self.total,
+            "failures": self.failures,
+        }
+
+
+class LLMProvider:
+    """
+    一个兼容 OpenAI 协议的模型供应商
+    """
+
+    def __init__(self, name: str, model_keywords: Tuple[str, ...], api_key: Optional[str], base_url: Optional[str],
+                 default_model: Optional[str], default_temperature: float = 1.0, max_concurrency: int = 50):
+        """
+        :param name: 供应商名称
+        :param model_keywords: 模型名包含这些关键字时路由到该供应商
+        :param api_key: 默认 API KEY
+        :param base_url: 默认基础URL
+        :param default_model: 未指定模型或降级到该供应商时使用的模型
+        :param default_temperature: 未指定温度时使用的温度
+        :param max_concurrency: 最大并发请求数
+        """
+        self.name = name
+        self.model_keywords = model_keywords
+        self.api_key = api_key
+        self.base_url = base_url
+        self.default_model = default_model
+        self.default_temperature = default_temperature
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.health = ProviderHealth()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.base_url)
+
+    def matches(self, model: Optional[str]) -> bool:
+        return bool(model) and any(keyword in model for keyword in self.model_keywords)
+
+
+def _default_providers(config: type[LLMRouterConfig]) -> List[LLMProvider]:
+    """根据环境变量创建内置的供应商"""
+    return [
+        LLMProvider(name="deepseek", model_keywords=("deepseek",),
+                    api_key=os.getenv("DEEPSEEK_API_KEY"), base_url=os.getenv("DEEPSEEK_BASE_URL"),
+                    default_model=os.getenv("DEEPSEEK_MODEL", "deepseek-chat"),
+                    default_temperature=float(os.getenv("DEEPSEEK_TEMPERATURE", 1.0)),
+                    max_concurrency=config.MAX_CONCURRENCY),
+        LLMProvider(name="qwen", model_keywords=("qwen",),
+                    api_key=os.getenv("DASHSCOPE_API_KEY"), base_url=os.getenv("QWEN_BASE_URL"),
+                    default_model=os.getenv("DEFAULT_QWEN_MODEL", "qwen-plus"),
+                    max_concurrency=config.MAX_CONCURRENCY),
+        LLMProvider(name="doubao", model_keywords=("doubao",),
+                    api_key=os.getenv("DOUBAO_API_KEY"), base_url=os.getenv("DOUBAO_BASE_URL"),
+                    default_model=os.getenv("DEFAULT_DOUBAO_MODEL"),
+                    default_temperature=float(os.getenv("DOUBAO_TEMPERATURE", 1.0)),
+                    max_concurrency=config.MAX_CONCURRENCY),
+    ]
+
+
+class LLMRouter:
+    """
+    LLM 供应商路由
+
+    - 按模型名选择供应商, 未匹配时使用第一个供应商(deepseek)
+    - 每个 (api_key, base_url) 共享一个带连接池的 AsyncOpenAI 客户端, 不再被第一个请求的参数固定
+    - 可重试的异常(连接失败、超时、限流、5xx)按 FALLBACK_ORDER 降级到其它供应商, 使用该供应商的默认模型
+    - 非流式请求可开启对冲: 超过 HEDGE_DELAY 未返回时并行请求下一个供应商, 取先成功的结果
+    - 连续失败的供应商熔断 COOLDOWN 秒, 期间排到候选列表最后
+    """
+
+    def __init__(self, providers: List[LLMProvider] = None, config: type[LLMRouterConfig] = LLMRouterConfig):
+        self._config = config
+        self._providers: Dict[str, LLMProvider] = {p.name: p for p in (providers or _default_providers(config))}
+        self._clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+
+    def get_provider(self, name: str) -> LLMProvider:
+        provider = self._providers.get(name)
+        if provider is None:
+            raise AIException.quick_raise(f"未知的模型供应商: {name}")
+        return provider
+
+    def resolve(self, model: Optional[str]) -> LLMProvider:
+        """根据模型名选择供应商"""
+        for provider in self._providers.values():
+            if provider.matches(model):
+                return provider
+        return next(iter(self._providers.values()))
+
+    def get_client(self, api_key: str, base_url: str) -> AsyncOpenAI:
+        """
+        获取 (api_key, base_url) 对应的共享客户端
+        :param api_key: API KEY
+        :param base_url: 基础URL
+        :return: AsyncOpenAI 客户端
+        """
+        key = (api_key, base_url)
+        client = self._clients.get(key)
+        if client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=self._config.MAX_CONNECTIONS,
+                                    max_keepalive_connections=self._config.MAX_KEEPALIVE_CONNECTIONS),
+                timeout=httpx.Timeout(self._config.REQUEST_TIMEOUT, connect=self._config.CONNECT_TIMEOUT),
+            )
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client,
+                                 max_retries=self._config.SDK_MAX_RETRIES)
+            self._clients[key] = client
+        return client
+
+    def _candidates(self, primary: LLMProvider) -> List[LLMProvider]:
+        """主供应商 + 降级顺序中已配置的供应商, 熔断中的排到最后"""
+        candidates = [primary]
+        for name in self._config.FALLBACK_ORDER:
+            provider = self._providers.get(name)
+            if provider is not None and provider is not primary and provider.configured:
+                candidates.append(provider)
+        return [p for p in candidates if p.health.healthy] + [p for p in candidates if not p.health.healthy]
+
+    async def _call(self, provider: LLMProvider, params: OpenAiParam, is_primary: bool) -> Any:
+        # 主供应商使用调用方指定的参数, 降级供应商使用自己的默认配置
+        if is_primary:
+            api_key = nvl(params.api_key, provider.api_key)
+            base_url = nvl(params.base_url, provider.base_url)
+            model = params.model or provider.default_model
+        else:
+            api_key, base_url, model = provider.api_key, provider.base_url, provider.default_model
+        temperature = params.temperature if params.temperature else provider.default_temperature
+        kwargs: Dict[str, Any] = dict(model=model, messages=params.messages, stream=params.stream,
+                                      temperature=float(temperature))
+        if getattr(params, "enable_search", False):
+            kwargs["extra_body"] = {"enable_search": True}
+
+        logger.info(f"LLM 请求 供应商:{provider.name} 模型:{model} 提示词信息:\n {params.messages}")
+        client = self.get_client(api_key, base_url)
+        async with provider.semaphore:
+            start = time.monotonic()
+            try:
+                response = await metered_completion(client, provider.name, **kwargs)
+            except RETRYABLE_ERRORS:
+                provider.health.record_failure(self._config.FAILURE_THRESHOLD, self._config.COOLDOWN)
+                raise
+        provider.health.record_success(time.monotonic() - start)
+        return response
+
+    async def _hedged(self, primary: LLMProvider, first: LLMProvider, second: LLMProvider, params: OpenAiParam) -> Any:
+        """先请求 first, 超过 HEDGE_DELAY 未返回再并行请求 second, 返回先成功的结果"""
+        first_task = asyncio.create_task(self._call(first, params, is_primary=first is primary))
+        tasks = [first_task]
+        try:
+            done, _ = await asyncio.wait({first_task}, timeout=self._config.HEDGE_DELAY)
+            if done:
+                error = first_task.exception()
+                if error is None or not isinstance(error, RETRYABLE_ERRORS):
+                    return first_task.result()
+                # 在对冲延迟内就失败了, 直接降级
+                logger.warning(f"LLM 供应商 {first.name} 请求失败: {type(error).__name__} {error}")
+                return await self._call(second, params, is_primary=second is primary)
+
+            logger.info(f"LLM 请求 {first.name} 超过 {self._config.HEDGE_DELAY}s 未返回, 对冲请求 {second.name}")
+            tasks.append(asyncio.create_task(self._call(second, params, is_primary=second is primary)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 取消落后的请求(包括调用方被取消的情况)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def chat(self, params: OpenAiParam) -> Any:
+        """
+        调用 chat.completions, 失败时自动降级
+        :param params: 请求参数
+        :return: 流式时为 AsyncStream, 否则为 ChatCompletion
+        """
+        primary = self.resolve(params.model)
+        candidates = self._candidates(primary)
+        index = 0
+        error: Optional[BaseException] = None
+
+        if not params.stream and self._config.HEDGE_DELAY > 0 and len(candidates) > 1:
+            try:
+                return await self._hedged(primary, candidates[0], candidates[1], params)
+            except RETRYABLE_ERRORS as e:
+                error = e
+                index = 2
+
+        for provider in candidates[index:]:
+            try:
+                return await self._call(provider, params, is_primary=provider is primary)
+            except RETRYABLE_ERRORS as e:
+                error = e
+                logger.warning(f"LLM 供应商 {provider.name} 请求失败: {type(e).__name__} {e}")
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: provider.health.stats() for name, provider in self._providers.items()}
+
+    async def close(self):
+        """关闭所有客户端的连接池"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+
+llm_router = LLMRouter()
+
+
+def get_llm_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    return llm_router.get_client(api_key, base_url)
+
+
+async def close_llm_clients():
+    """在 FastAPI 关闭时释放 LLM 客户端连接池"""
+    await llm_router.close()
@@ -1,7 +1,12 @@
+import asyncio
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
 from http import HTTPStatus
+from typing import Any, AsyncGenerator, Optional
 from dashscope import Application
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -11,6 +16,25 @@ logger = logging.getLogger(__name__)
 
 API_KEY = os.getenv("DASHSCOPE_API_KEY")
 
+
+class DashScopeConfig:
+    # 执行 DashScope 同步调用的线程数, 即同时进行的调用上限, 超出的请求排队等待
+    MAX_WORKERS: int = int(os.getenv("DASHSCOPE_MAX_WORKERS", 8))
+    # 流式调用时线程与事件循环之间的缓冲块数, 消费方跟不上时生产线程等待
+    STREAM_QUEUE_SIZE: int = int(os.getenv("DASHSCOPE_STREAM_QUEUE_SIZE", 64))
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+# 流式结束标记
+_STREAM_END = object()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DashScopeConfig.MAX_WORKERS, thread_name_prefix="dashscope")
+    return _executor
+
 class DashScopeAPIParam(BaseModel):
     app_id: str = Field(None, description="APP ID")
     stream: bool = Field(None, description="流式响应")
@@ -33,6 +57,74 @@ def get_dashscope_completion(
     return responses
 
 
+async def get_dashscope_completion_async(params: DashScopeAPIParam) -> Any:
+    """
+    调用百炼里面创建的智能体(异步), 同步SDK调用在有界线程池中执行, 不阻塞事件循环
+    :param params:
+    :return: 非流式为响应对象, 流式为异步生成器
+    """
+    call = partial(Application.call, **params.model_dump())
+    if not params.stream:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+    return _stream_in_thread(call)
+
+
+async def _stream_in_thread(call) -> AsyncGenerator[Any, None]:
+    """
+    在线程池中发起流式调用并迭代同步生成器, 通过 asyncio.Queue 把数据块交给事件循环
+    消费方提前结束(如客户端断开)时通知生产线程停止迭代
+    :param call: 返回同步生成器的调用
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=DashScopeConfig.STREAM_QUEUE_SIZE)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # 队列满时等待, 期间消费方已结束则放弃
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except FutureTimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    return False
+
+    def produce():
+        try:
+            for chunk in call():
+                if stopped.is_set() or not put(chunk):
+                    break
+        except BaseException as e:
+            if not stopped.is_set():
+                put(e)
+            return
+        if not stopped.is_set():
+            put(_STREAM_END)
+
+    loop.run_in_executor(_get_executor(), produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # 通知生产线程停止, 它会在收到下一个数据块或等待入队超时后退出
+        stopped.set()
+
+
+def shutdown_dashscope_executor():
+    """在 FastAPI 关闭时释放线程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
 def result_handle(response,stream):
     if stream:
         return response
@@ -44,7 +136,7 @@ def result_handle(response,stream):
 
 async def sse_event_generator(response):
     """
-    通用的 SSE 事件生成器，接受一个异步生成器并生成 SSE 格式的数据。
+    通用的 SSE 事件生成器，接受一个异步生成器(get_dashscope_completion_async 的流式返回)并生成 SSE 格式的数据。
 
     :param response: x
     """
@@ -1,20 +1,19 @@
 import asyncio
 import logging
 
-from openai import AsyncOpenAI
 from typing import List, Dict, Any
 from openai.types.chat import ChatCompletion
 from dotenv import load_dotenv
 import os
 
+from src.ai.llmRouter import get_llm_client
+from src.ai.llmMetrics import metered_completion
 from src.ai.pojo.openAiBo import OpenAiParam
 from src.utils.dataUtils import nvl
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-deepseek_openai_client = None
-
 async def get_deepseek_completion(
     params: OpenAiParam,
     **kwargs
@@ -27,10 +26,9 @@ async def get_deepseek_completion(
     Returns:
         OpenAI API 的响应对象
     """
-    global deepseek_openai_client
-    if deepseek_openai_client is None:
-        deepseek_openai_client = AsyncOpenAI(api_key=nvl(params.api_key,os.getenv("DEEPSEEK_API_KEY")),
-                                         base_url=nvl(params.base_url,os.getenv("DEEPSEEK_BASE_URL")))
+    # 按 (api_key, base_url) 取共享客户端, 不再固定为第一个请求的参数
+    deepseek_openai_client = get_llm_client(api_key=nvl(params.api_key,os.getenv("DEEPSEEK_API_KEY")),
+                                            base_url=nvl(params.base_url,os.getenv("DEEPSEEK_BASE_URL")))
 
     if not params.model:
         params.model = os.getenv("DEEPSEEK_MODEL")
@@ -40,7 +38,8 @@ async def get_deepseek_completion(
 
     logger.info(f"Deepseek API 提示词信息:\n {params.messages}")
     # 调用 API 获取完成结果
-    response = await deepseek_openai_client.chat.completions.create(
+    response = await metered_completion(
+        deepseek_openai_client, "deepseek",
         model=params.model,
         messages=params.messages,
         stream=params.stream,
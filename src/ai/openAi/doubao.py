@@ -1,20 +1,18 @@
 # FILEPATH: C:/Ric/RicProjects/FastAPIProject/src/ai/openAi/doubao.py
 import asyncio
 import logging
-from openai import AsyncOpenAI
 from typing import List, Dict, Any
 from openai.types.chat import ChatCompletion
 from dotenv import load_dotenv
 import os
+from src.ai.llmRouter import get_llm_client
+from src.ai.llmMetrics import metered_completion
 from src.ai.pojo.openAiBo import OpenAiParam
 from src.utils.dataUtils import nvl
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-doubao_openai_client = None
-doubao_online_openai_client = None
-
 async def get_doubao_completion(
     params: OpenAiParam,
     **kwargs
@@ -27,10 +25,8 @@ async def get_doubao_completion(
     Returns:
         OpenAI API的响应对象
     """
-    global doubao_openai_client
-    if doubao_openai_client is None:
-        doubao_openai_client = AsyncOpenAI(api_key=nvl(params.api_key,os.getenv("DOUBAO_API_KEY")),
-                                         base_url=nvl(params.base_url,os.getenv("DOUBAO_BASE_URL")))
+    doubao_openai_client = get_llm_client(api_key=nvl(params.api_key,os.getenv("DOUBAO_API_KEY")),
+                                          base_url=nvl(params.base_url,os.getenv("DOUBAO_BASE_URL")))
 
     if not params.model:
         params.model = os.getenv("DEFAULT_DOUBAO_MODEL")
@@ -39,7 +35,8 @@ async def get_doubao_completion(
     logger.info(f"豆包 API 提示词信息:\n {params.messages}")
 
     # 调用 API 获取完成结果
-    response = await doubao_openai_client.chat.completions.create(
+    response = await metered_completion(
+        doubao_openai_client, "doubao",
         model=params.model,
         messages=params.messages,
         stream=params.stream,
@@ -71,10 +68,8 @@ async def online_search_doubao(
     :param kwargs: 照旧
     :return:
     """
-    global doubao_online_openai_client
-    if doubao_online_openai_client is None:
-        doubao_online_openai_client = AsyncOpenAI(api_key=nvl(params.api_key, os.getenv("DOUBAO_API_KEY")),
-                                           base_url=nvl(params.base_url, os.getenv("ONLINE_DOUBAO_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3/bots")))
+    doubao_online_openai_client = get_llm_client(api_key=nvl(params.api_key, os.getenv("DOUBAO_API_KEY")),
+                                                 base_url=nvl(params.base_url, os.getenv("ONLINE_DOUBAO_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3/bots")))
     logger.info(f"豆包 API 提示词信息:\n {params.messages}")
 
     if not params.model:
@@ -83,7 +78,8 @@ async def online_search_doubao(
         params.temperature = os.getenv("DOUBAO_TEMPERATURE",1.0)
 
     # 调用 API 获取完成结果
-    response = await doubao_online_openai_client.chat.completions.create(
+    response = await metered_completion(
+        doubao_online_openai_client, "doubao_online",
         model=params.model,
         messages=params.messages,
         stream=params.stream,
@@ -1,19 +1,19 @@
 import asyncio
 import json
 import logging
-from openai import OpenAI, AsyncOpenAI
+from openai import OpenAI
 from typing import List, Dict, Any, Optional, Union, Literal
 from openai.types.chat import ChatCompletion
 from dotenv import load_dotenv
 import os
+from src.ai.llmRouter import get_llm_client
+from src.ai.llmMetrics import metered_completion
 from src.ai.pojo.openAiBo import QwenOpenAiParm
 from src.utils.dataUtils import nvl
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-qwen_openai_client = None
-
 async def get_qwen_completion(
     params: QwenOpenAiParm,
     **kwargs
@@ -27,10 +27,8 @@ async def get_qwen_completion(
         OpenAI API的响应对象
 
     """
-    global qwen_openai_client
-    if qwen_openai_client is None:
-        qwen_openai_client = AsyncOpenAI(api_key=nvl(params.api_key,os.getenv("DASHSCOPE_API_KEY")),
-                                         base_url=nvl(params.base_url,os.getenv("QWEN_BASE_URL")))
+    qwen_openai_client = get_llm_client(api_key=nvl(params.api_key,os.getenv("DASHSCOPE_API_KEY")),
+                                        base_url=nvl(params.base_url,os.getenv("QWEN_BASE_URL")))
 
     if not params.model:
         params.model = os.getenv("DEFAULT_QWEN_MODEL")
@@ -43,7 +41,8 @@ async def get_qwen_completion(
         extra_body["enable_search"] = True
 
     # 调用 API 获取完成结果
-    response = await qwen_openai_client.chat.completions.create(
+    response = await metered_completion(
+        qwen_openai_client, "qwen",
         model=params.model,
         messages=params.messages,
         stream=params.stream,
@@ -0,0 +1,251 @@
+import hashlib
+import importlib
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_thresholds(raw: str) -> Dict[str, Optional[float]]:
+    """解析 api_code[:阈值] 列表, 如 jixiaomei,ypj:0.98; 不写阈值的使用默认阈值(值为 None)"""
+    thresholds = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        if ":" not in item:
+            thresholds[item.strip()] = None
+            continue
+        api_code, value = item.rsplit(":", 1)
+        try:
+            thresholds[api_code.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"语义缓存阈值配置无效, 已忽略: {item}")
+    return thresholds
+
+
+class SemanticCacheConfig:
+    # 是否启用语义缓存(相近问题直接返回历史答案, 默认关闭)
+    ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    # 索引最多保存的问题数, 满了覆盖最早的
+    CAPACITY: int = int(os.getenv("SEMANTIC_CACHE_CAPACITY", 10000))
+    # 缓存过期时间（秒）, 答案与时间相关, 不宜过长
+    TTL: float = float(os.getenv("SEMANTIC_CACHE_TTL", 600))
+    # 默认相似度阈值(余弦相似度)
+    THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.97))
+    # 启用语义缓存的 api_code 及其阈值, 格式 api_code[:阈值],...; 未列出的 api_code 不走语义缓存
+    THRESHOLDS: Dict[str, Optional[float]] = _parse_thresholds(os.getenv("SEMANTIC_CACHE_THRESHOLDS", ""))
+    # 哈希 n-gram 向量维度
+    DIM: int = int(os.getenv("SEMANTIC_CACHE_DIM", 512))
+    # 自定义向量模型, 格式 module:factory, factory() 返回带 dim 属性和 embed(text) 方法的对象; 为空使用哈希 n-gram
+    EMBEDDER: str = os.getenv("SEMANTIC_CACHE_EMBEDDER", "")
+
+
+class Embedder(Protocol):
+    dim: int
+
+    def embed(self, text: str) -> np.ndarray:
+        ...
+
+
+class HashedNgramEmbedder:
+    """
+    字符 n-gram 哈希向量(不依赖模型, 本地计算)
+
+    - 去掉空白和标点后按字符切 1~3 gram, crc32 取模映射到固定维度, 用符号位减少哈希冲突的影响
+    - 适合中文短问句的近似重复判断, 对同义改写不敏感, 需要更强的语义时通过 SEMANTIC_CACHE_EMBEDDER 替换
+    """
+
+    _STRIP = re.compile(r"[\s\W_]+")
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (1, 3)):
+        self.dim = dim
+        self._ngram_range = ngram_range
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        text = self._STRIP.sub("", (text or "").lower())
+        low, high = self._ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                h = zlib.crc32(text[i:i + n].encode("utf-8"))
+                # 越长的 gram 越能体现语序, 权重越高
+                vector[h % self.dim] += n if h & 0x80000000 else -n
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+def load_embedder(config: type[SemanticCacheConfig] = SemanticCacheConfig) -> Embedder:
+    if not config.EMBEDDER:
+        return HashedNgramEmbedder(dim=config.DIM)
+    module_name, _, factory_name = config.EMBEDDER.partition(":")
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return factory()
+
+
+class SemanticIndex:
+    """
+    基于 NumPy 的余弦相似度索引
+
+    - 所有向量放在一个 (capacity, dim) 矩阵中, 查询是一次矩阵乘法
+    - 每条记录带命名空间, 查询只在同一命名空间内比较, 不同接口/用户的答案互不命中
+    - 环形写入, 满了覆盖最早的记录; 过期记录查询时跳过
+    """
+
+    def __init__(self, capacity: int, dim: int):
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._namespaces = np.zeros(capacity, dtype=np.int64)
+        self._expire_at = np.zeros(capacity, dtype=np.float64)
+        self._values: list = [None] * capacity
+        self._capacity = capacity
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ns_id(namespace: str) -> int:
+        return int.from_bytes(hashlib.blake2b(namespace.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+    def add(self, namespace: str, vector: np.ndarray, value: Any, ttl: float):
+        with self._lock:
+            i = self._next
+            self._vectors[i] = vector
+            self._namespaces[i] = self._ns_id(namespace)
+            self._expire_at[i] = time.monotonic() + ttl
+            self._values[i] = value
+            self._next = (i + 1) % self._capacity
+            self._size = min(self._size + 1, self._capacity)
+
+    def search(self, namespace: str, vector: np.ndarray) -> Tuple[float, Any]:
+        """
+        查找命名空间内最相似的记录
+        :return: (相似度, 值), 没有记录时返回 (0.0, None)
+        """
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return 0.0, None
+            scores = self._vectors[:n] @ vector
+            valid = (self._namespaces[:n] == self._ns_id(namespace)) & (self._expire_at[:n] > time.monotonic())
+            if not valid.any():
+                return 0.0, None
+            scores = np.where(valid, scores, -1.0)
+            best = int(np.argmax(scores))
+            return float(scores[best]), self._values[best]
+
+    def clear(self):
+        with self._lock:
+            self._expire_at[:] = 0
+            self._values = [None] * self._capacity
+            self._next = 0
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+
+# 不影响问题含义的语气词、虚词, 归一化时去掉
+_FILLER_CHARS = re.compile(r"[的了吗呢吧啊呀么哦嘛请]|一下|帮我|麻烦")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?|[零一二三四五六七八九十百千万两]+")
+
+
+def normalize_question(question: str) -> str:
+    """去掉空白、标点和语气词, 只保留决定问题含义的字符"""
+    return _FILLER_CHARS.sub("", HashedNgramEmbedder._STRIP.sub("", (question or "").lower()))
+
+
+def question_signature(normalized: str) -> str:
+    """
+    问题的内容签名: 字符集合 + 数字序列
+    签名不同的问题(如月份、地区、数字不同)一定不会互相命中, 相似度只在签名相同的问题之间比较
+    """
+    return "".join(sorted(set(normalized))) + "|" + ",".join(_NUMBERS.findall(normalized))
+
+
+class SemanticCache:
+    """
+    问答语义缓存: 相似度超过 api_code 对应阈值的问题直接返回缓存的答案
+
+    - 只对 SEMANTIC_CACHE_THRESHOLDS 中列出的 api_code 生效
+    - 问题先去掉标点和语气词, 只有内容签名(字符集合、数字)相同的问题才比较相似度,
+      月份、地区等只差一两个字的问题不会命中; 命中的只是语序、标点、语气词不同的问法
+    """
+
+    def __init__(self, config: type[SemanticCacheConfig] = SemanticCacheConfig):
+        self._config = config
+        self._embedder: Optional[Embedder] = None
+        self._index: Optional[SemanticIndex] = None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.ENABLED
+
+    def _ensure_index(self) -> SemanticIndex:
+        # 首次使用时再加载向量模型并分配矩阵, 未启用时不占内存
+        if self._index is None:
+            self._embedder = load_embedder(self._config)
+            self._index = SemanticIndex(self._config.CAPACITY, self._embedder.dim)
+        return self._index
+
+    def enabled_for(self, api_code: Optional[str]) -> bool:
+        """语义缓存已启用且 api_code 在 SEMANTIC_CACHE_THRESHOLDS 中"""
+        return self.enabled and api_code is not None and api_code in self._config.THRESHOLDS
+
+    def threshold(self, api_code: str) -> float:
+        threshold = self._config.THRESHOLDS.get(api_code)
+        return self._config.THRESHOLD if threshold is None else threshold
+
+    @staticmethod
+    def _scope(namespace: str, normalized: str) -> str:
+        return namespace + "\x00" + question_signature(normalized)
+
+    def lookup(self, api_code: str, namespace: str, question: str) -> Optional[Any]:
+        """
+        查找相近问题的答案
+        :param api_code: 接口编码, 决定相似度阈值
+        :param namespace: 命名空间, 只在同一命名空间内匹配
+        :param question: 用户问题
+        :return: 命中时返回缓存的答案, 否则 None
+        """
+        normalized = normalize_question(question)
+        if not self.enabled_for(api_code) or not normalized:
+            return None
+        index = self._ensure_index()
+        score, value = index.search(self._scope(namespace, normalized), self._embedder.embed(normalized))
+        if value is not None and score >= self.threshold(api_code):
+            self._hits += 1
+            logger.info(f"语义缓存命中: api_code={api_code}, score={score:.4f}")
+            return value
+        self._misses += 1
+        return None
+
+    def store(self, api_code: str, namespace: str, question: str, value: Any):
+        normalized = normalize_question(question)
+        if not self.enabled_for(api_code) or not normalized or value is None:
+            return
+        index = self._ensure_index()
+        index.add(self._scope(namespace, normalized), self._embedder.embed(normalized), value, self._config.TTL)
+        logger.debug(f"语义缓存写入: api_code={api_code}, size={len(index)}")
+
+    def clear(self):
+        if self._index is not None:
+            self._index.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._index) if self._index is not None else 0,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+semantic_cache = SemanticCache()
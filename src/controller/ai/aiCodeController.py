@@ -4,6 +4,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
 
+from src.exception.aiException import AIException
 from src.db.db import get_db
 from src.pojo.po.aiCodePo import Code
 from src.dao.aiCodeDao import (
@@ -23,8 +24,9 @@ from src.dao.aiCodeDao import (
     get_codes_by_mapper
 )
 from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
+from src.service.promptRegistryService import invalidate_code_cache
 from pydantic import BaseModel
-from src.utils.pageSearchUtil import PageRequest, CodePageResponse, paginate_query
+from src.utils.pageSearchUtil import PageRequest, CodePageResponse, paginate_query, CursorPageRequest, CursorPageResponse, paginate_by_cursor
 
 router = APIRouter(prefix="/ai/code", tags=["Code"])
 
@@ -194,6 +196,7 @@ async def create_code_endpoint(code_data: CodeCreate, db: Session = Depends(get_
         # 转换为PO并创建
         code_po = code_data.to_po()
         created_code = create_code(db, code_po)
+        invalidate_code_cache()
         return HttpResponse.success(created_code)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -214,6 +217,7 @@ async def batch_create_codes_endpoint(batch_data: BatchCodeCreate, db: Session =
         # 转换为PO并批量创建
         code_pos = [code.to_po() for code in batch_data.codes]
         created_codes = batch_create_codes(db, code_pos)
+        invalidate_code_cache()
         return HttpResponse.success(created_codes)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -238,6 +242,7 @@ async def update_code_endpoint(code_id: str, code_data: CodeUpdate, db: Session
     updated_code = update_code(db, code_id, update_data)
     if not updated_code:
         return HttpResponse.error(msg=f"Code with id {code_id} not found")
+    invalidate_code_cache()
 
     return HttpResponse.success(updated_code)
 
@@ -256,6 +261,7 @@ async def delete_code_endpoint(code_id: str, db: Session = Depends(get_db)):
     result = delete_code(db, code_id)
     if not result:
         return HttpResponse.error(msg=f"Code with id {code_id} not found")
+    invalidate_code_cache()
 
     return HttpResponse.success(True)
 
@@ -272,6 +278,7 @@ async def delete_by_type(type_value: str, db: Session = Depends(get_db)):
         删除的记录数量
     """
     count = delete_codes_by_type(db, type_value)
+    invalidate_code_cache()
     return HttpResponse.success(count)
 
 @router.delete("/by-parent/{parent_code}", response_model=HttpResponseModel[int])
@@ -287,6 +294,7 @@ async def delete_by_parent(parent_code: str, db: Session = Depends(get_db)):
         删除的记录数量
     """
     count = delete_codes_by_parent_code(db, parent_code)
+    invalidate_code_cache()
     return HttpResponse.success(count)
 
 @router.post("/search", response_model=HttpResponseModel[List[Code]])
@@ -329,3 +337,23 @@ async def page_codes(page_request: PageRequest, db: Session = Depends(get_db)):
         return HttpResponse.success(page_result)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
+
+@router.post("/cursor-page", response_model=HttpResponseModel[CursorPageResponse[Code]])
+async def cursor_page_codes(page_request: CursorPageRequest, db: Session = Depends(get_db)):
+    """
+    游标分页查询编码，翻页时传入上一页返回的 next_cursor
+    
+    Args:
+        page_request: 游标分页请求参数，包含游标、每页大小、排序和搜索条件
+        db: 数据库会话
+        
+    Returns:
+        游标分页响应，包含当前页数据和下一页游标
+    """
+    try:
+        return HttpResponse.success(paginate_by_cursor(db, Code, page_request))
+    except AIException:
+        # 游标无效或与排序不匹配, 交给全局异常处理返回 400
+        raise
+    except Exception as e:
+        return HttpResponse.error(msg=str(e))
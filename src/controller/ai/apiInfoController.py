@@ -8,7 +8,7 @@ from src.dao.apiInfoDao import get_info_by_api_code, get_info_by_type_code, crea
     get_info_by_api_code_no_check
 from src.pojo.vo.apiInfoVo import APIInfoCreate
 from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
-from src.service.apiInfoService import get_api_info_4_task_classify, api_info_2_struct_str
+from src.service.apiInfoService import get_api_info_4_task_classify, api_info_2_struct_str, invalidate_api_info_cache
 
 router = APIRouter(prefix="/ai/api", tags=["API Info"])
 
@@ -53,10 +53,21 @@ async def create_api_info_endpoint(api_info_data: APIInfoCreate, db: Session = D
     try:
         # 调用CRUD函数创建APIInfo
         created_api_info = create_api_info(db, api_info)
+        invalidate_api_info_cache(created_api_info.api_code)
         return HttpResponse.success(created_api_info)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
 
+@router.delete("/cache", response_model=HttpResponseModel[bool])
+async def clear_api_info_cache_endpoint(api_code: str | None = None):
+    """
+    清除API信息缓存, 直接修改数据库中的API信息后调用
+    :param api_code: 只清除指定编码, 不传则清空全部
+    :return: 是否成功
+    """
+    invalidate_api_info_cache(api_code)
+    return HttpResponse.success(True)
+
 @router.post("/search", response_model=HttpResponseModel[List[APIInfo]])
 async def search_api_info_endpoint(search_params: Dict[str, Any] | None, db: Session = Depends(get_db)) -> HttpResponseModel[List[APIInfo]]:
     """
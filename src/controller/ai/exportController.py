@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from fastapi import APIRouter, Query
+from starlette.responses import StreamingResponse
+
+from src.service.exportService import (
+    ExportFormat,
+    export_stream,
+    session_export_query,
+    session_detail_export_query,
+    schedule_task_export_query
+)
+
+# 创建路由
+router = APIRouter(prefix="/export", tags=["数据导出"])
+
+_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _streaming_response(name: str, statement, columns: List[str], fmt: ExportFormat, gzip: bool) -> StreamingResponse:
+    """
+    同步生成器由 StreamingResponse 放到线程池中迭代, 不阻塞事件循环
+    """
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{fmt.value}" + (".gz" if gzip else "")
+    body: Iterator[bytes] = export_stream(statement, columns, fmt, use_gzip=gzip)
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else _MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/sessions")
+def export_sessions(
+        user_id: Optional[str] = Query(None, description="用户ID"),
+        start: Optional[datetime] = Query(None, description="创建时间起(含)"),
+        end: Optional[datetime] = Query(None, description="创建时间止(不含)"),
+        fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="导出格式: ndjson/csv"),
+        gzip: bool = Query(False, description="是否gzip压缩")
+):
+    """
+    流式导出会话
+    """
+    statement, columns = session_export_query(user_id=user_id, start=start, end=end)
+    return _streaming_response("sessions", statement, columns, fmt, gzip)
+
+
+@router.get("/session-details")
+def export_session_details(
+        user_id: Optional[str] = Query(None, description="用户ID"),
+        session_id: Optional[str] = Query(None, description="会话ID"),
+        status: Optional[str] = Query(None, description="会话状态"),
+        start: Optional[datetime] = Query(None, description="创建时间起(含)"),
+        end: Optional[datetime] = Query(None, description="创建时间止(不含)"),
+        fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="导出格式: ndjson/csv"),
+        gzip: bool = Query(False, description="是否gzip压缩")
+):
+    """
+    流式导出会话详情, 导出一个月的数据内存占用也是恒定的
+    """
+    statement, columns = session_detail_export_query(user_id=user_id, session_id=session_id, status=status,
+                                                     start=start, end=end)
+    return _streaming_response("session_details", statement, columns, fmt, gzip)
+
+
+@router.get("/schedule-tasks")
+def export_schedule_tasks(
+        user_id: Optional[str] = Query(None, description="用户ID"),
+        status: Optional[str] = Query(None, description="状态(0:未完成, 1:已完成)"),
+        start: Optional[datetime] = Query(None, description="创建时间起(含)"),
+        end: Optional[datetime] = Query(None, description="创建时间止(不含)"),
+        fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="导出格式: ndjson/csv"),
+        gzip: bool = Query(False, description="是否gzip压缩")
+):
+    """
+    流式导出日程任务
+    """
+    statement, columns = schedule_task_export_query(user_id=user_id, status=status, start=start, end=end)
+    return _streaming_response("schedule_tasks", statement, columns, fmt, gzip)
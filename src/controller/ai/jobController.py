@@ -0,0 +1,38 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Query, Path
+
+from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
+from src.mySchedules.jobScheduler import job_scheduler
+from src.pojo.bo.jobBo import JobInfo, JobRun
+
+# 创建路由
+router = APIRouter(prefix="/jobs", tags=["定时任务"])
+
+
+@router.get("", response_model=HttpResponseModel[List[JobInfo]])
+async def list_jobs():
+    """
+    获取所有定时任务的配置、下次执行时间和最近一次执行记录
+    """
+    return HttpResponse.success(job_scheduler.jobs())
+
+
+@router.get("/history", response_model=HttpResponseModel[List[JobRun]])
+async def get_job_history(
+        name: Optional[str] = Query(None, description="任务名称, 为空返回所有任务"),
+        limit: int = Query(50, ge=1, le=500, description="返回条数")
+):
+    """
+    获取定时任务的执行记录(新的在前), 包含耗时、重试次数和失败原因
+    """
+    return HttpResponse.success(job_scheduler.history(name=name, limit=limit))
+
+
+@router.post("/{name}/run", response_model=HttpResponseModel[JobRun])
+async def run_job(name: str = Path(..., description="任务名称")):
+    """
+    立即执行一次定时任务(后台执行, 不等待结束), 遵守任务的最大并发限制
+    """
+    run = await job_scheduler.run_now(name)
+    return HttpResponse.success(run)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from src.utils.metricsUtils import CONTENT_TYPE_LATEST, metrics
+
+# 创建路由
+router = APIRouter(prefix="/metrics", tags=["监控"])
+
+
+@router.get("", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus 抓取接口, 文本格式(0.0.4)
+    """
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
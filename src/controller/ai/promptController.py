@@ -4,6 +4,7 @@ from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime
 import uuid
 
+from src.exception.aiException import AIException
 from src.db.db import get_db
 from src.pojo.po.promptPo import Prompt
 from src.dao.promptDao import (
@@ -29,7 +30,9 @@ from src.dao.promptDao import (
     count_prompts_by_status
 )
 from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
+from src.service.promptRegistryService import invalidate_prompt_cache
 from pydantic import BaseModel
+from src.utils.pageSearchUtil import CursorPageRequest, CursorPageResponse, paginate_by_cursor
 
 router = APIRouter(prefix="/ai/prompt", tags=["Prompt"])
 
@@ -260,6 +263,7 @@ async def create_prompt_endpoint(prompt_data: PromptCreate, db: Session = Depend
         # 转换为PO并创建
         prompt_po = prompt_data.to_po()
         created_prompt = create_prompt(db, prompt_po)
+        invalidate_prompt_cache()
         return HttpResponse.success(created_prompt)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -280,6 +284,7 @@ async def batch_create_prompts_endpoint(batch_data: BatchPromptCreate, db: Sessi
         # 转换为PO并批量创建
         prompt_pos = [prompt.to_po() for prompt in batch_data.prompts]
         created_prompts = batch_create_prompts(db, prompt_pos)
+        invalidate_prompt_cache()
         return HttpResponse.success(created_prompts)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -304,6 +309,7 @@ async def update_prompt_endpoint(prompt_id: str, prompt_data: PromptUpdate, db:
     updated_prompt = update_prompt(db, prompt_id, update_data)
     if not updated_prompt:
         return HttpResponse.error(msg=f"Prompt with id {prompt_id} not found")
+    invalidate_prompt_cache()
     
     return HttpResponse.success(updated_prompt)
 
@@ -327,6 +333,7 @@ async def update_prompt_by_code_endpoint(code: str, prompt_data: PromptUpdate, d
     updated_prompt = update_prompt_by_code(db, code, update_data)
     if not updated_prompt:
         return HttpResponse.error(msg=f"Prompt with code {code} not found")
+    invalidate_prompt_cache()
     
     return HttpResponse.success(updated_prompt)
 
@@ -345,6 +352,7 @@ async def delete_prompt_endpoint(prompt_id: str, db: Session = Depends(get_db)):
     result = delete_prompt(db, prompt_id)
     if not result:
         return HttpResponse.error(msg=f"Prompt with id {prompt_id} not found")
+    invalidate_prompt_cache()
     
     return HttpResponse.success(True)
 
@@ -363,6 +371,7 @@ async def delete_prompt_by_code_endpoint(code: str, db: Session = Depends(get_db
     result = delete_prompt_by_code(db, code)
     if not result:
         return HttpResponse.error(msg=f"Prompt with code {code} not found")
+    invalidate_prompt_cache()
     
     return HttpResponse.success(True)
 
@@ -384,6 +393,26 @@ async def search_prompts_endpoint(search_params: Dict[str, Any], db: Session = D
     except Exception as e:
         return HttpResponse.error(msg=str(e))
 
+@router.post("/cursor-page", response_model=HttpResponseModel[CursorPageResponse[Prompt]])
+async def cursor_page_prompts(page_request: CursorPageRequest, db: Session = Depends(get_db)):
+    """
+    游标分页查询提示词，翻页时传入上一页返回的 next_cursor
+    
+    Args:
+        page_request: 游标分页请求参数，包含游标、每页大小、排序和搜索条件
+        db: 数据库会话
+        
+    Returns:
+        游标分页响应，包含当前页数据和下一页游标
+    """
+    try:
+        return HttpResponse.success(paginate_by_cursor(db, Prompt, page_request))
+    except AIException:
+        # 游标无效或与排序不匹配, 交给全局异常处理返回 400
+        raise
+    except Exception as e:
+        return HttpResponse.error(msg=str(e))
+
 @router.post("/increment-usage/{prompt_id}", response_model=HttpResponseModel[Prompt])
 async def increment_usage_count_endpoint(prompt_id: str, db: Session = Depends(get_db)):
     """
@@ -226,35 +226,15 @@ async def search_schedule_tasks(
             start_of_day = datetime.combine(query_date, datetime.min.time())
             end_of_day = datetime.combine(query_date, datetime.max.time())
             
-            # 如果有用户ID，则查询特定用户在特定日期的任务
-            if search_params.user_id:
-                # 先获取用户当天的所有任务
-                tasks = appScheduleTaskDao.get_schedule_tasks_by_date_range(db, start_of_day, end_of_day)
-                
-                # 然后筛选出特定用户的任务
-                tasks = [task for task in tasks if task.user_id == search_params.user_id]
-                
-                # 应用其他搜索条件
-                for field, value in search_dict.items():
-                    if field != 'user_id':  # 已经筛选过用户ID了
-                        if field in AppScheduleTask.like_search_fields and isinstance(value, str):
-                            tasks = [task for task in tasks if value.lower() in getattr(task, field, '').lower()]
-                        else:
-                            tasks = [task for task in tasks if getattr(task, field, None) == value]
-                
-                return HttpResponse.success(tasks)
-            else:
-                # 如果没有用户ID，则直接查询当天的所有任务，然后应用其他搜索条件
-                tasks = appScheduleTaskDao.get_schedule_tasks_by_date_range(db, start_of_day, end_of_day)
-                
-                # 应用其他搜索条件
-                for field, value in search_dict.items():
-                    if field in AppScheduleTask.like_search_fields and isinstance(value, str):
-                        tasks = [task for task in tasks if value.lower() in getattr(task, field, '').lower()]
-                    else:
-                        tasks = [task for task in tasks if getattr(task, field, None) == value]
-                
-                return HttpResponse.success(tasks)
+            # 用户、状态、类型及其它条件都在数据库中筛选
+            tasks = appScheduleTaskDao.search_user_schedule_tasks_by_date_range(
+                db, start_of_day, end_of_day,
+                user_id=search_dict.pop('user_id', None),
+                status=search_dict.pop('status', None),
+                task_type=search_dict.pop('type', None),
+                search_params=search_dict
+            )
+            return HttpResponse.success(list(tasks))
         else:
             # 如果没有日期参数，则使用原有的搜索逻辑
             tasks = appScheduleTaskDao.search_schedule_tasks(db, search_dict)
@@ -280,6 +260,34 @@ async def get_user_schedule_tasks(
     tasks = appScheduleTaskDao.get_schedule_tasks_by_user_id(db, user_id)
     return HttpResponse.success(list(tasks))
 
+@router.get("/calendar", response_model=HttpResponseModel[List[AppScheduleTask]])
+async def get_calendar_tasks(
+    user_id: str = Query(..., description="用户ID"),
+    start: datetime = Query(..., description="开始时间"),
+    end: datetime = Query(..., description="结束时间"),
+    status: Optional[TaskStatus] = Query(None, description="状态"),
+    type: Optional[TaskType] = Query(None, description="类型"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取用户与时间范围有交集的日程或任务(日历视图)
+    
+    Args:
+        user_id: 用户ID
+        start: 开始时间
+        end: 结束时间
+        status: 状态
+        type: 类型
+        db: 数据库会话
+        
+    Returns:
+        按开始时间排序的日程/任务列表
+    """
+    if start > end:
+        return HttpResponse.error(msg="开始时间不能晚于结束时间")
+    tasks = appScheduleTaskDao.get_user_schedule_tasks_overlapping(db, user_id, start, end, status=status, task_type=type)
+    return HttpResponse.success(list(tasks))
+
 @router.get("/ending-soon", response_model=HttpResponseModel[List[AppScheduleTask]])
 async def get_ending_soon_tasks(
     user_id: str = Query(..., description="用户ID"),
@@ -322,20 +330,12 @@ async def get_today_ending_soon_tasks(
     today_start = datetime.combine(today, datetime.min.time())
     today_end = datetime.combine(today, datetime.max.time())
     
-    # 获取今天的所有任务
-    today_tasks = appScheduleTaskDao.get_schedule_tasks_by_date_range(db, today_start, today_end)
-    # todo 筛选用户这段逻辑放进Dao层
-    # 筛选出特定用户的任务
-    today_tasks = [task for task in today_tasks if task.user_id == user_id]
-    
-    # 筛选出结束时间在N小时内的任务
+    # 结束时间在N小时内、未完成且与今天有交集的任务
     now = datetime.now()
     n_hours_later = now + timedelta(hours=hours)
-    
-    ending_soon_tasks = [
-        task for task in today_tasks 
-        if task.end_time and now <= task.end_time <= n_hours_later and task.status == TaskStatus.INCOMPLETE
-    ]
+    ending_soon_tasks = list(appScheduleTaskDao.get_user_schedule_tasks_ending_between(
+        db, user_id, now, n_hours_later, status=TaskStatus.INCOMPLETE, within=(today_start, today_end)
+    ))
     
     return HttpResponse.success(
         ending_soon_tasks,
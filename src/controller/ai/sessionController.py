@@ -20,6 +20,7 @@ from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
 from pydantic import BaseModel
 
 from src.service.sessionService import when_search_session
+from src.service.sessionResolverService import session_resolver
 
 router = APIRouter(prefix="/ai/session", tags=["Session"])
 
@@ -134,6 +135,7 @@ async def create_session_endpoint(session_data: SessionCreate, db: Session = Dep
         # 转换为PO并创建
         session_po = session_data.to_po()
         created_session = create_session(db, session_po)
+        session_resolver.invalidate_user(created_session.user_id)
         return HttpResponse.success(created_session)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -158,6 +160,7 @@ async def update_session_endpoint(session_id: str, session_data: SessionUpdate,
     updated_session = update_session(db, session_id, update_data)
     if not updated_session:
         return HttpResponse.error(msg=f"Session with id {session_id} not found")
+    session_resolver.invalidate_session(session_id)
     
     return HttpResponse.success(updated_session)
 
@@ -176,6 +179,7 @@ async def delete_session_endpoint(session_id: str, db: Session = Depends(get_db)
     result = delete_session(db, session_id)
     if not result:
         return HttpResponse.error(msg=f"Session with id {session_id} not found")
+    session_resolver.invalidate_session(session_id)
     
     return HttpResponse.success(True)
 
@@ -4,6 +4,7 @@ from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime
 import uuid
 
+from src.exception.aiException import AIException
 from src.db.db import get_db
 from src.pojo.po.sessionDetailPo import SessionDetail
 from src.dao.sessionDetailDao import (
@@ -16,10 +17,14 @@ from src.dao.sessionDetailDao import (
     delete_session_detail,
     delete_session_details_by_session_id,
     get_latest_session_detail,
-    count_session_details
+    count_session_details,
+    fulltext_search_session_details
 )
 from src.myHttp.bo.httpResponse import HttpResponse, HttpResponseModel
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from src.pojo.bo.sessionBo import SessionDetailHit
+from src.utils.pageSearchUtil import CursorPageRequest, CursorPageResponse, paginate_by_cursor
+from src.service.sessionResolverService import session_resolver
 
 router = APIRouter(prefix="/ai/session-detail", tags=["Session Detail"])
 
@@ -71,6 +76,15 @@ class SessionDetailUpdate(BaseModel):
     agent: Optional[str] = None
     status: Optional[str] = None
 
+# 全文检索的请求模型
+class SessionDetailFulltextSearch(BaseModel):
+    keyword: str = Field(..., min_length=1, description="关键词, 多个词用空格分隔, 需同时出现")
+    user_id: Optional[str] = Field(default=None, description="只检索该用户的会话")
+    fields: Optional[List[str]] = Field(default=None, description="限定匹配的字段: user_question, final_response, api_output, process_log")
+    search_params: Optional[Dict[str, Any]] = Field(default=None, description="其它搜索参数")
+    page: int = Field(default=1, ge=1, description="页码，从1开始")
+    page_size: int = Field(default=20, ge=1, le=100, description="每页记录数")
+
 @router.get("/{detail_id}", response_model=HttpResponseModel[SessionDetail])
 async def get_session_detail(detail_id: str, db: Session = Depends(get_db)):
     """
@@ -229,6 +243,7 @@ async def delete_session_details(session_id: str, db: Session = Depends(get_db))
         删除的记录数量
     """
     count = delete_session_details_by_session_id(db, session_id)
+    session_resolver.invalidate_session(session_id)
     return HttpResponse.success(count)
 
 @router.post("/search", response_model=HttpResponseModel[List[SessionDetail]])
@@ -248,3 +263,44 @@ async def search_details(search_params: Dict[str, Any] | None, db: Session = Dep
         return HttpResponse.success(results)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
+
+@router.post("/cursor-page", response_model=HttpResponseModel[CursorPageResponse[SessionDetail]])
+async def cursor_page_details(page_request: CursorPageRequest, db: Session = Depends(get_db)):
+    """
+    游标分页查询会话详情，翻页时传入上一页返回的 next_cursor
+    
+    Args:
+        page_request: 游标分页请求参数，包含游标、每页大小、排序和搜索条件
+        db: 数据库会话
+        
+    Returns:
+        游标分页响应，包含当前页数据和下一页游标
+    """
+    try:
+        return HttpResponse.success(paginate_by_cursor(db, SessionDetail, page_request))
+    except AIException:
+        # 游标无效或与排序不匹配, 交给全局异常处理返回 400
+        raise
+    except Exception as e:
+        return HttpResponse.error(msg=str(e))
+
+@router.post("/fulltext", response_model=HttpResponseModel[List[SessionDetailHit]])
+async def fulltext_search_details(params: SessionDetailFulltextSearch, db: Session = Depends(get_db)):
+    """
+    全文检索会话详情, 按相关度排序
+
+    Args:
+        params: 检索参数
+        db: 数据库会话
+
+    Returns:
+        会话详情及相关度列表
+    """
+    try:
+        rows = fulltext_search_session_details(
+            db, params.keyword, user_id=params.user_id, fields=params.fields, search_params=params.search_params,
+            limit=params.page_size, offset=(params.page - 1) * params.page_size
+        )
+        return HttpResponse.success([SessionDetailHit(detail=detail, score=score) for detail, score in rows])
+    except Exception as e:
+        return HttpResponse.error(msg=str(e))
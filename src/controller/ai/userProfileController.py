@@ -26,6 +26,7 @@ from pydantic import BaseModel, Field
 
 from src.service.userProfileService import analysis_language_style, analysis_preference_questions, \
     analysis_personality_traits
+from src.service.knownUserService import known_users
 
 router = APIRouter(prefix="/user-profile", tags=["用户画像"])
 
@@ -221,6 +222,7 @@ async def create_profile(profile_data: UserProfileCreate, db: Session = Depends(
         # 转换为PO并创建
         profile_po = profile_data.to_po()
         created_profile = create_user_profile(db, profile_po)
+        known_users.add(created_profile.user_id)
         return HttpResponse.success(created_profile)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -241,6 +243,8 @@ async def batch_create_profiles(batch_data: BatchUserProfileCreate, db: Session
         # 转换为PO并批量创建
         profile_pos = [profile.to_po() for profile in batch_data.profiles]
         created_profiles = batch_create_user_profiles(db, profile_pos)
+        for created_profile in created_profiles:
+            known_users.add(created_profile.user_id)
         return HttpResponse.success(created_profiles)
     except Exception as e:
         return HttpResponse.error(msg=str(e))
@@ -303,9 +307,11 @@ async def delete_profile(profile_id: str, db: Session = Depends(get_db)):
     Returns:
         是否成功删除
     """
+    profile = get_profile_by_id(db, profile_id)
     result = delete_user_profile(db, profile_id)
     if not result:
         return HttpResponse.error(msg=f"User profile with id {profile_id} not found")
+    known_users.discard(profile.user_id)
 
     return HttpResponse.success(True)
 
@@ -324,6 +330,7 @@ async def delete_profile_by_user_id(user_id: str, db: Session = Depends(get_db))
     result = delete_user_profile_by_user_id(db, user_id)
     if not result:
         return HttpResponse.error(msg=f"User profile for user {user_id} not found")
+    known_users.discard(user_id)
 
     return HttpResponse.success(True)
 
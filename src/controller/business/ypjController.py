@@ -3,7 +3,8 @@ import os
 from dotenv import load_dotenv
 from fastapi import APIRouter
 from starlette.responses import StreamingResponse
-from src.ai.myDashScope.common import get_dashscope_completion, DashScopeAPIParam, sse_event_generator, result_handle
+from src.ai.myDashScope.common import get_dashscope_completion_async, DashScopeAPIParam, sse_event_generator, \
+    result_handle
 
 router = APIRouter(prefix="/ypj", tags=["易拍居 相关"])
 
@@ -14,7 +15,8 @@ load_dotenv()
 @router.post("/get_address_info")
 async def get_address_info(params: DashScopeAPIParam):
     params.app_id=os.getenv("ADDRESS_APP_ID")
-    result = get_dashscope_completion(params)
+    # SDK是同步的, 在线程池中执行, 不阻塞其它请求
+    result = await get_dashscope_completion_async(params)
     result = result_handle(result,params.stream)
     if params.stream:
         return StreamingResponse(
@@ -1,18 +1,16 @@
 import logging
-import json
 import random
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, Field
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.common.enum.codeEnum import CodeEnum
-from src.dao.userProfileDao import get_profile_by_user_id
-from src.db.db import get_db, engine
+from src.dao.userProfileDao import get_profile_by_user_id_async
+from src.db.db import get_async_db
 from src.exception.aiException import AIException
 from src.pojo.vo.difyParamVo import DifyJxm, DifyYpj, DifyYpjReport
 from src.service.difyService import normal_dify_flow
 from fastapi.responses import StreamingResponse
 import asyncio
-from src.utils.dataUtils import is_valid_json
 from src.utils.dateUtils import get_now_4_prompt
 
 router = APIRouter(prefix="/dify", tags=["DIFY 相关"])
@@ -23,19 +21,23 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/chatflow-jxm")
-async def chatflow_jxm(param: DifyJxm, db: Session = Depends(get_db)):
+async def chatflow_jxm(param: DifyJxm, db: AsyncSession = Depends(get_async_db),
+                       passthrough: bool = Query(False, description="流式时原样透传Dify的SSE事件")):
     api_code = CodeEnum.JXM_API_CODE.value
     jxm_param = param.to_jxm()
-    return await normal_dify_flow(api_code=api_code,user_id=param.user_id,dify_param=jxm_param,db=db)
+    return await normal_dify_flow(api_code=api_code,user_id=param.user_id,dify_param=jxm_param,db=db,
+                                  passthrough=passthrough)
 
 @router.post("/chatflow-ypj")
-async def chatflow_ypj(param: DifyYpj,  db: Session = Depends(get_db)):
+async def chatflow_ypj(param: DifyYpj,  db: AsyncSession = Depends(get_async_db),
+                       passthrough: bool = Query(False, description="流式时原样透传Dify的SSE事件")):
     api_code = CodeEnum.YPJ_API_CODE.value
     ypj_param = param.model_dump()
-    return await normal_dify_flow(api_code=api_code,user_id=param.user,dify_param=ypj_param,db=db)
+    return await normal_dify_flow(api_code=api_code,user_id=param.user,dify_param=ypj_param,db=db,
+                                  passthrough=passthrough)
 
 @router.post("/chatflow-ypj/report")
-async def ypj_report(param: DifyYpjReport, db: Session = Depends(get_db)):
+async def ypj_report(param: DifyYpjReport, db: AsyncSession = Depends(get_async_db)):
     """
     生成 YPJ 报告（非流式），仅需 houses_id
     - user 使用 houses_id 作为会话关联键（或后续可换成真实 user）
@@ -52,9 +54,9 @@ async def ypj_report(param: DifyYpjReport, db: Session = Depends(get_db)):
     return await normal_dify_flow(api_code=api_code, user_id=dify_param["user"], dify_param=dify_param, db=db)
 
 @router.get("/info/{user}")
-async def get_info(user: str, db: Session = Depends(get_db)):
+async def get_info(user: str, db: AsyncSession = Depends(get_async_db)):
     user_info = "未查询到"
-    profile = get_profile_by_user_id(session=db, user_id=user)
+    profile = await get_profile_by_user_id_async(session=db, user_id=user)
     if profile:
         user_info = profile.user_info
     return f"{get_now_4_prompt()} 用户的信息: {user_info}"
@@ -81,35 +83,26 @@ async def event_stream_fake(text: str):
 async def do_stream_post_dify(message_queue):
     """
     流式请求Dify,接受一个回调函数，在流输出结束之后执行
-    :param message_queue: 消息队列
+    :param message_queue: 消息队列, 元素为 stream_post_and_enqueue 解析好的Dify事件字典
     :return:
     """
     async def event_stream():
         while True:
             try:
                 # 设置超时
-                data = await asyncio.wait_for(message_queue.get(), timeout=60.0)
-                logger.debug(f"SSE接收到消息: {data}")
-                data = data.decode('utf-8', errors='ignore')
-                if data.startswith("data: "):
-                    json_str = data[6:].strip()  # 去掉前6个字符("data: ")并去除首尾空白
-                else:
-                    json_str = data.strip()
-
-                if is_valid_json(json_str):
-                    json_data = json.loads(json_str)
-                    if "error" == json_data.get("event"):
-                        yield f"event: dify error "+json_data.get("message")
-                        break
-                    # 丢掉普通节点的信息，只传msg
-                    if "message" not in json_data.get("event"):
-                        continue
-                    logger.debug(f"SSE接收到message: {data}")
-                    if json_data.get("event") == "message_end":
-                        logger.debug("检测到结束指令，关闭SSE流")
-                        # yield f"data: {json_str}\n\n"
-                        break
-                    yield f"data: {json_data.get("answer")}\n\n"
+                json_data = await asyncio.wait_for(message_queue.get(), timeout=60.0)
+                logger.debug(f"SSE接收到消息: {json_data}")
+                event_type = json_data.get("event") or ""
+                if "error" == event_type:
+                    yield f"event: dify error "+str(json_data.get("message"))
+                    break
+                # 丢掉普通节点的信息，只传msg
+                if "message" not in event_type:
+                    continue
+                if event_type == "message_end":
+                    logger.debug("检测到结束指令，关闭SSE流")
+                    break
+                yield f"data: {json_data.get('answer')}\n\n"
 
             except asyncio.TimeoutError:
                 logger.debug("超时，关闭SSE流")
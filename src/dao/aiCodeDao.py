@@ -1,9 +1,12 @@
 from typing import Optional, Dict, List, Any, Sequence
 from datetime import datetime
 
+from sqlalchemy import func
 from sqlmodel import Session, select, update,delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.pojo.po.aiCodePo import Code
+from src.utils.countUtils import count_cache
 
 def create_code(session: Session, code: Code) -> Code:
     """
@@ -221,9 +224,8 @@ def count_codes_by_type(session: Session, type_value: str) -> int:
     Returns:
         编码记录的数量
     """
-    statement = select(Code).where(Code.type == type_value)
-    results = session.exec(statement).all()
-    return len(results)
+    statement = select(func.count()).select_from(Code).where(Code.type == type_value)
+    return count_cache.count(session, statement)
 
 def get_all_codes(session: Session) -> Sequence[Code]:
     """
@@ -253,3 +255,20 @@ def get_codes_by_mapper(session: Session, mapper: str) -> Sequence[Code]:
     statement = select(Code).where(Code.mapper == mapper)
     results = session.exec(statement).all()
     return results
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def get_code_by_code_async(session: AsyncSession, code_value: str) -> Optional[Code]:
+    """
+    通过编码值获取编码记录(异步)
+
+    Args:
+        session: 异步数据库会话
+        code_value: 编码值
+
+    Returns:
+        编码模型实例，如果不存在则返回None
+    """
+    statement = select(Code).where(Code.code == code_value)
+    result = (await session.exec(statement)).first()
+    return result
\ No newline at end of file
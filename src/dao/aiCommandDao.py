@@ -1,9 +1,11 @@
 from typing import Optional, Dict, Any, Sequence, List
 
+from sqlalchemy import func
 from sqlmodel import Session, select
 
 from src.exception.aiException import AIException
 from src.pojo.po.aiCommandPo import AICommand
+from src.utils.countUtils import count_cache
 
 
 def create_ai_command(session: Session, command: AICommand) -> AICommand:
@@ -65,20 +67,13 @@ def delete_ai_command(session: Session, command_id: int) -> bool:
     return True
 
 
-def search_ai_commands(
-    session: Session,
-    filters: Dict[str, Any],
-    limit: int = 50,
-    offset: int = 0,
-    order_by_priority_desc: bool = True,
-) -> Sequence[AICommand]:
+def _search_conditions(filters: Dict[str, Any]) -> List[Any]:
     """
-    动态条件搜索：
+    搜索条件：
     - 支持按状态、分类、handler_type 等精确匹配
     - 支持 command_name / command_code / trigger_keywords 模糊搜索
-    - 按优先级排序（默认倒序）
     """
-    statement = select(AICommand)
+    conditions: List[Any] = []
 
     # 精确匹配
     exact_fields = [
@@ -91,19 +86,35 @@ def search_ai_commands(
     for field in exact_fields:
         value = filters.get(field)
         if value is not None:
-            statement = statement.where(getattr(AICommand, field) == value)
+            conditions.append(getattr(AICommand, field) == value)
 
     # 模糊搜索
     keyword = filters.get("keyword")
     if keyword:
         like = f"%{keyword}%"
-        statement = statement.where(
+        conditions.append(
             (AICommand.command_name.like(like))
             | (AICommand.command_code.like(like))
             | (AICommand.trigger_keywords.like(like))
             | (AICommand.handler_target.like(like))
             | (AICommand.remark.like(like))
         )
+    return conditions
+
+
+def search_ai_commands(
+    session: Session,
+    filters: Dict[str, Any],
+    limit: int = 50,
+    offset: int = 0,
+    order_by_priority_desc: bool = True,
+) -> Sequence[AICommand]:
+    """
+    动态条件搜索：
+    - 条件见 _search_conditions
+    - 按优先级排序（默认倒序）
+    """
+    statement = select(AICommand).where(*_search_conditions(filters))
 
     # 排序
     if order_by_priority_desc:
@@ -121,6 +132,6 @@ def search_ai_commands(
 
 
 def count_ai_commands(session: Session, filters: Dict[str, Any]) -> int:
-    """统计数量（与 search 条件一致）"""
-    # 简化实现：直接取全部再计数（小规模足够，后续可改为select(func.count())）
-    return len(search_ai_commands(session, filters, limit=0, offset=0)) 
\ No newline at end of file
+    """统计数量（与 search 条件一致，SELECT COUNT 并短时间缓存）"""
+    statement = select(func.count()).select_from(AICommand).where(*_search_conditions(filters))
+    return count_cache.count(session, statement) 
\ No newline at end of file
@@ -2,6 +2,7 @@ from typing import Optional, Dict, List, Any
 
 from sqlalchemy import Sequence
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.exception.aiException import AIException
 from src.pojo.po.apiInfoPo import APIInfo
@@ -71,3 +72,28 @@ def search_api_info(session: Session, search_params: Dict[str, Any]) -> Sequence
     # 执行查询
     results = session.exec(statement).all()
     return results
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def get_info_by_api_code_async(session: AsyncSession, api_code: str)  -> Optional[APIInfo]:
+    """
+    带校验获取(异步)，如果没找到直接报错
+    :param session:
+    :param api_code:
+    :return:
+    """
+    api = await get_info_by_api_code_no_check_async(session, api_code)
+    if api is None:
+        raise AIException.quick_raise(f"没有找到对应的API信息(api_code:{api_code})")
+    return api
+
+async def get_info_by_api_code_no_check_async(session: AsyncSession, api_code: str)  -> Optional[APIInfo]:
+    """
+    不带校验的获取(异步)
+    :param session:
+    :param api_code:
+    :return:
+    """
+    statement = select(APIInfo).where(APIInfo.api_code == api_code)
+    api = (await session.exec(statement)).first()
+    return api
\ No newline at end of file
@@ -1,4 +1,6 @@
-from typing import Optional, Dict, List, Any, Sequence
+import os
+from enum import Enum
+from typing import Optional, Dict, List, Any, Sequence, Tuple
 from datetime import datetime, timedelta
 
 from sqlmodel import Session, select, delete, update
@@ -6,6 +8,21 @@ from sqlalchemy import func, and_, or_, between
 
 from src.exception.aiException import AIException
 from src.pojo.po.appScheduleTaskPo import AppScheduleTask, TaskStatus, TaskType, TaskSource
+from src.utils.intervalTree import GroupedIntervalIndex
+
+
+class ScheduleTaskIndexConfig:
+    # 是否启用按用户的日程区间索引(日历视图的时间范围查询)
+    ENABLED: bool = os.getenv("SCHEDULE_TASK_INDEX_ENABLED", "true").lower() == "true"
+    # 最多缓存的用户数
+    MAX_USERS: int = int(os.getenv("SCHEDULE_TASK_INDEX_MAX_USERS", 2048))
+    # 用户索引的有效期（秒）, 多实例部署时其它实例的修改最多延迟该时间可见
+    TTL: float = float(os.getenv("SCHEDULE_TASK_INDEX_TTL", 60))
+
+
+# 用户ID -> 该用户日程的区间树, 本模块的增删改同步维护
+_user_task_index: GroupedIntervalIndex[AppScheduleTask] = GroupedIntervalIndex(
+    max_groups=ScheduleTaskIndexConfig.MAX_USERS, ttl=ScheduleTaskIndexConfig.TTL)
 
 def create_schedule_task(session: Session, task: AppScheduleTask) -> AppScheduleTask:
     """
@@ -21,6 +38,7 @@ def create_schedule_task(session: Session, task: AppScheduleTask) -> AppSchedule
     session.add(task)
     session.commit()
     session.refresh(task)
+    _sync_task_index(task)
     return task
 
 def batch_create_schedule_tasks(session: Session, tasks: List[AppScheduleTask]) -> List[AppScheduleTask]:
@@ -38,6 +56,7 @@ def batch_create_schedule_tasks(session: Session, tasks: List[AppScheduleTask])
     session.commit()
     for task in tasks:
         session.refresh(task)
+        _sync_task_index(task)
     return tasks
 
 def get_schedule_task_by_id(session: Session, task_id: str) -> Optional[AppScheduleTask]:
@@ -86,24 +105,39 @@ def search_schedule_tasks(session: Session, search_params: Dict[str, Any]) -> Se
     Returns:
         符合条件的AppScheduleTask列表
     """
-    statement = select(AppScheduleTask)
+    statement = _apply_search_params(select(AppScheduleTask), search_params)
 
+    # 执行查询
+    results = session.exec(statement).all()
+    return results
+
+def _apply_search_params(statement, search_params: Optional[Dict[str, Any]]):
+    """
+    把搜索参数转换为SQL条件: like_search_fields 中的字段用 like, 其它字段精确匹配
+
+    Args:
+        statement: 查询语句
+        search_params: 搜索参数字典，键为AppScheduleTask的字段名
+
+    Returns:
+        追加条件后的查询语句
+    """
     # 获取AppScheduleTask类的所有字段名
     task_fields = [column.name for column in AppScheduleTask.__table__.columns]
 
     # 动态构建查询条件
-    for field, value in search_params.items():
+    for field, value in (search_params or {}).items():
         if field in task_fields and value is not None:
+            # 枚举按字符数字值比较
+            if isinstance(value, Enum):
+                value = value.value
             # 根据字段是否在like_search_fields中决定查询方式
             if field in AppScheduleTask.like_search_fields and isinstance(value, str):
                 statement = statement.where(getattr(AppScheduleTask, field).like(f"%{value}%"))
             else:
                 # 对于其他字段，使用精确匹配
                 statement = statement.where(getattr(AppScheduleTask, field) == value)
-
-    # 执行查询
-    results = session.exec(statement).all()
-    return results
+    return statement
 
 def update_schedule_task(session: Session, task_id: str, update_data: Dict[str, Any]) -> Optional[AppScheduleTask]:
     """
@@ -121,6 +155,7 @@ def update_schedule_task(session: Session, task_id: str, update_data: Dict[str,
     db_task = get_schedule_task_by_id(session, task_id)
     if not db_task:
         return None
+    previous_user_id = db_task.user_id
 
     # 更新字段
     for field, value in update_data.items():
@@ -130,6 +165,7 @@ def update_schedule_task(session: Session, task_id: str, update_data: Dict[str,
     session.add(db_task)
     session.commit()
     session.refresh(db_task)
+    _sync_task_index(db_task, previous_user_id)
     return db_task
 
 def delete_schedule_task(session: Session, task_id: str) -> bool:
@@ -147,8 +183,10 @@ def delete_schedule_task(session: Session, task_id: str) -> bool:
     if not db_task:
         return False
 
+    user_id = db_task.user_id
     session.delete(db_task)
     session.commit()
+    _user_task_index.remove(user_id, task_id)
     return True
 
 def get_schedule_tasks_by_user_id(session: Session, user_id: str) -> Sequence[AppScheduleTask]:
@@ -328,6 +366,7 @@ def mark_schedule_task_as_complete(session: Session, task_id: str, is_complete:
     session.add(db_task)
     session.commit()
     session.refresh(db_task)
+    _sync_task_index(db_task)
     return db_task
 
 def count_schedule_tasks(session: Session) -> int:
@@ -400,15 +439,8 @@ def get_schedule_tasks_by_date_range(session: Session, start_date: datetime, end
     Returns:
         日程/任务模型实例列表
     """
-    # 查询条件：开始时间或结束时间在指定日期范围内，或跨越整个日期范围
-    statement = select(AppScheduleTask).where(
-        or_(
-            and_(AppScheduleTask.start_time >= start_date, AppScheduleTask.start_time <= end_date),
-            and_(AppScheduleTask.end_time >= start_date, AppScheduleTask.end_time <= end_date),
-            and_(AppScheduleTask.start_time <= start_date, AppScheduleTask.end_time >= end_date)
-        )
-    )
-    
+    statement = select(AppScheduleTask).where(_overlaps(start_date, end_date))
+
     results = session.exec(statement).all()
     return results
 
@@ -465,4 +497,160 @@ def get_tasks_by_importance_urgency(session: Session, is_important: bool, is_urg
     )
     
     results = session.exec(statement).all()
-    return results
\ No newline at end of file
+    return results
+
+def _overlaps(start_date: datetime, end_date: datetime):
+    """
+    与时间范围有交集的条件: 开始时间或结束时间在范围内，或跨越整个范围
+
+    写成 start_time <= end_date AND end_time >= start_date 的形式，配合 (user_id, start_time, end_time) 索引可以按范围扫描；
+    只有开始或结束时间的记录单独判断，结果与逐项判断三种情况一致
+    """
+    return or_(
+        and_(AppScheduleTask.start_time <= end_date, AppScheduleTask.end_time >= start_date),
+        and_(AppScheduleTask.end_time.is_(None), AppScheduleTask.start_time.between(start_date, end_date)),
+        and_(AppScheduleTask.start_time.is_(None), AppScheduleTask.end_time.between(start_date, end_date))
+    )
+
+def search_user_schedule_tasks_by_date_range(session: Session, start_date: datetime, end_date: datetime,
+                                             user_id: Optional[str] = None, status: Optional[TaskStatus] = None,
+                                             task_type: Optional[TaskType] = None,
+                                             search_params: Optional[Dict[str, Any]] = None) -> Sequence[AppScheduleTask]:
+    """
+    在数据库中按用户、状态、类型和时间范围筛选日程或任务，使用 (user_id, start_time, end_time) 索引
+
+    Args:
+        session: 数据库会话
+        start_date: 开始时间
+        end_date: 结束时间
+        user_id: 用户ID，为空时不限用户
+        status: 任务状态
+        task_type: 任务类型
+        search_params: 其它搜索参数，规则同 search_schedule_tasks
+
+    Returns:
+        按开始时间排序的日程/任务列表
+    """
+    statement = select(AppScheduleTask).where(_overlaps(start_date, end_date))
+    if user_id is not None:
+        statement = statement.where(AppScheduleTask.user_id == user_id)
+    if status is not None:
+        statement = statement.where(AppScheduleTask.status == TaskStatus(status).value)
+    if task_type is not None:
+        statement = statement.where(AppScheduleTask.type == TaskType(task_type).value)
+    statement = _apply_search_params(statement, search_params).order_by(AppScheduleTask.start_time)
+
+    results = session.exec(statement).all()
+    return results
+
+def get_user_schedule_tasks_ending_between(session: Session, user_id: str, end_from: datetime, end_to: datetime,
+                                           status: Optional[TaskStatus] = TaskStatus.INCOMPLETE,
+                                           task_type: Optional[TaskType] = None,
+                                           within: Optional[Tuple[datetime, datetime]] = None) -> Sequence[AppScheduleTask]:
+    """
+    获取用户结束时间在指定范围内的日程或任务，使用 (user_id, status, end_time) 索引
+
+    Args:
+        session: 数据库会话
+        user_id: 用户ID
+        end_from: 结束时间下限
+        end_to: 结束时间上限
+        status: 任务状态，默认未完成，为空时不限状态
+        task_type: 任务类型
+        within: (开始, 结束)，只返回与该时间范围有交集的记录
+
+    Returns:
+        按结束时间排序的日程/任务列表
+    """
+    statement = select(AppScheduleTask).where(
+        AppScheduleTask.user_id == user_id,
+        AppScheduleTask.end_time.between(end_from, end_to)
+    )
+    if status is not None:
+        statement = statement.where(AppScheduleTask.status == TaskStatus(status).value)
+    if task_type is not None:
+        statement = statement.where(AppScheduleTask.type == TaskType(task_type).value)
+    if within is not None:
+        statement = statement.where(_overlaps(*within))
+    statement = statement.order_by(AppScheduleTask.end_time)
+
+    results = session.exec(statement).all()
+    return results
+
+def _task_interval(task: AppScheduleTask) -> Optional[Tuple[datetime, datetime]]:
+    """日程在区间树中的区间, 只有开始或结束时间的按时间点处理, 都没有的不进索引"""
+    if task.start_time is None and task.end_time is None:
+        return None
+    start = task.start_time or task.end_time
+    end = task.end_time or task.start_time
+    return (start, end) if start <= end else (end, start)
+
+def _snapshot(task: AppScheduleTask) -> AppScheduleTask:
+    """复制一份不绑定会话的日程, 放进索引或返回给调用方"""
+    return AppScheduleTask.model_validate(task.model_dump())
+
+def _sync_task_index(task: AppScheduleTask, previous_user_id: Optional[str] = None):
+    """
+    提交后同步区间索引
+
+    Args:
+        task: 已提交的日程/任务
+        previous_user_id: 修改前的用户ID, 用户变化时从原用户的索引中删除
+    """
+    if previous_user_id is not None and previous_user_id != task.user_id:
+        _user_task_index.remove(previous_user_id, task.id)
+    interval = _task_interval(task)
+    if interval is None:
+        _user_task_index.remove(task.user_id, task.id)
+    else:
+        _user_task_index.upsert(task.user_id, task.id, interval[0], interval[1], _snapshot(task))
+
+def _load_user_task_index(session: Session, user_id: str):
+    version = _user_task_index.version(user_id)
+    intervals = []
+    try:
+        for task in get_schedule_tasks_by_user_id(session, user_id):
+            interval = _task_interval(task)
+            if interval is not None:
+                intervals.append((task.id, interval[0], interval[1], _snapshot(task)))
+    except Exception:
+        _user_task_index.cancel_load(user_id)
+        raise
+    _user_task_index.load(user_id, intervals, version)
+
+def get_user_schedule_tasks_overlapping(session: Session, user_id: str, start_date: datetime, end_date: datetime,
+                                        status: Optional[TaskStatus] = None,
+                                        task_type: Optional[TaskType] = None) -> Sequence[AppScheduleTask]:
+    """
+    获取用户与时间范围有交集的日程或任务(日历视图)
+
+    用户第一次查询时读取其全部日程建立区间树, 之后的查询在内存中完成, 复杂度 O(log n + k);
+    本模块的增删改同步更新区间树, 结果与 search_user_schedule_tasks_by_date_range 一致
+
+    Args:
+        session: 数据库会话
+        user_id: 用户ID
+        start_date: 开始时间
+        end_date: 结束时间
+        status: 任务状态
+        task_type: 任务类型
+
+    Returns:
+        按开始时间排序的日程/任务列表
+    """
+    if not ScheduleTaskIndexConfig.ENABLED:
+        return search_user_schedule_tasks_by_date_range(session, start_date, end_date, user_id=user_id,
+                                                         status=status, task_type=task_type)
+    tasks = _user_task_index.overlap(user_id, start_date, end_date)
+    if tasks is None:
+        _load_user_task_index(session, user_id)
+        tasks = _user_task_index.overlap(user_id, start_date, end_date)
+        if tasks is None:
+            # 加载期间有写入, 本次直接查数据库
+            return search_user_schedule_tasks_by_date_range(session, start_date, end_date, user_id=user_id,
+                                                             status=status, task_type=task_type)
+    if status is not None:
+        tasks = [task for task in tasks if task.status == TaskStatus(status).value]
+    if task_type is not None:
+        tasks = [task for task in tasks if task.type == TaskType(task_type).value]
+    return [_snapshot(task) for task in tasks]
\ No newline at end of file
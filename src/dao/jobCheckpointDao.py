@@ -0,0 +1,39 @@
+from typing import Optional
+from datetime import datetime
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.pojo.po.jobCheckpointPo import JobCheckpoint
+
+
+async def get_checkpoint_async(session: AsyncSession, job_name: str) -> Optional[JobCheckpoint]:
+    """
+    获取任务进度(异步)
+
+    Args:
+        session: 异步数据库会话
+        job_name: 任务名称
+
+    Returns:
+        任务进度模型实例，如果不存在则返回None
+    """
+    statement = select(JobCheckpoint).where(JobCheckpoint.job_name == job_name)
+    result = (await session.exec(statement)).first()
+    return result
+
+async def save_checkpoint_async(session: AsyncSession, checkpoint: JobCheckpoint) -> JobCheckpoint:
+    """
+    保存任务进度(异步)，不存在则新增，存在则覆盖
+
+    Args:
+        session: 异步数据库会话
+        checkpoint: 任务进度模型实例
+
+    Returns:
+        保存后的任务进度模型实例
+    """
+    checkpoint.updated_at = datetime.now()
+    merged = await session.merge(checkpoint)
+    await session.commit()
+    return merged
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, update, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.pojo.po.jobLeasePo import JobLease
+
+
+async def get_lease_async(session: AsyncSession, lease_name: str) -> Optional[JobLease]:
+    """
+    获取租约(异步)
+
+    Args:
+        session: 异步数据库会话
+        lease_name: 租约名称
+
+    Returns:
+        租约模型实例，如果不存在则返回None
+    """
+    statement = select(JobLease).where(JobLease.lease_name == lease_name)
+    result = (await session.exec(statement)).first()
+    return result
+
+async def try_acquire_lease_async(session: AsyncSession, lease_name: str, owner: str, ttl: float) -> bool:
+    """
+    尝试获取租约(异步)，租约不存在、已过期或本来就属于owner时获取成功
+    使用带条件的UPDATE(比较并交换)，只锁住这一行，MySQL和SQLite上都是原子的
+
+    Args:
+        session: 异步数据库会话
+        lease_name: 租约名称
+        owner: 实例标识
+        ttl: 租约有效期(秒)
+
+    Returns:
+        是否获取成功
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=ttl)
+    statement = (
+        update(JobLease)
+        .where(JobLease.lease_name == lease_name,
+               or_(JobLease.owner == owner, JobLease.expires_at < now))
+        .values(owner=owner, acquired_at=now, heartbeat_at=now, expires_at=expires_at)
+    )
+    result = await session.exec(statement)
+    await session.commit()
+    if result.rowcount == 1:
+        return True
+    if await get_lease_async(session, lease_name) is not None:
+        return False
+    # 第一次使用该租约, 插入成功即获取成功, 并发插入时主键冲突的一方失败
+    try:
+        session.add(JobLease(lease_name=lease_name, owner=owner, acquired_at=now, heartbeat_at=now, expires_at=expires_at))
+        await session.commit()
+        return True
+    except IntegrityError:
+        await session.rollback()
+        return False
+
+async def renew_lease_async(session: AsyncSession, lease_name: str, owner: str, ttl: float) -> bool:
+    """
+    续约(异步)，只有仍持有租约时成功
+
+    Args:
+        session: 异步数据库会话
+        lease_name: 租约名称
+        owner: 实例标识
+        ttl: 租约有效期(秒)
+
+    Returns:
+        是否续约成功，失败说明租约已被其它实例接管
+    """
+    now = datetime.now()
+    statement = (
+        update(JobLease)
+        .where(JobLease.lease_name == lease_name, JobLease.owner == owner)
+        .values(heartbeat_at=now, expires_at=now + timedelta(seconds=ttl))
+    )
+    result = await session.exec(statement)
+    await session.commit()
+    return result.rowcount == 1
+
+async def release_lease_async(session: AsyncSession, lease_name: str, owner: str) -> bool:
+    """
+    释放租约(异步)，保留记录只把过期时间置为当前时间，其它实例可以立即获取
+
+    Args:
+        session: 异步数据库会话
+        lease_name: 租约名称
+        owner: 实例标识
+
+    Returns:
+        是否释放成功
+    """
+    statement = (
+        update(JobLease)
+        .where(JobLease.lease_name == lease_name, JobLease.owner == owner)
+        .values(expires_at=datetime.now())
+    )
+    result = await session.exec(statement)
+    await session.commit()
+    return result.rowcount == 1
@@ -1,10 +1,13 @@
-from typing import Optional, Dict, List, Any, Sequence
+from typing import Optional, Dict, List, Any, Sequence, Tuple
 from datetime import datetime
 
+from sqlalchemy import case, func
 from sqlmodel import Session, select, delete, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.exception.aiException import AIException
 from src.pojo.po.promptPo import Prompt
+from src.utils.countUtils import count_cache
 
 def create_prompt(session: Session, prompt: Prompt) -> Prompt:
     """
@@ -347,11 +350,9 @@ def count_prompts(session: Session) -> int:
         session: 数据库会话
 
     Returns:
-        提示词的数量
+        提示词的数量(短时间缓存, 大表为估算值)
     """
-    statement = select(Prompt)
-    results = session.exec(statement).all()
-    return len(results)
+    return count_cache.count_table(session, Prompt)
 
 def count_prompts_by_category(session: Session, category: str) -> int:
     """
@@ -364,9 +365,8 @@ def count_prompts_by_category(session: Session, category: str) -> int:
     Returns:
         特定分类的提示词数量
     """
-    statement = select(Prompt).where(Prompt.category == category)
-    results = session.exec(statement).all()
-    return len(results)
+    statement = select(func.count()).select_from(Prompt).where(Prompt.category == category)
+    return count_cache.count(session, statement)
 
 def count_prompts_by_status(session: Session, status: str) -> int:
     """
@@ -379,6 +379,73 @@ def count_prompts_by_status(session: Session, status: str) -> int:
     Returns:
         特定状态的提示词数量
     """
-    statement = select(Prompt).where(Prompt.status == status)
-    results = session.exec(statement).all()
-    return len(results)
+    statement = select(func.count()).select_from(Prompt).where(Prompt.status == status)
+    return count_cache.count(session, statement)
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def get_prompt_by_code_async(session: AsyncSession, code: str) -> Optional[Prompt]:
+    """
+    通过编码获取提示词(异步)
+
+    Args:
+        session: 异步数据库会话
+        code: 提示词编码
+
+    Returns:
+        提示词模型实例，如果不存在则返回None
+    """
+    statement = select(Prompt).where(Prompt.code == code)
+    result = (await session.exec(statement)).first()
+    return result
+
+async def increment_usage_count_by_code_async(session: AsyncSession, code: str) -> Optional[Prompt]:
+    """
+    通过编码增加提示词使用次数(异步)
+
+    Args:
+        session: 异步数据库会话
+        code: 提示词编码
+
+    Returns:
+        更新后的提示词模型实例，如果不存在则返回None
+    """
+    db_prompt = await get_prompt_by_code_async(session, code)
+    if not db_prompt:
+        return None
+
+    db_prompt.usage_count += 1
+    db_prompt.last_called_at = datetime.now()
+    db_prompt.updated_at = datetime.now()
+
+    session.add(db_prompt)
+    await session.commit()
+    await session.refresh(db_prompt)
+    return db_prompt
+
+async def batch_increment_usage_count_async(session: AsyncSession, usages: Dict[str, Tuple[int, datetime]]) -> int:
+    """
+    批量累加提示词使用次数(异步)，所有编码用一条UPDATE在同一个事务内提交
+    usage_count 在数据库端累加，不需要先查询
+
+    Args:
+        session: 异步数据库会话
+        usages: 提示词编码 -> (新增使用次数, 最后调用时间)
+
+    Returns:
+        更新的记录数量
+    """
+    if not usages:
+        return 0
+    statement = (
+        update(Prompt)
+        .where(Prompt.code.in_(list(usages.keys())))
+        .values(
+            usage_count=Prompt.usage_count + case({code: n for code, (n, _) in usages.items()}, value=Prompt.code, else_=0),
+            last_called_at=case({code: t for code, (_, t) in usages.items()}, value=Prompt.code, else_=Prompt.last_called_at),
+            updated_at=datetime.now(),
+        )
+    )
+    result = await session.exec(statement)
+    await session.commit()
+    return result.rowcount
\ No newline at end of file
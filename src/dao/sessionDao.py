@@ -3,6 +3,7 @@ from datetime import datetime
 
 from sqlmodel import Session, select, delete, update, desc
 from sqlalchemy.orm import joinedload
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.pojo.po.sessionPo import SessionPo as SessionModel
 from src.pojo.po.sessionDetailPo import SessionDetail
@@ -173,3 +174,98 @@ def get_recent_sessions(session: Session, user_id: str, limit: int = 10) -> Sequ
     statement = select(SessionModel).where(SessionModel.user_id == user_id).order_by(desc(SessionModel.create_time)).limit(limit)
     results = session.exec(statement).all()
     return results
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def create_session_async(session: AsyncSession, session_model: SessionModel) -> SessionModel:
+    """
+    创建会话(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_model: 会话模型实例
+
+    Returns:
+        创建后的会话模型实例
+    """
+    session.add(session_model)
+    await session.commit()
+    await session.refresh(session_model)
+    return session_model
+
+async def get_session_by_id_async(session: AsyncSession, session_id: str) -> Optional[SessionModel]:
+    """
+    通过ID获取会话(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_id: 会话ID
+
+    Returns:
+        会话模型实例，如果不存在则返回None
+    """
+    statement = select(SessionModel).where(SessionModel.id == session_id)
+    result = (await session.exec(statement)).first()
+    return result
+
+async def update_session_async(session: AsyncSession, session_id: str, update_data: Dict[str, Any]) -> Optional[SessionModel]:
+    """
+    更新会话(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_id: 会话ID
+        update_data: 要更新的数据字典
+
+    Returns:
+        更新后的会话模型实例，如果不存在则返回None
+    """
+    db_session = await get_session_by_id_async(session, session_id)
+    if not db_session:
+        return None
+
+    for field, value in update_data.items():
+        if hasattr(db_session, field):
+            setattr(db_session, field, value)
+
+    session.add(db_session)
+    await session.commit()
+    await session.refresh(db_session)
+    return db_session
+
+async def get_recent_sessions_async(session: AsyncSession, user_id: str, limit: int = 10) -> Sequence[SessionModel]:
+    """
+    获取用户最近的会话(异步)
+
+    Args:
+        session: 异步数据库会话
+        user_id: 用户ID
+        limit: 限制返回的会话数量
+
+    Returns:
+        会话模型实例列表
+    """
+    statement = select(SessionModel).where(SessionModel.user_id == user_id).order_by(desc(SessionModel.create_time)).limit(limit)
+    results = (await session.exec(statement)).all()
+    return results
+
+async def batch_update_sessions_async(session: AsyncSession, updates: Dict[str, Dict[str, Any]]) -> int:
+    """
+    批量更新会话(异步)，所有更新在同一个事务内提交
+
+    Args:
+        session: 异步数据库会话
+        updates: 会话ID -> 要更新的数据字典
+
+    Returns:
+        更新的会话数量
+    """
+    if not updates:
+        return 0
+    session_fields = {column.name for column in SessionModel.__table__.columns}
+    for session_id, update_data in updates.items():
+        values = {field: value for field, value in update_data.items() if field in session_fields}
+        if values:
+            await session.exec(update(SessionModel).where(SessionModel.id == session_id).values(**values))
+    await session.commit()
+    return len(updates)
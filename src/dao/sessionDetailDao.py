@@ -1,10 +1,13 @@
-from typing import Optional, Dict, List, Any, Sequence
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Sequence, Tuple
 
 from sqlmodel import Session, select, delete, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.pojo.po.sessionDetailPo import SessionDetail
 from src.pojo.po.sessionPo import SessionPo
-from sqlalchemy import func
+from src.utils.fulltextUtils import FulltextConfig, split_terms, boolean_query, fulltext_match, keyword_condition, text_search_condition
+from sqlalchemy import func, insert, literal
 
 
 def create_session_detail(session: Session, session_detail: SessionDetail) -> SessionDetail:
@@ -71,32 +74,37 @@ def get_session_details_by_session_id(session: Session, session_id: str) -> Sequ
     results = session.exec(statement).all()
     return results
 
-def search_session_details(session: Session, search_params: Dict[str, Any],limit: int | None = None) -> Sequence[SessionDetail]:
+def _apply_search_params(statement, search_params: Optional[Dict[str, Any]]):
     """
-    根据提供的参数搜索会话详情，使用SessionDetail中定义的like_search_fields
-    来决定查询方式
-
-    Args:
-        session: 数据库会话
-        search_params: 搜索参数字典，键为SessionDetail的字段名，值为搜索条件
-        limit: 搜索结果数量限制
-    Returns:
-        符合条件的SessionDetail列表
+    把搜索参数转换为查询条件: like_search_fields 中的字段模糊匹配(有全文索引的先走索引), 其它字段精确匹配
     """
-    statement = select(SessionDetail)
-
     # 获取SessionDetail类的所有字段名
     session_detail_fields = [column.name for column in SessionDetail.__table__.columns]
 
     # 动态构建查询条件
-    for field, value in search_params.items():
+    for field, value in (search_params or {}).items():
         if field in session_detail_fields and value is not None:
             # 根据字段是否在like_search_fields中决定查询方式
             if field in SessionDetail.like_search_fields and isinstance(value, str):
-                statement = statement.where(getattr(SessionDetail, field).like(f"%{value}%"))
+                statement = statement.where(text_search_condition(SessionDetail, field, value))
             else:
                 # 对于其他字段，使用精确匹配
                 statement = statement.where(getattr(SessionDetail, field) == value)
+    return statement
+
+def search_session_details(session: Session, search_params: Dict[str, Any],limit: int | None = None) -> Sequence[SessionDetail]:
+    """
+    根据提供的参数搜索会话详情，使用SessionDetail中定义的like_search_fields
+    来决定查询方式
+
+    Args:
+        session: 数据库会话
+        search_params: 搜索参数字典，键为SessionDetail的字段名，值为搜索条件
+        limit: 搜索结果数量限制
+    Returns:
+        符合条件的SessionDetail列表
+    """
+    statement = _apply_search_params(select(SessionDetail), search_params)
 
     # 执行查询
     results = session.exec(statement.order_by(SessionDetail.create_time.desc()).limit(limit)).all()
@@ -118,19 +126,7 @@ def search_session_details_by_user_id(session: Session, user_id:str, search_para
     if search_params is None:
         search_params = {}
     statement = select(SessionDetail).join(SessionPo,SessionPo.id == SessionDetail.session_id).where(SessionPo.user_id == user_id)
-
-    # 获取SessionDetail类的所有字段名
-    session_detail_fields = [column.name for column in SessionDetail.__table__.columns]
-
-    # 动态构建查询条件
-    for field, value in search_params.items():
-        if field in session_detail_fields and value is not None:
-            # 根据字段是否在like_search_fields中决定查询方式
-            if field in SessionDetail.like_search_fields and isinstance(value, str):
-                statement = statement.where(getattr(SessionDetail, field).like(f"%{value}%"))
-            else:
-                # 对于其他字段，使用精确匹配
-                statement = statement.where(getattr(SessionDetail, field) == value)
+    statement = _apply_search_params(statement, search_params)
 
     # 执行查询
     results = session.exec(statement.order_by(SessionDetail.create_time.desc()).limit(limit)).all()
@@ -227,3 +223,132 @@ def count_session_details(session: Session, session_id: str) -> int:
     statement = select(func.count()).select_from(SessionDetail).where(SessionDetail.session_id == session_id)
     result = session.exec(statement).one()
     return result
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def create_session_detail_async(session: AsyncSession, session_detail: SessionDetail) -> SessionDetail:
+    """
+    创建会话详情(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_detail: 会话详情模型实例
+
+    Returns:
+        创建后的会话详情模型实例
+    """
+    session_detail.handle_dict()
+    session.add(session_detail)
+    await session.commit()
+    await session.refresh(session_detail)
+    return session_detail
+
+async def get_session_details_by_session_id_async(session: AsyncSession, session_id: str) -> Sequence[SessionDetail]:
+    """
+    通过会话ID获取会话详情列表(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_id: 会话ID
+
+    Returns:
+        会话详情模型实例列表
+    """
+    statement = select(SessionDetail).where(SessionDetail.session_id == session_id).order_by(SessionDetail.create_time.asc())
+    results = (await session.exec(statement)).all()
+    return results
+
+async def count_session_details_async(session: AsyncSession, session_id: str) -> int:
+    """
+    统计会话的详情数量(异步)
+
+    Args:
+        session: 异步数据库会话
+        session_id: 会话ID
+
+    Returns:
+        会话详情的数量
+    """
+    statement = select(func.count()).select_from(SessionDetail).where(SessionDetail.session_id == session_id)
+    result = (await session.exec(statement)).one()
+    return result
+
+async def batch_insert_session_details_async(session: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    """
+    批量写入会话详情(异步)，以一条多行 INSERT 语句提交
+
+    Args:
+        session: 异步数据库会话
+        rows: 会话详情字段字典列表(SessionDetail.model_dump()的结果)
+
+    Returns:
+        写入的记录数量
+    """
+    if not rows:
+        return 0
+    await session.exec(insert(SessionDetail).values(rows))
+    await session.commit()
+    return len(rows)
+
+async def get_latest_turn_time_by_user_ids_async(session: AsyncSession, user_ids: List[str]) -> Dict[str, datetime]:
+    """
+    批量获取用户最近一次成功对话的时间(异步)，一条 GROUP BY 查询
+
+    Args:
+        session: 异步数据库会话
+        user_ids: 用户ID列表
+
+    Returns:
+        用户ID -> 最近一次成功对话的创建时间，没有对话的用户不在结果中
+    """
+    if not user_ids:
+        return {}
+    statement = (
+        select(SessionPo.user_id, func.max(SessionDetail.create_time))
+        .join(SessionPo, SessionPo.id == SessionDetail.session_id)
+        .where(SessionPo.user_id.in_(user_ids), SessionDetail.status == '200')
+        .group_by(SessionPo.user_id)
+    )
+    rows = (await session.exec(statement)).all()
+    return {user_id: latest for user_id, latest in rows}
+
+def fulltext_search_session_details(session: Session, keyword: str, user_id: Optional[str] = None,
+                                    fields: Optional[List[str]] = None, search_params: Optional[Dict[str, Any]] = None,
+                                    limit: int = 20, offset: int = 0) -> List[Tuple[SessionDetail, float]]:
+    """
+    按关键词全文检索会话详情, 按相关度排序
+
+    关键词按空白切分, 每个词都必须出现(ngram 短语匹配); 有词短于 ngram 长度或未启用全文索引时退回 like, 相关度为 0
+
+    Args:
+        session: 数据库会话
+        keyword: 关键词
+        user_id: 用户ID, 只检索该用户的会话
+        fields: 限定匹配的字段(fulltext_search_fields 的子集), 为空匹配全部
+        search_params: 其它搜索参数, 规则同 search_session_details
+        limit: 返回数量
+        offset: 跳过数量
+    Returns:
+        (会话详情, 相关度) 列表
+    """
+    terms = split_terms(keyword)
+    if not terms:
+        return []
+    fields = [field for field in (fields or SessionDetail.fulltext_search_fields)
+              if field in SessionDetail.fulltext_search_fields] or SessionDetail.fulltext_search_fields
+    query = boolean_query(terms) if FulltextConfig.ENABLED else None
+
+    score = fulltext_match(SessionDetail, query) if query is not None else literal(0.0)
+    statement = select(SessionDetail, score.label("score"))
+    if user_id is not None:
+        statement = statement.join(SessionPo, SessionPo.id == SessionDetail.session_id).where(SessionPo.user_id == user_id)
+    if query is not None:
+        statement = statement.where(score)
+    # 全文索引覆盖全部字段, 限定字段或退回 like 时再按字段逐词匹配
+    if query is None or len(fields) < len(SessionDetail.fulltext_search_fields):
+        statement = statement.where(keyword_condition(SessionDetail, terms, fields))
+    statement = _apply_search_params(statement, search_params)
+
+    order = [SessionDetail.create_time.desc()] if query is None else [score.desc(), SessionDetail.create_time.desc()]
+    rows = session.exec(statement.order_by(*order).offset(offset).limit(limit)).all()
+    return [(detail, float(row_score or 0)) for detail, row_score in rows]
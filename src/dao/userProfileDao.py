@@ -1,10 +1,12 @@
 from typing import Optional, Dict, List, Any, Sequence
 from datetime import datetime
 
-from sqlmodel import Session, select, delete, update
+from sqlmodel import Session, select, delete, update, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.exception.aiException import AIException
 from src.pojo.po.userProfilePo import UserProfile
+from src.utils.countUtils import count_cache
 
 def create_user_profile(session: Session, user_profile: UserProfile) -> UserProfile:
     """
@@ -254,8 +256,72 @@ def count_user_profiles(session: Session) -> int:
         session: 数据库会话
 
     Returns:
-        用户画像的数量
+        用户画像的数量(短时间缓存, 大表为估算值)
     """
-    statement = select(UserProfile)
-    results = session.exec(statement).all()
-    return len(results)
+    return count_cache.count_table(session, UserProfile)
+
+# ==================== 异步版本, 用于async路由, 不阻塞事件循环 ====================
+
+async def create_user_profile_async(session: AsyncSession, user_profile: UserProfile) -> UserProfile:
+    """
+    创建用户画像(异步)
+
+    Args:
+        session: 异步数据库会话
+        user_profile: 用户画像模型实例
+
+    Returns:
+        创建后的用户画像模型实例
+    """
+    session.add(user_profile)
+    await session.commit()
+    await session.refresh(user_profile)
+    return user_profile
+
+async def get_profile_by_user_id_async(session: AsyncSession, user_id: str) -> Optional[UserProfile]:
+    """
+    通过用户ID获取用户画像(异步)
+
+    Args:
+        session: 异步数据库会话
+        user_id: 用户ID
+
+    Returns:
+        用户画像模型实例，如果不存在则返回None
+    """
+    statement = select(UserProfile).where(UserProfile.user_id == user_id)
+    result = (await session.exec(statement)).first()
+    return result
+
+async def get_recent_profile_user_ids_async(session: AsyncSession, limit: int) -> Sequence[str]:
+    """
+    获取最近活跃的用户画像的用户ID(异步)，只查询 user_id 列
+
+    Args:
+        session: 异步数据库会话
+        limit: 限制返回的数量
+
+    Returns:
+        用户ID列表
+    """
+    statement = select(UserProfile.user_id).order_by(desc(UserProfile.update_time)).limit(limit)
+    results = (await session.exec(statement)).all()
+    return results
+
+async def get_profiles_after_id_async(session: AsyncSession, after_id: Optional[str], limit: int) -> Sequence[UserProfile]:
+    """
+    按主键顺序分页获取用户画像(异步)，游标分页，不使用offset
+
+    Args:
+        session: 异步数据库会话
+        after_id: 上一页最后一条的ID，为None时从头开始
+        limit: 每页数量
+
+    Returns:
+        用户画像模型实例列表
+    """
+    statement = select(UserProfile).order_by(UserProfile.id).limit(limit)
+    if after_id is not None:
+        statement = statement.where(UserProfile.id > after_id)
+    results = (await session.exec(statement)).all()
+    return results
\ No newline at end of file
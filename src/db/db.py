@@ -1,8 +1,13 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 
+from src.utils.metricsUtils import TimedPoolMixin, register_pool_metrics
+
 # 获取logger
 logger = logging.getLogger(__name__)
 
@@ -11,6 +16,19 @@ load_dotenv()
 
 # MySQL 连接URL格式: mysql+pymysql://用户名:密码@主机:端口/数据库名?参数
 DATABASE_URL = "mysql+pymysql://" + os.getenv("DATABASE_URL", "root:root@localhost:3306/stone_ai_db?charset=utf8mb4")
+# 异步驱动使用同一份连接信息: mysql+aiomysql://用户名:密码@主机:端口/数据库名?参数
+ASYNC_DATABASE_URL = "mysql+aiomysql://" + os.getenv("DATABASE_URL", "root:root@localhost:3306/stone_ai_db?charset=utf8mb4")
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """同步引擎连接池, 记录获取连接的耗时"""
+    metrics_engine = "sync"
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    """异步引擎连接池, 记录获取连接的耗时"""
+    metrics_engine = "async"
+
 
 # 初始化数据库引擎
 def init_db():
@@ -24,6 +42,7 @@ def init_db():
         engine = create_engine(
             DATABASE_URL,
             echo=True,
+            poolclass=TimedQueuePool,
             pool_pre_ping=True,  # 启用连接健康检查
             pool_recycle=3600  # 可选：每1小时回收连接（避免 MySQL 主动关闭）
         )
@@ -35,6 +54,31 @@ def init_db():
 
 # 创建引擎实例
 engine = init_db()
+register_pool_metrics("sync", lambda: engine.pool)
+
+def init_async_db():
+    """初始化异步数据库引擎, 供 async 路由使用, 避免DB I/O阻塞事件循环"""
+    global async_engine
+
+    try:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=True,
+            poolclass=TimedAsyncQueuePool,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20)),
+        )
+        logger.info("异步数据库引擎创建成功")
+        return async_engine
+    except Exception as e:
+        logger.error("异步数据库引擎创建失败: %s", str(e))
+        raise
+
+# 创建异步引擎实例
+async_engine = init_async_db()
+register_pool_metrics("async", lambda: async_engine.sync_engine.pool)
 
 def create_tables():
     """创建所有数据库表"""
@@ -47,4 +91,13 @@ def create_tables():
 
 def get_db():
     with Session(engine) as session:
+        yield session
+
+
+async def get_async_db():
+    """
+    异步数据库会话依赖, 用法与 get_db 相同: db: AsyncSession = Depends(get_async_db)
+    expire_on_commit=False: 提交后对象属性仍可直接读取, 避免在会话外触发懒加载
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
\ No newline at end of file
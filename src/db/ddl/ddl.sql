@@ -119,3 +119,50 @@ CREATE TABLE `ai_command_category` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='AI指令分类表';
 
 
+-- stone_ai_db.job_checkpoint definition
+
+CREATE TABLE `job_checkpoint` (
+  `job_name` varchar(64) NOT NULL COMMENT '任务名称',
+  `run_id` varchar(64) NOT NULL COMMENT '本轮执行ID',
+  `cursor` varchar(255) DEFAULT NULL COMMENT '已处理完的最后一条记录的主键',
+  `processed` int NOT NULL DEFAULT '0' COMMENT '本轮已处理的记录数',
+  `status` varchar(16) NOT NULL DEFAULT 'running' COMMENT '状态 running 执行中 finished 已完成',
+  `started_at` datetime NOT NULL COMMENT '本轮开始时间',
+  `updated_at` datetime NOT NULL COMMENT '进度更新时间',
+  `finished_at` datetime DEFAULT NULL COMMENT '本轮完成时间',
+  PRIMARY KEY (`job_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='批处理任务进度表';
+
+
+-- stone_ai_db.user_profile 增加分析水位线
+
+ALTER TABLE `user_profile`
+  ADD COLUMN `last_handle_time` datetime DEFAULT NULL COMMENT '上一次分析截止的对话时间，之后没有新对话的用户跳过分析' AFTER `last_handle_session_id`;
+
+
+-- stone_ai_db.job_lease definition
+
+CREATE TABLE `job_lease` (
+  `lease_name` varchar(64) NOT NULL COMMENT '租约名称',
+  `owner` varchar(128) NOT NULL COMMENT '持有租约的实例',
+  `acquired_at` datetime NOT NULL COMMENT '获取租约时间',
+  `heartbeat_at` datetime NOT NULL COMMENT '最后心跳时间',
+  `expires_at` datetime DEFAULT NULL COMMENT '租约过期时间, 过期后其它实例可以接管',
+  PRIMARY KEY (`lease_name`),
+  KEY `idx_expires_at` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='任务租约表';
+
+
+-- stone_ai_db.app_schedule_task 按用户查询时间范围的联合索引
+
+ALTER TABLE `app_schedule_task`
+  ADD INDEX `idx_user_start_end` (`user_id`, `start_time`, `end_time`),
+  ADD INDEX `idx_user_status_end` (`user_id`, `status`, `end_time`);
+
+
+-- stone_ai_db.session_detail 对话内容全文索引(ngram 分词, 需 innodb_ft_enable_stopword=OFF 以免短词被当作停用词)
+
+ALTER TABLE `session_detail`
+  ADD FULLTEXT INDEX `ft_session_detail_text` (`user_question`, `final_response`, `api_output`, `process_log`) WITH PARSER ngram;
+
+
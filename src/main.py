@@ -8,11 +8,19 @@ from starlette.responses import JSONResponse
 
 from src.utils.log_config import setup_logging
 from src.utils.systemUtils import register_routers, RequestLoggingMiddleware
+from src.utils.metricsUtils import MetricsMiddleware
 from .exception.aiException import AIException
 from .myHttp.bo.httpResponse import HttpResponse
 from fastapi import FastAPI, Request, status, HTTPException, APIRouter
 
-from .mySchedules.userProfileSchedules import start_scheduler, stop_scheduler
+from .mySchedules.jobs import start_jobs, stop_jobs
+from .myHttp.utils.httpClientManager import start_http_client, stop_http_client
+from .service.sessionPersistService import start_session_persist, stop_session_persist
+from .service.promptUsageService import stop_prompt_usage
+from .service.knownUserService import warm_up_known_users
+from .ai.llmRouter import close_llm_clients
+from .ai.llmCache import close_llm_cache
+from .ai.myDashScope.common import shutdown_dashscope_executor
 
 # 初始化日志配置
 setup_logging()
@@ -38,10 +46,30 @@ register_routers(app, controller_dir="controller", blacklist=blacklist)
 
 # 添加中间件
 app.add_middleware(RequestLoggingMiddleware)
-
-# 定时任务
-app.add_event_handler("startup", start_scheduler)
-app.add_event_handler("shutdown", stop_scheduler)
+# 接口指标(/metrics), 放在最外层以统计完整耗时
+app.add_middleware(MetricsMiddleware)
+
+# 共享HTTP连接池
+app.add_event_handler("startup", start_http_client)
+app.add_event_handler("shutdown", stop_http_client)
+
+# 会话记录写后队列, 关闭时落完剩余记录
+app.add_event_handler("startup", start_session_persist)
+app.add_event_handler("shutdown", stop_session_persist)
+
+# 预热已知用户集合
+app.add_event_handler("startup", warm_up_known_users)
+
+# LLM客户端连接池
+app.add_event_handler("shutdown", close_llm_clients)
+app.add_event_handler("shutdown", shutdown_dashscope_executor)
+app.add_event_handler("shutdown", close_llm_cache)
+
+# 定时任务(用户画像分析、提示词使用次数落库等, 见 mySchedules/jobs.py)
+app.add_event_handler("startup", start_jobs)
+app.add_event_handler("shutdown", stop_jobs)
+# 定时任务停止后写入剩余的提示词使用次数
+app.add_event_handler("shutdown", stop_prompt_usage)
 
 # 确保上传目录存在
 UPLOAD_DIR = "uploads"
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientConfig:
+    # 连接池总连接数上限
+    POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", 200))
+    # 单个host(host+port+scheme)的连接数上限, 0 为不限制
+    POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 50))
+    # DNS缓存时间（秒）
+    DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+    # 空闲keep-alive连接保持时间（秒）
+    KEEPALIVE_TIMEOUT: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60))
+    # 建立连接的超时时间（秒）,单次请求的总超时仍由调用方控制
+    CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+
+
+class HttpClientManager:
+    """
+    应用生命周期内共享的 aiohttp 客户端
+
+    - 每个host维护一组keep-alive连接，避免每次对话都重新进行TCP+TLS握手
+    - 由 FastAPI 的 startup/shutdown 事件负责创建与关闭
+    """
+
+    def __init__(self, config: type[HttpClientConfig] = HttpClientConfig):
+        self._config = config
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    def _build_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self._config.POOL_LIMIT,
+            limit_per_host=self._config.POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=self._config.DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=self._config.KEEPALIVE_TIMEOUT,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, connect=self._config.CONNECT_TIMEOUT),
+        )
+
+    async def start(self):
+        """创建共享的 ClientSession"""
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = self._build_session()
+                logger.info(f"HTTP连接池已创建: limit={self._config.POOL_LIMIT}, "
+                            f"limit_per_host={self._config.POOL_LIMIT_PER_HOST}, "
+                            f"dns_cache_ttl={self._config.DNS_CACHE_TTL}s")
+
+    async def close(self):
+        """关闭共享的 ClientSession 并释放连接池"""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+                logger.info("HTTP连接池已关闭")
+            self._session = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的 ClientSession, 未启动时(如脚本直接调用)自动创建
+        :return: ClientSession
+        """
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+
+http_client_manager = HttpClientManager()
+
+
+async def start_http_client():
+    """在 FastAPI 启动时创建共享HTTP客户端"""
+    await http_client_manager.start()
+
+
+async def stop_http_client():
+    """在 FastAPI 关闭时关闭共享HTTP客户端"""
+    await http_client_manager.close()
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    return await http_client_manager.get_session()
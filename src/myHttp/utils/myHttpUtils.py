@@ -2,18 +2,19 @@ import asyncio
 import json
 import logging
 import os
+import time
 from asyncio import Event
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, List, Optional
 
 
 import aiohttp
 from src.exception.aiException import AIException
+from src.myHttp.utils.httpClientManager import get_http_session
 from src.pojo.po.sessionDetailPo import SessionDetail
 from src.pojo.po.sessionPo import SessionPo
 from src.service.sessionService import dify_stream_handle
-from src.utils.dataUtils import is_valid_json
-from src.utils.difyUtils import dify_stream_response_handler, dify_get_conversation_id_from_stream, \
-    get_value_from_stream_response_by_key
+from src.utils.difyUtils import iter_sse_events, SSEDecoder, SSEEvent
+from src.utils.metricsUtils import http_client_request_duration_seconds
 
 # 请求头
 HEADERS = {
@@ -30,30 +31,57 @@ TIMEOUT = int(os.getenv("DIFY_TIMEOUT",360))
 logger = logging.getLogger(__name__)
 
 
-async def normal_post(url: str, data: dict, headers: dict)  -> dict:
+class _RequestTimer:
+    """
+    记录一次出站请求的耗时, 按 api_code 和结果(HTTP状态码 / timeout / error)统计
+    用法: async with _RequestTimer(api_code) as timer: ... timer.status = response.status
+    """
+
+    def __init__(self, api_code: Optional[str]):
+        self.api_code = api_code or "unknown"
+        self.status: Optional[str] = None
+
+    async def __aenter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        status = self.status
+        if exc_type is not None and issubclass(exc_type, asyncio.TimeoutError):
+            status = "timeout"
+        elif exc_type is not None and status is None:
+            status = "error"
+        http_client_request_duration_seconds.observe(time.perf_counter() - self.start,
+                                                     api_code=self.api_code, status=status or "error")
+        return False
+
+
+async def normal_post(url: str, data: dict, headers: dict, api_code: Optional[str] = None)  -> dict:
     """
      常规Post请求封装(异步),可以便与后期统一拦截
     :param url: API URL
     :param data: API 请求参数
     :param headers: API 请求头
+    :param api_code: API编码, 用于统计耗时
     :return:
     """
     headers = {**HEADERS, **headers}
     para_json = {**data}
     logger.info(f"\n请求地址:{url}\n请求参数:{para_json}\n请求头:{headers}")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=para_json,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
-        ) as response:
-            result_text = await response.text()
-            result_text = json.loads(result_text)
-            logger.info(f"\n请求地址:{url}\n响应结果:{result_text}")
+    session = await get_http_session()
+    async with _RequestTimer(api_code) as timer, session.post(
+            url,
+            json=para_json,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+    ) as response:
+        timer.status = str(response.status)
+        result_text = await response.text()
+        result_text = json.loads(result_text)
+        logger.info(f"\n请求地址:{url}\n响应结果:{result_text}")
 
-            return result_text
+        return result_text
 
 
 async def dify_stream_post(
@@ -61,7 +89,9 @@ async def dify_stream_post(
         data: dict,
         headers: dict,
         ai_session: SessionPo = None,
-        ai_session_detail: SessionDetail = None
+        ai_session_detail: SessionDetail = None,
+        passthrough: bool = False,
+        api_code: Optional[str] = None
 ):
     """
     发送流式 POST 请求到 Dify API（异步生成器）
@@ -72,83 +102,114 @@ async def dify_stream_post(
     :param url: Dify API 地址 (e.g., http://1.12.43.211/v1/chat-messages)
     :param data: 请求参数 (必须包含 "response_mode": "streaming")
     :param headers: 请求头 (需包含 Authorization: Bearer API_KEY)
-    :yield: 解析后的数据块字典
+    :param passthrough: 透传模式, 原样转发Dify的字节流(保留原始SSE结构), 只在旁路解析answer用于持久化
+    :param api_code: API编码, 用于统计耗时(整个流)
+    :yield: 解析后的数据块字典, 透传模式下为原始字节块
     """
     # 合并请求头并记录日志
     final_headers = {**HEADERS, **headers}
     logger.info(f"请求地址: {url}\n请求参数: {json.dumps(data, ensure_ascii=False)}\n请求头: {final_headers}")
 
     conversation_id = None
-    result = ""
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                    url,
-                    json=data,
-                    headers=final_headers,
-                    timeout=aiohttp.ClientTimeout(total=TIMEOUT)
-            ) as response:
-                # 检查HTTP状态码[3](@ref)
-                if response.status != 200:
-                    error_msg = f"Dify 接口异常: 状态码 {response.status}"
-                    logger.error(error_msg)
-                    yield f"event: dify error {error_msg}"
-                    return
-
-                # 流式返回数据
-                async for chunk in response.content:
-                    de_chunk = chunk.decode('utf-8')
-                    if de_chunk.startswith("data:"):
-                        de_chunk = de_chunk[6:]
-                    if not is_valid_json(de_chunk):
-                        continue
-                    json_chunk = json.loads(de_chunk)
-                    if not conversation_id:
-                        conversation_id = json_chunk['conversation_id']
-                    if 'message' not in json_chunk['event']:
-                        continue
-                    if json_chunk['event'] == 'message_end':
-                        break
-                    answer = json_chunk['answer']
-                    logger.info(f"Dify流式输出内容:{answer}")
-                    result = result + answer
-                    answer = json.dumps(answer)
-                    yield f"data: {answer}\n\n"
-
-        except ValueError as e:
-            logger.error("valueError 忽略这个 chunk too big 异常 \n" + e)
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            logger.exception("Dify 流式请求异常")
-            yield f"event: dify error"
-        finally:
-            dify_stream_handle(conversation_id=conversation_id, result=result, ai_session=ai_session, ai_session_detail=ai_session_detail)
-
-
-
-async def post_with_query_params(url: str, params: dict, headers: dict) -> dict:
+    # 答案片段先收集到列表, 结束时一次拼接, 避免长回答逐段拼接字符串
+    answer_parts: List[str] = []
+
+    session = await get_http_session()
+    timer = _RequestTimer(api_code)
+    try:
+        async with timer, session.post(
+                url,
+                json=data,
+                headers=final_headers,
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+        ) as response:
+            timer.status = str(response.status)
+            # 检查HTTP状态码[3](@ref)
+            if response.status != 200:
+                error_msg = f"Dify 接口异常: 状态码 {response.status}"
+                logger.error(error_msg)
+                yield f"event: dify error {error_msg}"
+                return
+
+            if passthrough:
+                # 透传: 字节块原样转发, 解析只用于收集会话ID和答案
+                decoder = SSEDecoder()
+                async for chunk in response.content.iter_any():
+                    yield chunk
+                    for event in decoder.feed(chunk):
+                        conversation_id = _collect_stream_answer(event, conversation_id, answer_parts)
+                for event in decoder.close():
+                    conversation_id = _collect_stream_answer(event, conversation_id, answer_parts)
+                return
+
+            # 流式返回数据, 按SSE事件边界解析, 每个事件只解析一次json
+            async for event in iter_sse_events(response.content):
+                if event.payload is None:
+                    continue
+                if not conversation_id:
+                    conversation_id = event.get('conversation_id')
+                event_type = event.get('event', '')
+                if 'message' not in event_type:
+                    continue
+                if event_type == 'message_end':
+                    break
+                answer = event.get('answer', '')
+                logger.debug(f"Dify流式输出内容:{answer}")
+                answer_parts.append(answer)
+                answer = json.dumps(answer)
+                yield f"data: {answer}\n\n"
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.exception("Dify 流式请求异常")
+        yield f"event: dify error"
+    finally:
+        await dify_stream_handle(conversation_id=conversation_id, result="".join(answer_parts), ai_session=ai_session, ai_session_detail=ai_session_detail)
+
+
+def _collect_stream_answer(event: SSEEvent, conversation_id: Optional[str], answer_parts: List[str]) -> Optional[str]:
+    """
+    透传模式的旁路解析: 收集 message 事件的答案片段
+    :param event: SSE事件
+    :param conversation_id: 当前已知的Dify会话ID
+    :param answer_parts: 答案片段列表
+    :return: Dify会话ID
+    """
+    if event.payload is None:
+        return conversation_id
+    if not conversation_id:
+        conversation_id = event.get('conversation_id')
+    event_type = event.get('event', '')
+    if 'message' in event_type and event_type != 'message_end':
+        answer_parts.append(event.get('answer', ''))
+    return conversation_id
+
+
+
+async def post_with_query_params(url: str, params: dict, headers: dict, api_code: Optional[str] = None) -> dict:
     """
     常规POST请求封装(异步)，参数通过URL Query String传递，便于后期统一拦截
     :param url: API URL
     :param params: API 请求参数(会拼接在URL上)
     :param headers: API 请求头
+    :param api_code: API编码, 用于统计耗时
     :return: 响应JSON数据
     """
     headers = {**HEADERS, **headers}
     logger.info(f"\n请求地址:{url}\n请求参数:{params}\n请求头:{headers}")
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                params=params,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
-            ) as response:
-                result_text = await response.text()
-                result_text = json.loads(result_text)
-                logger.info(f"\n请求地址:{url}\n响应结果:{result_text}")
-                return result_text
+        session = await get_http_session()
+        async with _RequestTimer(api_code) as timer, session.post(
+            url,
+            params=params,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+        ) as response:
+            timer.status = str(response.status)
+            result_text = await response.text()
+            result_text = json.loads(result_text)
+            logger.info(f"\n请求地址:{url}\n响应结果:{result_text}")
+            return result_text
     except asyncio.TimeoutError:
         logger.error(f"请求超时: {url}")
         raise Exception("API请求超时")
@@ -156,12 +217,13 @@ async def post_with_query_params(url: str, params: dict, headers: dict) -> dict:
         logger.error(f"请求异常: {url}\n错误: {str(e)}")
         raise
 
-async def form_data_post(url: str, form_data: dict, headers: dict) -> dict:
+async def form_data_post(url: str, form_data: dict, headers: dict, api_code: Optional[str] = None) -> dict:
     """
     Form-Data格式POST请求封装(异步)，参数通过form-data传递，便于后期统一拦截
     :param url: API URL
     :param form_data: API 请求参数(以form-data形式提交)
     :param headers: API 请求头
+    :param api_code: API编码, 用于统计耗时
     :return: 响应JSON数据
     """
     # 不使用默认的Content-Type，因为form-data请求会自动设置正确的Content-Type和boundary
@@ -171,35 +233,36 @@ async def form_data_post(url: str, form_data: dict, headers: dict) -> dict:
     logger.info(f"\n请求地址:{url}\n请求参数(form-data):{form_data}\n请求头:{headers_without_content_type}")
 
     try:
-        async with aiohttp.ClientSession() as session:
-            # 创建FormData对象
-            data = aiohttp.FormData()
-            for key, value in form_data.items():
-                # 如果值是文件对象，需要特殊处理
-                if hasattr(value, 'read'):
-                    # 对于文件对象，可以指定文件名和内容类型
-                    filename = getattr(value, 'name', 'file')
-                    content_type = None  # 让aiohttp自动检测
-                    data.add_field(key, value, filename=filename, content_type=content_type)
-                else:
-                    # 对于普通值，直接添加
-                    data.add_field(key, str(value))
-            
-            async with session.post(
-                url,
-                data=data,
-                headers=headers_without_content_type,
-                timeout=aiohttp.ClientTimeout(total=TIMEOUT)
-            ) as response:
-                result_text = await response.text()
-                try:
-                    result_json = json.loads(result_text)
-                    logger.info(f"\n请求地址:{url}\n响应结果:{result_json}")
-                    return result_json
-                except json.JSONDecodeError:
-                    # 如果响应不是JSON格式，返回原始文本
-                    logger.info(f"\n请求地址:{url}\n响应结果(非JSON):{result_text}")
-                    return {"raw_response": result_text}
+        session = await get_http_session()
+        # 创建FormData对象
+        data = aiohttp.FormData()
+        for key, value in form_data.items():
+            # 如果值是文件对象，需要特殊处理
+            if hasattr(value, 'read'):
+                # 对于文件对象，可以指定文件名和内容类型
+                filename = getattr(value, 'name', 'file')
+                content_type = None  # 让aiohttp自动检测
+                data.add_field(key, value, filename=filename, content_type=content_type)
+            else:
+                # 对于普通值，直接添加
+                data.add_field(key, str(value))
+        
+        async with _RequestTimer(api_code) as timer, session.post(
+            url,
+            data=data,
+            headers=headers_without_content_type,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+        ) as response:
+            timer.status = str(response.status)
+            result_text = await response.text()
+            try:
+                result_json = json.loads(result_text)
+                logger.info(f"\n请求地址:{url}\n响应结果:{result_json}")
+                return result_json
+            except json.JSONDecodeError:
+                # 如果响应不是JSON格式，返回原始文本
+                logger.info(f"\n请求地址:{url}\n响应结果(非JSON):{result_text}")
+                return {"raw_response": result_text}
     except asyncio.TimeoutError:
         logger.error(f"请求超时: {url}")
         raise Exception("API请求超时")
@@ -207,50 +270,46 @@ async def form_data_post(url: str, form_data: dict, headers: dict) -> dict:
         logger.error(f"请求异常: {url}\n错误: {str(e)}")
         raise
 
-async def stream_post_and_enqueue(message_queue, api_url: str, api_param: dict, api_header: dict) -> dict:
+async def stream_post_and_enqueue(message_queue, api_url: str, api_param: dict, api_header: dict,
+                                  api_code: Optional[str] = None) -> dict:
     """
     发送流式 POST 请求，并将接收到的数据写入 message_queue
-    :param message_queue:  消息队列
+    :param message_queue:  消息队列, 放入的是解析后的Dify事件字典
     :param api_url:  api路径
     :param api_param:  请求参数
     :param api_header:  请求头
+    :param api_code:  API编码, 用于统计耗时(整个流)
     :return:
     """
-    async with aiohttp.ClientSession() as session:
-        headers = {**HEADERS, **api_header}
-        result = ""
-        conversation_id = None
-        # 发送流式 POST 请求
-        async with session.post(
-            api_url,
-            json=api_param,
-            headers=headers
-        ) as response:
-            # 检查响应状态码
-            if response.status != 200:
-                raise AIException.quick_raise("流式请求Dify接口的返回码异常" + str(response))
-
-            # 逐行读取流式响应数据（修复大块数据问题）
-            async for line in response.content.iter_chunked(8192):  # 限制数据块大小为8KB
-                try:
-                    chunk = line.decode('utf-8').strip()
-                except ValueError as e:
-                    if "too big" in str(e):
-                        logger.warning(f"跳过过大数据块: {len(line)} bytes")
-                        continue
-                    raise
-
-                logger.debug(f"流式请求Dify接口的响应数据:{chunk}")
-                if get_value_from_stream_response_by_key(chunk,'event') == 'error':
-                    result = 'dify error,'+ get_value_from_stream_response_by_key(chunk,'message') + ","
-                result = result + dify_stream_response_handler(chunk)
-                if conversation_id is None:
-                    conversation_id = dify_get_conversation_id_from_stream(chunk)
-                if chunk:  # 忽略空行
-                    # 将数据放入队列
-                    await message_queue.put(line)
-
-            return {
-                "result": result,
-                "conversation_id": conversation_id
-            }
\ No newline at end of file
+    session = await get_http_session()
+    headers = {**HEADERS, **api_header}
+    result_parts: List[str] = []
+    conversation_id = None
+    # 发送流式 POST 请求
+    async with _RequestTimer(api_code) as timer, session.post(
+        api_url,
+        json=api_param,
+        headers=headers
+    ) as response:
+        timer.status = str(response.status)
+        # 检查响应状态码
+        if response.status != 200:
+            raise AIException.quick_raise("流式请求Dify接口的返回码异常" + str(response))
+
+        # 按SSE事件边界读取, 大的工作流节点事件不会被截断
+        async for event in iter_sse_events(response.content):
+            if not isinstance(event.payload, dict):
+                continue
+            logger.debug(f"流式请求Dify接口的响应数据:{event.data}")
+            if event.get('event') == 'error':
+                result_parts = ['dify error,'+ str(event.get('message', '')) + ","]
+            result_parts.append(str(event.get('answer', '')))
+            if conversation_id is None:
+                conversation_id = event.get('conversation_id')
+            # 将数据放入队列
+            await message_queue.put(event.payload)
+
+        return {
+            "result": "".join(result_parts),
+            "conversation_id": conversation_id
+        }
\ No newline at end of file
@@ -0,0 +1,315 @@
+import asyncio
+import inspect
+import logging
+import os
+import random
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from src.exception.aiException import AIException
+from src.pojo.bo.jobBo import JobInfo, JobRun
+
+logger = logging.getLogger(__name__)
+
+
+class JobSchedulerConfig:
+    # 保留的执行记录条数(所有任务共用)
+    HISTORY_SIZE: int = int(os.getenv("JOB_HISTORY_SIZE", 200))
+    # 关闭时等待正在执行的任务的时间（秒）, 超时后取消
+    CLOSE_TIMEOUT: float = float(os.getenv("JOB_CLOSE_TIMEOUT", 10))
+    # 禁用的任务名称, 逗号分隔
+    DISABLED: FrozenSet[str] = frozenset(name.strip() for name in os.getenv("JOB_DISABLED", "").split(",") if name.strip())
+
+
+class CronExpression:
+    """
+    5 段 cron 表达式: 分 时 日 月 周
+    支持 * , - / 写法, 周的取值 0-7(0 和 7 都是周日); 日和周同时限定时满足其一即可(与 crontab 一致)
+    """
+
+    _BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise AIException.quick_raise(f"cron表达式需要5段(分 时 日 月 周): {expr}")
+        self.expr = expr
+        minutes, hours, days, months, weekdays = [self._parse(f, lo, hi, expr) for f, (lo, hi) in zip(fields, self._BOUNDS)]
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int, expr: str) -> FrozenSet[int]:
+        values: Set[int] = set()
+        try:
+            for part in field.split(","):
+                step = 1
+                if "/" in part:
+                    part, step_text = part.split("/", 1)
+                    step = int(step_text)
+                if part == "*":
+                    start, end = lo, hi
+                elif "-" in part:
+                    start_text, end_text = part.split("-", 1)
+                    start, end = int(start_text), int(end_text)
+                else:
+                    # 5/15 表示从5开始每15一次
+                    start = int(part)
+                    end = hi if step > 1 else start
+                if start < lo or end > hi or start > end or step < 1:
+                    raise ValueError(part)
+                values.update(range(start, end + 1, step))
+        except ValueError:
+            raise AIException.quick_raise(f"cron表达式无效: {expr}")
+        return frozenset(values)
+
+    def _day_matches(self, t: datetime) -> bool:
+        day_ok = t.day in self.days
+        weekday_ok = (t.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """严格晚于 after 的下一个匹配时间(精确到分钟)"""
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise AIException.quick_raise(f"cron表达式没有可执行的时间: {self.expr}")
+
+
+class CronTrigger:
+    """
+    按 cron 表达式触发
+    :param jitter: 每次触发随机延后 0~jitter 秒, 把重任务分散开, 不在同一时刻集中执行
+    """
+
+    def __init__(self, expr: str, jitter: float = 0):
+        self._cron = CronExpression(expr)
+        self.jitter = jitter
+
+    def next_fire(self, after: datetime) -> datetime:
+        return self._cron.next_after(after)
+
+    def __str__(self):
+        return f"cron[{self._cron.expr}]" + (f" jitter={self.jitter}s" if self.jitter else "")
+
+
+class IntervalTrigger:
+    """
+    按固定间隔触发
+    :param seconds: 间隔（秒）
+    :param jitter: 每次触发随机延后 0~jitter 秒
+    """
+
+    def __init__(self, seconds: float, jitter: float = 0):
+        if seconds <= 0:
+            raise AIException.quick_raise(f"间隔必须大于0: {seconds}")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return f"interval[{self.seconds}s]" + (f" jitter={self.jitter}s" if self.jitter else "")
+
+
+class Job:
+    """
+    已注册的定时任务
+    任务函数是协程函数, 如果有 scheduled_at 参数, 调用时传入本次计划执行时间(不含随机延迟)
+    """
+
+    def __init__(self, name: str, func: Callable[..., Awaitable], trigger, max_concurrency: int = 1,
+                 timeout: Optional[float] = None, retries: int = 0, retry_interval: float = 60, enabled: bool = True):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_interval = retry_interval
+        self.enabled = enabled
+        self.running = 0
+        self.next_run_at: Optional[datetime] = None
+        self.last_run: Optional[JobRun] = None
+        self._pass_scheduled_at = "scheduled_at" in inspect.signature(func).parameters
+
+    def call(self, scheduled_at: datetime) -> Awaitable:
+        return self.func(scheduled_at=scheduled_at) if self._pass_scheduled_at else self.func()
+
+    def info(self) -> JobInfo:
+        return JobInfo(name=self.name, trigger=str(self.trigger), enabled=self.enabled,
+                       max_concurrency=self.max_concurrency, timeout=self.timeout, retries=self.retries,
+                       running=self.running, next_run_at=self.next_run_at, last_run=self.last_run)
+
+
+class JobScheduler:
+    """
+    进程内定时任务调度器
+
+    - 任务注册时指定触发器(cron/固定间隔)和执行策略: 最大并发、单次超时、失败重试、随机延迟
+    - 每个任务一个调度协程, 到点后在独立的 Task 中执行; 达到最大并发时本次记为 skipped
+    - 执行记录保存在内存中, 供 /jobs 接口查看耗时和失败原因
+    - 多实例部署时调度器在每个实例都会触发, 需要只执行一次的任务自行使用租约(见 leaseService)
+    """
+
+    def __init__(self, config: type[JobSchedulerConfig] = JobSchedulerConfig):
+        self._config = config
+        self._jobs: Dict[str, Job] = {}
+        self._loops: List[asyncio.Task] = []
+        self._runs: Set[asyncio.Task] = set()
+        self._history: deque[JobRun] = deque(maxlen=config.HISTORY_SIZE)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._loops)
+
+    def register(self, name: str, func: Callable[..., Awaitable], trigger, **options) -> Job:
+        """
+        注册任务, 调度器启动前后都可以注册
+        :param name: 任务名称(唯一)
+        :param func: 任务协程函数
+        :param trigger: CronTrigger 或 IntervalTrigger
+        :param options: max_concurrency, timeout, retries, retry_interval, enabled
+        :return: 任务
+        """
+        if name in self._jobs:
+            raise AIException.quick_raise(f"任务{name}已注册")
+        job = Job(name, func, trigger, **options)
+        if name in self._config.DISABLED:
+            job.enabled = False
+        self._jobs[name] = job
+        if self.running and job.enabled:
+            self._loops.append(asyncio.create_task(self._loop(job), name=f"job-loop-{name}"))
+        return job
+
+    def get_job(self, name: str) -> Job:
+        job = self._jobs.get(name)
+        if job is None:
+            raise AIException.quick_raise(f"任务{name}不存在", code=404)
+        return job
+
+    def jobs(self) -> List[JobInfo]:
+        return [job.info() for job in self._jobs.values()]
+
+    def history(self, name: Optional[str] = None, limit: int = 50) -> List[JobRun]:
+        """最近的执行记录, 新的在前"""
+        runs = [run for run in reversed(self._history) if name is None or run.job_name == name]
+        return runs[:limit]
+
+    async def _loop(self, job: Job):
+        fire_at = job.trigger.next_fire(datetime.now())
+        while True:
+            job.next_run_at = fire_at
+            delay = (fire_at - datetime.now()).total_seconds() + random.uniform(0, job.trigger.jitter)
+            await asyncio.sleep(max(delay, 0))
+            self._spawn(job, fire_at)
+            # 执行耗时超过间隔时不补跑错过的时间点
+            fire_at = job.trigger.next_fire(max(fire_at, datetime.now()))
+
+    def _spawn(self, job: Job, scheduled_at: datetime) -> Tuple[JobRun, Optional[asyncio.Task]]:
+        run = JobRun(job_name=job.name, run_id=uuid.uuid4().hex, scheduled_at=scheduled_at)
+        self._history.append(run)
+        job.last_run = run
+        if job.running >= job.max_concurrency:
+            run.status = "skipped"
+            logger.warning(f"任务{job.name}上一次执行尚未结束, 跳过本次执行({scheduled_at})")
+            return run, None
+        # 在创建 Task 前占用并发名额, 连续两次触发时第二次能看到第一次;
+        # 在 Task 结束回调中释放, 还没开始执行就被取消的 Task 也会释放
+        job.running += 1
+        task = asyncio.create_task(self._execute(job, run), name=f"job-run-{job.name}")
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+        task.add_done_callback(lambda _: self._release(job))
+        return run, task
+
+    @staticmethod
+    def _release(job: Job):
+        job.running -= 1
+
+    async def _execute(self, job: Job, run: JobRun):
+        loop = asyncio.get_running_loop()
+        run.started_at = datetime.now()
+        start = loop.time()
+        logger.info(f"任务{job.name}开始执行, 计划时间 {run.scheduled_at}")
+        try:
+            while True:
+                run.attempts += 1
+                try:
+                    await asyncio.wait_for(job.call(run.scheduled_at), timeout=job.timeout)
+                    run.status, run.error = "success", None
+                    break
+                except asyncio.TimeoutError:
+                    # 超时不重试, 需要续跑的任务自行保存进度
+                    run.status, run.error = "timeout", f"执行超时（{job.timeout}秒）"
+                    logger.error(f"任务{job.name}执行超时（{job.timeout}秒）")
+                    break
+                except Exception as e:
+                    run.status, run.error = "failed", str(e)
+                    if run.attempts > job.retries:
+                        logger.error(f"任务{job.name}执行失败, 已达最大重试次数: {str(e)}")
+                        break
+                    logger.error(f"任务{job.name}执行失败: {str(e)}, 重试次数: {run.attempts}/{job.retries}")
+                    await asyncio.sleep(job.retry_interval)
+        except asyncio.CancelledError:
+            run.status = "cancelled"
+            raise
+        finally:
+            run.finished_at = datetime.now()
+            run.duration_ms = int((loop.time() - start) * 1000)
+            logger.info(f"任务{job.name}执行结束: {run.status}, 耗时 {run.duration_ms}ms")
+
+    async def run_now(self, name: str, wait: bool = False) -> JobRun:
+        """
+        立即执行一次任务(不影响原有计划), 遵守最大并发限制
+        :param name: 任务名称
+        :param wait: 是否等待执行结束
+        :return: 执行记录
+        """
+        run, task = self._spawn(self.get_job(name), datetime.now())
+        if wait and task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        return run
+
+    async def start(self):
+        if self.running:
+            return
+        for job in self._jobs.values():
+            if job.enabled:
+                self._loops.append(asyncio.create_task(self._loop(job), name=f"job-loop-{job.name}"))
+        logger.info(f"定时任务调度器已启动, 共 {len(self._loops)} 个任务: {[str(job.trigger) for job in self._jobs.values()]}")
+
+    async def stop(self):
+        """停止调度, 等待正在执行的任务 CLOSE_TIMEOUT 秒后取消"""
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+        if self._runs:
+            _, pending = await asyncio.wait(set(self._runs), timeout=self._config.CLOSE_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("定时任务调度器已关闭")
+
+
+job_scheduler = JobScheduler()
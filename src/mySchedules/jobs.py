@@ -0,0 +1,47 @@
+import logging
+import os
+
+from src.mySchedules.jobScheduler import CronTrigger, IntervalTrigger, JobScheduler, job_scheduler
+from src.mySchedules.userProfileSchedules import register_user_profile_jobs
+from src.service.knownUserService import known_users
+from src.service.promptUsageService import PromptUsageConfig, prompt_usage_aggregator
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceJobConfig:
+    # 已知用户集合的刷新时间, 默认每天凌晨3点半, 随机延后半小时内
+    KNOWN_USERS_REFRESH_CRON: str = os.getenv("KNOWN_USERS_REFRESH_CRON", "30 3 * * *")
+    KNOWN_USERS_REFRESH_JITTER: float = float(os.getenv("KNOWN_USERS_REFRESH_JITTER", 1800))
+
+
+def register_jobs(scheduler: JobScheduler = job_scheduler):
+    """注册所有定时任务, 新任务在这里登记"""
+    register_user_profile_jobs(scheduler)
+    # 提示词使用次数落库
+    scheduler.register("prompt_usage_flush", prompt_usage_aggregator.flush,
+                       IntervalTrigger(PromptUsageConfig.FLUSH_INTERVAL),
+                       timeout=max(PromptUsageConfig.FLUSH_INTERVAL, 30))
+    # 刷新已知用户集合
+    scheduler.register("known_users_refresh", known_users.warm_up,
+                       CronTrigger(MaintenanceJobConfig.KNOWN_USERS_REFRESH_CRON,
+                                   jitter=MaintenanceJobConfig.KNOWN_USERS_REFRESH_JITTER),
+                       timeout=600)
+    # 未注册的任务:
+    # - 日程任务到期提醒: 项目中还没有消息推送渠道, 提醒无处发送
+    # - 数据归档: 库中没有归档表, 也没有约定会话详情、日程任务的保留期限, 归档会改变用户可查到的历史数据,
+    #   需要先确定保留策略和归档目标; 确定后按上面的方式注册(建议放在夜间并加 jitter)
+
+
+async def start_jobs():
+    """在 FastAPI 启动时注册并启动定时任务"""
+    try:
+        register_jobs()
+        await job_scheduler.start()
+    except Exception as e:
+        logger.error(f"启动定时任务调度器失败: {str(e)}")
+
+
+async def stop_jobs():
+    """在 FastAPI 关闭时停止定时任务"""
+    await job_scheduler.stop()
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+from src.pojo.po.apiInfoPo import APIInfo
+
+
+class CachedApiInfo(BaseModel):
+    """
+    缓存中的API信息, 请求头在写入缓存时就已解析为字典
+    """
+    api_info: APIInfo = Field(..., description="API信息(与数据库会话无关的副本)")
+    headers: dict = Field(default_factory=dict, description="解析后的API请求头")
+
+    model_config = {"arbitrary_types_allowed": True}
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobRun(BaseModel):
+    """
+    定时任务的一次执行记录
+    """
+    job_name: str = Field(..., description="任务名称")
+    run_id: str = Field(..., description="执行ID")
+    scheduled_at: datetime = Field(..., description="计划执行时间(不含随机延迟)")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    duration_ms: Optional[int] = Field(None, description="耗时(毫秒)")
+    status: str = Field("running", description="状态 running/success/failed/timeout/skipped/cancelled")
+    attempts: int = Field(0, description="执行次数(含重试)")
+    error: Optional[str] = Field(None, description="失败原因")
+
+
+class JobInfo(BaseModel):
+    """
+    定时任务的配置和运行状态
+    """
+    name: str = Field(..., description="任务名称")
+    trigger: str = Field(..., description="触发器描述")
+    enabled: bool = Field(True, description="是否启用")
+    max_concurrency: int = Field(1, description="同时执行的最大数量")
+    timeout: Optional[float] = Field(None, description="单次执行超时(秒)")
+    retries: int = Field(0, description="失败重试次数")
+    running: int = Field(0, description="正在执行的数量")
+    next_run_at: Optional[datetime] = Field(None, description="下次计划执行时间")
+    last_run: Optional[JobRun] = Field(None, description="最近一次执行记录")
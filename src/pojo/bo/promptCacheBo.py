@@ -0,0 +1,69 @@
+from string import Template
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+from src.ai.pojo.promptBo import PromptContent
+from src.exception.aiException import AIException
+from src.pojo.po.aiCodePo import Code
+from src.pojo.po.promptPo import Prompt
+
+
+class CachedCode(BaseModel):
+    """
+    缓存中的编码, 编码值在写入缓存时就已完成json解析和模板编译
+    """
+    code: Code = Field(..., description="编码(与数据库会话无关的副本)")
+    value: Any = Field(default=None, description="编码值, 可转json的已解析为json")
+    template: Optional[Template] = Field(default=None, description="编码值为文本时预编译的模板")
+    version: int = Field(default=0, description="写入缓存时的编码版本号")
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def render(self, variable: dict) -> str:
+        """
+        用变量替换编码值中的占位符
+        :param variable: 变量字典
+        :return: 替换后的文本
+        """
+        if self.template is None:
+            raise AIException.quick_raise(f"编码{self.code.code}的值不是文本,无法作为提示词模板")
+        return self.template.substitute(**variable)
+
+
+class CachedPrompt(BaseModel):
+    """
+    缓存中的提示词, 内容模板已预编译, 变量模板已解析为字典
+    """
+    prompt: Prompt = Field(..., description="提示词(与数据库会话无关的副本)")
+    template: Template = Field(..., description="预编译的提示词内容模板")
+    placeholders: dict = Field(default_factory=dict, description="解析后的变量模板")
+    version: int = Field(default=0, description="写入缓存时的提示词版本号")
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def code(self) -> str:
+        return self.prompt.code
+
+    @property
+    def name(self) -> str:
+        return self.prompt.name
+
+    @property
+    def user_prompt(self) -> Optional[str]:
+        return self.prompt.user_prompt
+
+    def render_prompt(self, variable: dict) -> str:
+        """
+        使用占位符模板和传入的字典渲染提示词中的变量
+        :param variable: 传入的变量字典
+        :return: 渲染后的提示词
+        """
+        return self.template.substitute({**self.placeholders, **variable})
+
+    def get_messages(self, variable: dict):
+        if not self.user_prompt:
+            raise AIException.quick_raise(f"{self.code} {self.name}提示词缺失默认用户类型的提示词")
+        prompt_str = self.render_prompt(variable)
+        return PromptContent.to_messages(prompt=prompt_str, query=self.user_prompt)
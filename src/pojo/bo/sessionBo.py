@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+
+from src.pojo.po.sessionDetailPo import SessionDetail
+from src.pojo.po.sessionPo import SessionPo
+
+
+class ActiveSession(BaseModel):
+    """
+    用户当前使用中的会话及已进行的对话轮数
+    """
+    session: SessionPo = Field(..., description="当前会话(与数据库会话无关的副本)")
+    turns: int = Field(default=0, description="当前会话已有的对话轮数")
+
+    model_config = {"arbitrary_types_allowed": True}
+
+
+class SessionDetailHit(BaseModel):
+    """
+    会话详情全文检索结果
+    """
+    detail: SessionDetail = Field(..., description="会话详情")
+    score: float = Field(default=0.0, description="相关度, 未使用全文索引时为0")
+
+    model_config = {"arbitrary_types_allowed": True}
@@ -57,12 +57,16 @@ class AppScheduleTask(SQLModel, table=True):
     """
     __tablename__ = "app_schedule_task"
 
-    # 定义表级参数，包括表注释
-    __table_args__ = {
-        "comment": "日程及任务表",
-        "mysql_charset": "utf8mb4",
-        "mysql_collate": "utf8mb4_unicode_ci"
-    }
+    # 定义表级参数，包括表注释和按用户查询时间范围用的联合索引
+    __table_args__ = (
+        Index("idx_user_start_end", "user_id", "start_time", "end_time"),
+        Index("idx_user_status_end", "user_id", "status", "end_time"),
+        {
+            "comment": "日程及任务表",
+            "mysql_charset": "utf8mb4",
+            "mysql_collate": "utf8mb4_unicode_ci"
+        }
+    )
 
     # 定义应该使用like查询的字段列表
     like_search_fields: ClassVar[List[str]] = [
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+
+
+class CheckpointStatus(str, Enum):
+    """
+    批处理任务进度状态枚举
+    """
+    RUNNING = "running"  # 执行中(含中断未完成)
+    FINISHED = "finished"  # 已完成
+
+
+class JobCheckpoint(SQLModel, table=True):
+    """
+    批处理任务进度表模型, 任务中断(超时/重启)后从 cursor 继续
+    """
+    __tablename__ = "job_checkpoint"
+
+    # 定义表级参数，包括表注释
+    __table_args__ = {
+        "comment": "批处理任务进度表",
+        "mysql_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci"
+    }
+
+    job_name: str = Field(
+        primary_key=True,
+        max_length=64,
+        description="任务名称",
+        sa_column_kwargs={"comment": "任务名称"}
+    )
+
+    run_id: str = Field(
+        max_length=64,
+        description="本轮执行ID",
+        sa_column_kwargs={"comment": "本轮执行ID"}
+    )
+
+    cursor: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="已处理完的最后一条记录的主键",
+        sa_column_kwargs={"comment": "已处理完的最后一条记录的主键"}
+    )
+
+    processed: int = Field(
+        default=0,
+        description="本轮已处理的记录数",
+        sa_column_kwargs={"comment": "本轮已处理的记录数"}
+    )
+
+    status: str = Field(
+        default=CheckpointStatus.RUNNING.value,
+        max_length=16,
+        description="状态 running 执行中 finished 已完成",
+        sa_column_kwargs={"comment": "状态 running 执行中 finished 已完成"}
+    )
+
+    started_at: datetime = Field(
+        description="本轮开始时间",
+        sa_column_kwargs={"comment": "本轮开始时间"}
+    )
+
+    updated_at: datetime = Field(
+        description="进度更新时间",
+        sa_column_kwargs={"comment": "进度更新时间"}
+    )
+
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        description="本轮完成时间",
+        sa_column_kwargs={"comment": "本轮完成时间"}
+    )
+
+    @classmethod
+    def start(cls, job_name: str):
+        """开始新的一轮执行"""
+        now = datetime.now()
+        return cls(job_name=job_name,
+                   run_id=uuid.uuid4().hex,
+                   status=CheckpointStatus.RUNNING.value,
+                   started_at=now,
+                   updated_at=now)
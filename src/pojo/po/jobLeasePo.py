@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel, Field
+
+
+class JobLease(SQLModel, table=True):
+    """
+    任务租约表模型, 多实例部署时保证同一任务同一时刻只有一个实例执行
+    """
+    __tablename__ = "job_lease"
+
+    # 定义表级参数，包括表注释
+    __table_args__ = {
+        "comment": "任务租约表",
+        "mysql_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci"
+    }
+
+    lease_name: str = Field(
+        primary_key=True,
+        max_length=64,
+        description="租约名称",
+        sa_column_kwargs={"comment": "租约名称"}
+    )
+
+    owner: str = Field(
+        max_length=128,
+        description="持有租约的实例",
+        sa_column_kwargs={"comment": "持有租约的实例"}
+    )
+
+    acquired_at: datetime = Field(
+        description="获取租约时间",
+        sa_column_kwargs={"comment": "获取租约时间"}
+    )
+
+    heartbeat_at: datetime = Field(
+        description="最后心跳时间",
+        sa_column_kwargs={"comment": "最后心跳时间"}
+    )
+
+    expires_at: Optional[datetime] = Field(
+        default=None,
+        index=True,
+        description="租约过期时间, 过期后其它实例可以接管",
+        sa_column_kwargs={"comment": "租约过期时间, 过期后其它实例可以接管"}
+    )
@@ -9,7 +9,7 @@ from sqlmodel import SQLModel, Field, Index
 
 from src.ai.pojo.promptBo import PromptContent
 from src.exception.aiException import AIException
-from src.utils.dataUtils import is_valid_json
+from src.utils.dataUtils import jstr_to_dict
 
 
 class PromptCodeEnum(str, Enum):
@@ -207,9 +207,17 @@ class Prompt(SQLModel, table=True):
         :return: 渲染后的提示词
         """
         template = Template(self.content)
-        if not is_valid_json(self.placeholder_template):
+        return template.substitute({**self.parse_placeholder_template(),**variable})
+
+    def parse_placeholder_template(self) -> dict:
+        """
+        解析变量模板json(只解析一次)
+        :return: 变量模板字典
+        """
+        try:
+            return jstr_to_dict(self.placeholder_template)
+        except (json.JSONDecodeError, TypeError):
             raise AIException.quick_raise(f"提示词{self.name} {self.code} 的变量模板json转化失败,请维护对应数据")
-        return template.substitute({**json.loads(self.placeholder_template),**variable})
 
     def get_messages(self,variable :dict):
         if not self.user_prompt:
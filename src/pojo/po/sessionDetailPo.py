@@ -20,12 +20,16 @@ class SessionDetail(SQLModel, table=True):
     """
     __tablename__ = "session_detail"
 
-    # 定义表级参数，包括表注释
-    __table_args__ = {
-        "comment": "会话详情表",
-        "mysql_charset": "utf8mb4",
-        "mysql_collate": "utf8mb4_unicode_ci"
-    }
+    # 定义表级参数，包括表注释和对话内容的全文索引(ngram 分词, 支持中文)
+    __table_args__ = (
+        Index("ft_session_detail_text", "user_question", "final_response", "api_output", "process_log",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {
+            "comment": "会话详情表",
+            "mysql_charset": "utf8mb4",
+            "mysql_collate": "utf8mb4_unicode_ci"
+        }
+    )
 
     # 定义应该使用like查询的字段列表
     like_search_fields: ClassVar[List[str]] = [
@@ -33,6 +37,11 @@ class SessionDetail(SQLModel, table=True):
         "user_question", "final_response", "process_log"
     ]
 
+    # 全文索引中的字段, 顺序与 ft_session_detail_text 一致; 这些字段的 like 查询先走全文索引
+    fulltext_search_fields: ClassVar[List[str]] = [
+        "user_question", "final_response", "api_output", "process_log"
+    ]
+
     id: str = Field(
         primary_key=True,
         max_length=64,
@@ -146,6 +146,12 @@ class UserProfile(SQLModel, table=True):
         sa_column_kwargs={"comment": "上一次分析截止的会话详情id"}
     )
 
+    last_handle_time: Optional[datetime] = Field(
+        default=None,
+        description="上一次分析截止的对话时间，之后没有新对话的用户跳过分析",
+        sa_column_kwargs={"comment": "上一次分析截止的对话时间，之后没有新对话的用户跳过分析"}
+    )
+
     status: str = Field(
         default=1,
         max_length=16,
@@ -1,28 +1,19 @@
-import json
-from string import Template
 from typing import Optional
 
 from sqlmodel import Session
 
-from src.dao.aiCodeDao import get_code_by_code
-from src.exception.aiException import AIException
-from src.utils.dataUtils import is_valid_json
+from src.service.promptRegistryService import prompt_registry, get_code_value_cached
 
 
 def get_code_value_by_code(session: Session, code_value: str) -> Optional[str | dict]:
     """
     根据编码获取编码值，若结果可转json，则自动转化为json
+    编码值经注册表缓存，json只在加载时解析一次
     :param session:
     :param code_value:
     :return:
     """
-    code = get_code_by_code(session, code_value)
-    if code is None:
-        raise AIException.quick_raise(f"编码{code_value}不存在")
-    if is_valid_json(code.value):
-        return json.loads(code.value)
-    else:
-        return code.value
+    return get_code_value_cached(session, code_value)
 
 
 def get_code_4_prompt(session: Session, code_value: str, variable=None) -> str:
@@ -35,7 +26,4 @@ def get_code_4_prompt(session: Session, code_value: str, variable=None) -> str:
     """
     if variable is None:
         variable = {}
-    prompt_text = get_code_value_by_code(session=session, code_value=code_value)
-    prompt_template = Template(prompt_text)
-    prompt = prompt_template.substitute(**variable)
-    return prompt
\ No newline at end of file
+    return prompt_registry.get_code(session, code_value).render(variable)
\ No newline at end of file
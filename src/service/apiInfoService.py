@@ -1,9 +1,72 @@
+import json
+import os
 from typing import List, Dict
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.dao.apiInfoDao import get_info_by_api_code, get_info_by_type_code
+from src.dao.apiInfoDao import get_info_by_api_code, get_info_by_type_code, get_info_by_api_code_async
+from src.exception.aiException import AIException
+from src.pojo.bo.apiInfoBo import CachedApiInfo
 from src.pojo.po.apiInfoPo import APIInfo
+from src.utils.cacheUtils import TTLCache
+from src.utils.dataUtils import jstr_to_dict
+
+# API信息基本不变但每次对话都要读取, 缓存 api_code -> CachedApiInfo
+api_info_cache: TTLCache[str, CachedApiInfo] = TTLCache(max_size=int(os.getenv("API_INFO_CACHE_SIZE", 256)),
+                                                        ttl=float(os.getenv("API_INFO_CACHE_TTL", 300)))
+
+
+def _to_cached_api_info(api_info: APIInfo) -> CachedApiInfo:
+    """
+    复制一份与数据库会话无关的API信息, 并预先解析请求头
+    :param api_info: 数据库中查到的API信息
+    :return: 缓存条目
+    """
+    try:
+        headers = jstr_to_dict(api_info.api_header) if api_info.api_header else {}
+    except json.JSONDecodeError:
+        raise AIException.quick_raise(f"API {api_info.api_code} 的请求头json转化失败,请维护对应数据")
+    return CachedApiInfo(api_info=APIInfo.model_validate(api_info.model_dump()), headers=headers)
+
+
+def get_api_info_cached(session: Session, api_code: str) -> CachedApiInfo:
+    """
+    带缓存获取API信息，未命中时查库(没找到直接报错)
+    :param session:
+    :param api_code:
+    :return: 缓存的API信息及解析后的请求头
+    """
+    cached = api_info_cache.get(api_code)
+    if cached is None:
+        cached = _to_cached_api_info(get_info_by_api_code(session, api_code))
+        api_info_cache.set(api_code, cached)
+    return cached
+
+
+async def get_api_info_cached_async(session: AsyncSession, api_code: str) -> CachedApiInfo:
+    """
+    带缓存获取API信息(异步)，未命中时查库(没找到直接报错)
+    :param session:
+    :param api_code:
+    :return: 缓存的API信息及解析后的请求头
+    """
+    cached = api_info_cache.get(api_code)
+    if cached is None:
+        cached = _to_cached_api_info(await get_info_by_api_code_async(session, api_code))
+        api_info_cache.set(api_code, cached)
+    return cached
+
+
+def invalidate_api_info_cache(api_code: str = None):
+    """
+    API信息新增或修改后清除缓存
+    :param api_code: 只清除指定编码, 不传则清空全部
+    """
+    if api_code is None:
+        api_info_cache.clear()
+    else:
+        api_info_cache.pop(api_code)
 
 
 
@@ -14,7 +77,7 @@ def api_info_2_struct_str(session: Session, api_code: str) -> Dict:
     :param api_code:
     :return:
     """
-    api_infos = get_info_by_api_code(session, api_code)
+    api_infos = get_api_info_cached(session, api_code).api_info
     return {
         "API结构": api_infos.api_param_struct,
         "字段含义": api_infos.api_param_desc,
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from sqlmodel import Session
 from src.ai.aiService import do_api_2_llm
@@ -37,8 +38,10 @@ async def get_question_recommend_by_profile(profile: UserProfile,db: Session) :
     :param db:
     :return:
     """
-    histories = get_history_query_by_user_id(session=db, user_id=profile.user_id)
-    prompt_po = get_prompt_by_code_service(session=db, code=PromptCodeEnum.QUESTION_RECOMMEND_PLUS_PROMPT.value)
+    # 同步查询放到线程池, 用户画像分析时不阻塞事件循环
+    histories = await asyncio.to_thread(get_history_query_by_user_id, session=db, user_id=profile.user_id)
+    prompt_po = await asyncio.to_thread(get_prompt_by_code_service, session=db,
+                                        code=PromptCodeEnum.QUESTION_RECOMMEND_PLUS_PROMPT.value)
     prompt = prompt_po.render_prompt(variable={'histories': histories,'user_info':profile.user_info})
     messages = PromptContent.to_messages(prompt=prompt,query=prompt_po.user_prompt)
     response = await do_api_2_llm(ModelConfig(stream=False, messages=messages))
@@ -1,16 +1,17 @@
+import hashlib
 import json
 import logging
-from requests import Session
 import asyncio
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.responses import StreamingResponse
-from src.dao.apiInfoDao import get_info_by_api_code
-from src.dao.sessionDetailDao import create_session_detail
+from src.ai.semanticCache import semantic_cache
 from src.myHttp.bo.httpResponse import HttpResponse
 from src.myHttp.utils.myHttpUtils import normal_post, dify_stream_post
 from src.pojo.po.sessionDetailPo import SessionDetail, DialogCarrierEnum
 from src.pojo.vo.difyResponse import DifyResponse
-from src.service.sessionService import get_user_last_session, session_handle
-from src.service.userProfileService import check_new_user
+from src.service.apiInfoService import get_api_info_cached_async
+from src.service.sessionService import get_user_last_session_async, session_handle, submit_session_detail
+from src.service.userProfileService import check_new_user_async
 from src.utils.dataUtils import is_valid_json, jstr_to_dict
 from datetime import datetime
 
@@ -19,7 +20,13 @@ logger = logging.getLogger(__name__)
 NO_DATA_RESPONSE = DifyResponse.not_found_data()
 
 
-async def normal_dify_flow(api_code: str,user_id: str,dify_param: dict,db: Session):
+def _inputs_digest(inputs) -> str:
+    """Dify 工作流 inputs 的摘要, 作为语义缓存命名空间的一部分"""
+    content = json.dumps(inputs or {}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def normal_dify_flow(api_code: str,user_id: str,dify_param: dict,db: AsyncSession, passthrough: bool = False):
     """
      通用处理Dify对话流\n
      前置工作：\n
@@ -31,15 +38,17 @@ async def normal_dify_flow(api_code: str,user_id: str,dify_param: dict,db: Sessi
     :param api_code:
     :param user_id:
     :param dify_param:
-    :param db:
+    :param db: 异步数据库会话
+    :param passthrough: 流式模式下是否原样透传Dify的SSE字节流
     :return:
     """
-    api_info = get_info_by_api_code(session=db, api_code=api_code)
+    cached_api_info = await get_api_info_cached_async(session=db, api_code=api_code)
+    api_info = cached_api_info.api_info
     api_url = api_info.api_url
-    api_header = api_info.api_header
+    api_header = cached_api_info.headers
 
     # 处理会话和对话信息
-    ai_session = get_user_last_session(session=db, user_id=user_id)
+    ai_session = await get_user_last_session_async(session=db, user_id=user_id)
     ai_session_detail = SessionDetail(user_id=user_id, session_id=ai_session.id)
     ai_session_detail.api_input = dify_param
     ai_session_detail.user_question = dify_param['query']
@@ -55,24 +64,42 @@ async def normal_dify_flow(api_code: str,user_id: str,dify_param: dict,db: Sessi
     # # 给一下当前日期
     # dify_param['query'] = f"{dify_param['query']} (额外可参考信息:{get_now_4_prompt()},我的个人信息:{user_info})"
 
+    # 会话详情是否已提交写后队列, 之后再出异常不重复提交(同一主键会导致整批写入失败)
+    detail_submitted = False
     try:
         if dify_param['response_mode'] != "streaming":
-            dify_response = await normal_post(api_url, dify_param, json.loads(api_header))
+            # 阻塞模式先查语义缓存, 答案与用户数据和工作流输入相关, 按 api_code + 用户 + inputs 隔离
+            cache_namespace = f"{api_code}:{user_id}:{_inputs_digest(dify_param.get('inputs'))}"
+            cached_result = semantic_cache.lookup(api_code, cache_namespace, ai_session_detail.user_question)
+            if cached_result is not None:
+                ai_session_detail.when_success({"cache": "semantic"}, cached_result)
+                ai_session_detail.dialog_carrier = DialogCarrierEnum.DIFY_ERP.value
+                await submit_session_detail(ai_session_detail, user_id)
+                detail_submitted = True
+                return HttpResponse.success(cached_result)
+
+            dify_response = await normal_post(api_url, dify_param, api_header, api_code=api_info.api_code)
             result = dify_result_handler(dify_response).model_dump()
-            asyncio.create_task(session_handle(ai_session,ai_session_detail,dify_response,result))
+            # 只入队不提交事务, 不占用请求耗时
+            await session_handle(ai_session,ai_session_detail,dify_response,result)
+            detail_submitted = True
             if not isinstance(result,list):
                 result = [result]
+            # 无数据和错误的答案不缓存
+            if ai_session_detail.status == "200" and result != [NO_DATA_RESPONSE.model_dump()] and 'dify error' not in str(result):
+                semantic_cache.store(api_code, cache_namespace, ai_session_detail.user_question, result)
             return HttpResponse.success(result)
 
-        # todo: 之后可以把用户缓存到内存中 读取判断， 减少一次DB访问
-        check_new_user(user_id=user_id, session=db, user_source=DialogCarrierEnum.DIFY_ERP.value)
+        await check_new_user_async(user_id=user_id, session=db, user_source=DialogCarrierEnum.DIFY_ERP.value)
         return StreamingResponse(
-        dify_stream_post(url=api_url, data=dify_param, headers=json.loads(api_header),ai_session=ai_session, ai_session_detail=ai_session_detail),
+        dify_stream_post(url=api_url, data=dify_param, headers=api_header,ai_session=ai_session, ai_session_detail=ai_session_detail, passthrough=passthrough,
+                         api_code=api_info.api_code),
         media_type="text/event-stream"
     )
     except  Exception as e:
-        ai_session_detail.when_error("问答流程异常或没有返回数据" + str(e))
-        create_session_detail(session=db, session_detail=ai_session_detail)
+        if not detail_submitted:
+            ai_session_detail.when_error("问答流程异常或没有返回数据" + str(e))
+            await submit_session_detail(ai_session_detail, user_id)
         logger.error(e)
         return HttpResponse.success([NO_DATA_RESPONSE])
 
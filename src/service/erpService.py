@@ -4,13 +4,13 @@ from string import Template
 from src.ai.aiService import do_api_2_llm
 from src.ai.pojo.promptBo import PromptContent
 from src.common.enum.codeEnum import CodeEnum
-from src.dao.apiInfoDao import get_info_by_api_code
 from src.exception.aiException import AIException
 from src.myHttp.utils.myHttpUtils import normal_post, post_with_query_params, form_data_post
 from sqlmodel import Session
 
 from src.pojo.bo.aiBo import NormalLLMRequestModel, ModelConfig
 from src.service.aiCodeService import get_code_value_by_code
+from src.service.apiInfoService import get_api_info_cached
 from src.utils.dataUtils import translate_dict_keys_4_list, translate_dict_keys_4_dict
 
 logger = logging.getLogger(__name__)
@@ -22,12 +22,12 @@ async def erp_execute_sql(sql, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_EXEC_SQL_API_CODE.value)
+    api_info = get_api_info_cached(session,CodeEnum.ERP_EXEC_SQL_API_CODE.value).api_info
     if isinstance(sql,str):
         sql = {"sql": sql}
     else:
         sql = sql.model_dump()
-    response = await normal_post(api_info.api_url, data=sql, headers={})
+    response = await normal_post(api_info.api_url, data=sql, headers={}, api_code=api_info.api_code)
     return response['data']
 
 async def erp_generate_popi(data: dict, session: Session):
@@ -37,8 +37,8 @@ async def erp_generate_popi(data: dict, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_GEN_POPI_API_CODE.value)
-    response = await post_with_query_params(api_info.api_url, params=data, headers=data)
+    api_info = get_api_info_cached(session,CodeEnum.ERP_GEN_POPI_API_CODE.value).api_info
+    response = await post_with_query_params(api_info.api_url, params=data, headers=data, api_code=api_info.api_code)
     erp_response_check(response)
     return response['data']
 
@@ -49,8 +49,8 @@ async def erp_generate_pi(data: dict, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_GEN_PI_API_CODE.value)
-    response = await form_data_post(api_info.api_url, form_data=data, headers=data)
+    api_info = get_api_info_cached(session,CodeEnum.ERP_GEN_PI_API_CODE.value).api_info
+    response = await form_data_post(api_info.api_url, form_data=data, headers=data, api_code=api_info.api_code)
     erp_response_check(response)
     return response['data']
 
@@ -73,8 +73,8 @@ async def erp_order_search_without_check(data: dict, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_ORDER_SEARCH_API_CODE.value)
-    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']})
+    api_info = get_api_info_cached(session,CodeEnum.ERP_ORDER_SEARCH_API_CODE.value).api_info
+    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']}, api_code=api_info.api_code)
     return response
 
 async def erp_user_sale_info(data: dict, session: Session):
@@ -84,8 +84,8 @@ async def erp_user_sale_info(data: dict, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_USER_SALE_INFO_API_CODE.value)
-    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']})
+    api_info = get_api_info_cached(session,CodeEnum.ERP_USER_SALE_INFO_API_CODE.value).api_info
+    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']}, api_code=api_info.api_code)
     erp_response_check(response)
     if isinstance(response['data'],list):
         return response['data']
@@ -98,8 +98,8 @@ async def erp_inventory_detail_search(data: dict, session: Session):
     :param session:
     :return:
     """
-    api_info = get_info_by_api_code(session,CodeEnum.ERP_INVENTORY_DETAIL_SEARCH_API_CODE.value)
-    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']})
+    api_info = get_api_info_cached(session,CodeEnum.ERP_INVENTORY_DETAIL_SEARCH_API_CODE.value).api_info
+    response = await form_data_post(api_info.api_url, form_data=data, headers={"token": data['token']}, api_code=api_info.api_code)
     erp_response_check(response)
     return response['data']
 
@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Select, select
+from sqlmodel import SQLModel
+
+from src.db.db import engine
+from src.pojo.po.appScheduleTaskPo import AppScheduleTask
+from src.pojo.po.sessionDetailPo import SessionDetail
+from src.pojo.po.sessionPo import SessionPo
+
+logger = logging.getLogger(__name__)
+
+
+class ExportConfig:
+    # 每次从服务端游标读取的行数
+    BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+    # 攒够多少字节再向客户端写一次
+    CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", 64 * 1024))
+    # gzip 压缩级别(1-9)
+    GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", 6))
+
+
+class ExportFormat(str, Enum):
+    """
+    导出格式
+    """
+    NDJSON = "ndjson"  # 每行一个 JSON 对象
+    CSV = "csv"
+
+
+# 不导出的字段
+_EXCLUDED_COLUMNS: Dict[str, set] = {
+    SessionPo.__tablename__: {"token"},
+}
+
+
+def _export_columns(model_class: type[SQLModel]) -> list:
+    excluded = _EXCLUDED_COLUMNS.get(model_class.__tablename__, set())
+    return [column for column in model_class.__table__.columns if column.name not in excluded]
+
+
+def iter_rows(statement: Select, batch_size: int = ExportConfig.BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    通过服务端游标逐行读取, 驱动每次只缓存 batch_size 行, 不构造 ORM 对象
+    :param statement: 查询语句(列查询)
+    :param batch_size: 每批行数
+    :return: 行字典
+    """
+    count = 0
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        for row in result.mappings():
+            count += 1
+            yield dict(row)
+    logger.info(f"导出完成, 共 {count} 行")
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def encode_csv(rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    # 带 BOM, Excel 打开中文不乱码
+    writer.writerow(columns)
+    yield "\ufeff" + take()
+    for row in rows:
+        writer.writerow(["" if row.get(name) is None else row.get(name) for name in columns])
+        yield take()
+
+
+def _chunked(lines: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    """把小段文本攒成 chunk_size 左右的字节块, 减少写出次数"""
+    parts: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = ExportConfig.GZIP_LEVEL) -> Iterator[bytes]:
+    """边读边压缩, 输出标准 gzip 格式"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(statement: Select, columns: List[str], fmt: ExportFormat, use_gzip: bool = False,
+                  config: type[ExportConfig] = ExportConfig) -> Iterator[bytes]:
+    """
+    导出数据流, 内存占用与总行数无关
+    :param statement: 查询语句
+    :param columns: 列名(CSV 表头)
+    :param fmt: 导出格式
+    :param use_gzip: 是否 gzip 压缩
+    :return: 字节块
+    """
+    rows = iter_rows(statement, config.BATCH_SIZE)
+    lines = encode_csv(rows, columns) if fmt == ExportFormat.CSV else encode_ndjson(rows)
+    chunks = _chunked(lines, config.CHUNK_SIZE)
+    return gzip_stream(chunks, config.GZIP_LEVEL) if use_gzip else chunks
+
+
+def _time_range(column, start: Optional[datetime], end: Optional[datetime]) -> list:
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
+
+
+def session_export_query(user_id: Optional[str] = None, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None) -> Tuple[Select, List[str]]:
+    """
+    会话导出查询, 按创建时间 [start, end) 过滤
+    :return: (查询语句, 列名)
+    """
+    columns = _export_columns(SessionPo)
+    conditions = _time_range(SessionPo.create_time, start, end)
+    if user_id is not None:
+        conditions.append(SessionPo.user_id == user_id)
+    statement = select(*columns).where(*conditions).order_by(SessionPo.create_time, SessionPo.id)
+    return statement, [column.name for column in columns]
+
+
+def session_detail_export_query(user_id: Optional[str] = None, session_id: Optional[str] = None,
+                                status: Optional[str] = None, start: Optional[datetime] = None,
+                                end: Optional[datetime] = None) -> Tuple[Select, List[str]]:
+    """
+    会话详情导出查询, 按创建时间 [start, end) 过滤, 指定用户时关联会话表
+    :return: (查询语句, 列名)
+    """
+    columns = _export_columns(SessionDetail)
+    conditions = _time_range(SessionDetail.create_time, start, end)
+    if session_id is not None:
+        conditions.append(SessionDetail.session_id == session_id)
+    if status is not None:
+        conditions.append(SessionDetail.status == status)
+    statement = select(*columns)
+    if user_id is not None:
+        statement = statement.join(SessionPo, SessionPo.id == SessionDetail.session_id)
+        conditions.append(SessionPo.user_id == user_id)
+    statement = statement.where(*conditions).order_by(SessionDetail.create_time, SessionDetail.id)
+    return statement, [column.name for column in columns]
+
+
+def schedule_task_export_query(user_id: Optional[str] = None, status: Optional[str] = None,
+                               start: Optional[datetime] = None,
+                               end: Optional[datetime] = None) -> Tuple[Select, List[str]]:
+    """
+    日程任务导出查询, 按创建时间 [start, end) 过滤
+    :return: (查询语句, 列名)
+    """
+    columns = _export_columns(AppScheduleTask)
+    conditions = _time_range(AppScheduleTask.create_time, start, end)
+    if user_id is not None:
+        conditions.append(AppScheduleTask.user_id == user_id)
+    if status is not None:
+        conditions.append(AppScheduleTask.status == status)
+    statement = select(*columns).where(*conditions).order_by(AppScheduleTask.create_time, AppScheduleTask.id)
+    return statement, [column.name for column in columns]
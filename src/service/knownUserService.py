@@ -0,0 +1,69 @@
+import logging
+import os
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.dao.userProfileDao import get_recent_profile_user_ids_async
+from src.db.db import async_engine
+from src.utils.cacheUtils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class KnownUserConfig:
+    # 缓存的已知用户数上限, 启动预热时也最多加载这么多
+    CACHE_SIZE: int = int(os.getenv("KNOWN_USER_CACHE_SIZE", 100000))
+    # 缓存过期时间（秒）, 过期后重新查库确认
+    CACHE_TTL: float = float(os.getenv("KNOWN_USER_CACHE_TTL", 86400))
+
+
+class KnownUserSet:
+    """
+    已存在用户画像的用户集合(有界 LRU)
+
+    - 只记录"已存在"的用户, 命中即可跳过画像查询; 未命中时仍查库确认, 不会误判
+    - 应用启动时按 update_time 从 user_profile 预热最近活跃的用户
+    - 创建画像后加入, 删除画像后移除
+    """
+
+    def __init__(self, config: type[KnownUserConfig] = KnownUserConfig):
+        self._config = config
+        self._users: TTLCache[str, bool] = TTLCache(max_size=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+
+    def __contains__(self, user_id: Optional[str]) -> bool:
+        return user_id is not None and user_id in self._users
+
+    def add(self, user_id: Optional[str]):
+        if user_id is not None:
+            self._users.set(user_id, True)
+
+    def discard(self, user_id: Optional[str]):
+        self._users.pop(user_id)
+
+    def clear(self):
+        self._users.clear()
+
+    async def warm_up(self) -> int:
+        """
+        从 user_profile 加载最近活跃的用户
+        :return: 加载的用户数
+        """
+        async with AsyncSession(async_engine) as session:
+            user_ids = await get_recent_profile_user_ids_async(session, limit=self._config.CACHE_SIZE)
+        # 按活跃时间倒序查出, 倒着写入使最活跃的用户位于 LRU 队尾
+        for user_id in reversed(user_ids):
+            self.add(user_id)
+        return len(user_ids)
+
+
+known_users = KnownUserSet()
+
+
+async def warm_up_known_users():
+    """在 FastAPI 启动时预热已知用户集合, 失败不影响启动"""
+    try:
+        cnt = await known_users.warm_up()
+        logger.info(f"已知用户集合预热完成, 共 {cnt} 个用户")
+    except Exception as e:
+        logger.error(f"已知用户集合预热失败, 将在请求时逐个查库: {str(e)}")
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.dao.jobLeaseDao import try_acquire_lease_async, renew_lease_async, release_lease_async
+from src.db.db import async_engine
+from src.exception.aiException import AIException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LeaseConfig:
+    # 租约有效期（秒）, 持有者崩溃后最多经过该时间其它实例可以接管
+    TTL: float = float(os.getenv("JOB_LEASE_TTL", 60))
+    # 心跳间隔（秒）, 需明显小于 TTL
+    HEARTBEAT_INTERVAL: float = float(os.getenv("JOB_LEASE_HEARTBEAT_INTERVAL", 20))
+    # 当前实例标识, 默认 主机名:进程号:随机串
+    INSTANCE_ID: str = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class DistributedLease:
+    """
+    数据库租约
+
+    - acquire: 租约不存在/已过期/本就属于自己时获取成功, 同一时刻只有一个实例持有
+    - 持有期间后台每 HEARTBEAT_INTERVAL 秒续约; 续约失败(被接管或数据库不可用超过 TTL)时触发 lost
+    - 持有者崩溃后不再续约, 租约在 TTL 后过期, 其它实例即可接管
+    """
+
+    def __init__(self, name: str, owner: str = LeaseConfig.INSTANCE_ID, config: type[LeaseConfig] = LeaseConfig):
+        self.name = name
+        self.owner = owner
+        self._config = config
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.lost = asyncio.Event()
+
+    async def acquire(self) -> bool:
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            acquired = await try_acquire_lease_async(db, self.name, self.owner, self._config.TTL)
+        if acquired:
+            self.lost = asyncio.Event()
+            self._heartbeat = asyncio.create_task(self._run_heartbeat(), name=f"lease-heartbeat-{self.name}")
+            logger.info(f"获取租约成功: {self.name}, owner={self.owner}")
+        return acquired
+
+    async def _run_heartbeat(self):
+        loop = asyncio.get_running_loop()
+        last_renewed = loop.time()
+        while True:
+            await asyncio.sleep(self._config.HEARTBEAT_INTERVAL)
+            try:
+                async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                    renewed = await renew_lease_async(db, self.name, self.owner, self._config.TTL)
+            except Exception as e:
+                logger.warning(f"租约续约异常: {self.name}, {str(e)}")
+                # 数据库暂时不可用时继续重试, 超过 TTL 后租约可能已被接管
+                renewed = loop.time() - last_renewed < self._config.TTL
+            else:
+                last_renewed = loop.time() if renewed else last_renewed
+            if not renewed:
+                logger.error(f"租约已丢失: {self.name}, owner={self.owner}")
+                self.lost.set()
+                return
+
+    async def release(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                await release_lease_async(db, self.name, self.owner)
+            logger.info(f"租约已释放: {self.name}")
+        except Exception as e:
+            # 释放失败不影响结果, 租约会在 TTL 后自然过期
+            logger.warning(f"租约释放失败: {self.name}, {str(e)}")
+
+
+async def run_with_lease(name: str, job: Callable[[], Awaitable[T]]) -> tuple[bool, Optional[T]]:
+    """
+    持有租约执行任务, 没拿到租约时直接返回; 执行中租约丢失则取消任务
+    :param name: 租约名称
+    :param job: 任务协程函数
+    :return: (是否执行了任务, 任务结果)
+    """
+    lease = DistributedLease(name)
+    if not await lease.acquire():
+        logger.info(f"租约 {name} 由其它实例持有, 本实例跳过")
+        return False, None
+    task = asyncio.create_task(job())
+    lost = asyncio.create_task(lease.lost.wait())
+    try:
+        await asyncio.wait({task, lost}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise AIException.quick_raise(f"租约 {name} 已被其它实例接管, 任务已取消")
+        return True, task.result()
+    finally:
+        # 外部取消(如超时)时一并取消任务, 任务自身负责保存进度
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        lost.cancel()
+        await lease.release()
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import os
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.ai.llmRouter import llm_router
+from src.dao.jobCheckpointDao import get_checkpoint_async, save_checkpoint_async
+from src.dao.sessionDetailDao import get_latest_turn_time_by_user_ids_async
+from src.dao.userProfileDao import get_profiles_after_id_async
+from src.db.db import async_engine
+from src.pojo.po.jobCheckpointPo import JobCheckpoint, CheckpointStatus
+from src.pojo.po.userProfilePo import UserProfile
+from src.service.leaseService import LeaseConfig, run_with_lease
+from src.service.userProfileService import analysis_by_user, has_new_turns
+
+logger = logging.getLogger(__name__)
+
+# 任务进度表中的任务名称
+JOB_NAME = "user_profile_analysis"
+
+
+class ProfileAnalysisConfig:
+    # 同时分析的用户数
+    WORKERS: int = int(os.getenv("PROFILE_ANALYSIS_WORKERS", 4))
+    # 每次从数据库读取的画像数
+    PAGE_SIZE: int = int(os.getenv("PROFILE_ANALYSIS_PAGE_SIZE", 100))
+    # 每个模型供应商同时进行的分析调用数
+    LLM_CONCURRENCY: int = int(os.getenv("PROFILE_ANALYSIS_LLM_CONCURRENCY", 4))
+    # 每处理完多少个用户保存一次进度
+    CHECKPOINT_INTERVAL: int = int(os.getenv("PROFILE_ANALYSIS_CHECKPOINT_INTERVAL", 20))
+    # 分片数, 多实例部署时按 user_id 哈希把用户分给不同实例, 每个分片一个租约和一份进度
+    SHARDS: int = int(os.getenv("PROFILE_ANALYSIS_SHARDS", 1))
+
+
+class ProviderLimiter:
+    """
+    按模型供应商限制并发, 同一供应商的模型共用一个信号量
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def slot(self, model: str) -> asyncio.Semaphore:
+        name = llm_router.resolve(model).name
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(self._limit)
+        return semaphore
+
+
+class _Watermark:
+    """
+    按派发顺序推进的进度: 某个画像及它之前派发的画像都处理完, 进度才推进到它
+    各 worker 完成顺序不定, 中断后从该进度继续只会重复少量已完成的用户, 不会遗漏
+    """
+
+    def __init__(self, cursor: Optional[str]):
+        self.cursor = cursor
+        self._dispatched = deque()
+        self._done = set()
+
+    def dispatch(self, profile_id: str):
+        self._dispatched.append(profile_id)
+
+    def complete(self, profile_id: str):
+        self._done.add(profile_id)
+        while self._dispatched and self._dispatched[0] in self._done:
+            self.cursor = self._dispatched.popleft()
+            self._done.discard(self.cursor)
+
+
+class ProfileAnalysisPipeline:
+    """
+    用户画像分析流水线
+
+    - 按主键分页读取画像, 放入有界队列, 由 WORKERS 个 worker 逐个分析, 慢用户不会拖住其它用户
+    - 每页用一条查询取出各用户最近一次对话的时间, 上次分析后没有新对话的用户不入队, 不查历史也不调用LLM
+    - 每个 worker 内三项分析并发执行, 同一模型供应商的调用受 LLM_CONCURRENCY 限制
+    - 进度保存在 job_checkpoint 表, 任务超时/重启后从上次进度继续, 完成后下一轮从头开始
+    """
+
+    def __init__(self, config: type[ProfileAnalysisConfig] = ProfileAnalysisConfig):
+        self._config = config
+        self._save_lock = asyncio.Lock()
+
+    @staticmethod
+    async def _load_checkpoint(job_name: str) -> JobCheckpoint:
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            checkpoint = await get_checkpoint_async(db, job_name)
+            if checkpoint is not None and checkpoint.status == CheckpointStatus.RUNNING.value:
+                logger.info(f"【用户画像分析】:继续上次未完成的分析({job_name}), run_id={checkpoint.run_id}, "
+                            f"已处理 {checkpoint.processed} 个用户")
+                return checkpoint
+            return await save_checkpoint_async(db, JobCheckpoint.start(job_name))
+
+    async def _save(self, checkpoint: JobCheckpoint):
+        async with self._save_lock:
+            async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                await save_checkpoint_async(db, checkpoint)
+
+    async def run(self, job_name: str = JOB_NAME, shard: Optional[Tuple[int, int]] = None) -> int:
+        """
+        执行一轮(或继续上一轮)用户画像分析
+        :param job_name: 进度表中的任务名称
+        :param shard: (分片序号, 分片数), 只处理 crc32(user_id) % 分片数 == 分片序号 的用户, 为空处理全部
+        :return: 本次处理的用户数
+        """
+        checkpoint = await self._load_checkpoint(job_name)
+        watermark = _Watermark(checkpoint.cursor)
+        limiter = ProviderLimiter(self._config.LLM_CONCURRENCY)
+        queue: asyncio.Queue[Optional[Tuple[UserProfile, datetime]]] = asyncio.Queue(maxsize=self._config.WORKERS * 2)
+        processed_before = checkpoint.processed
+        processed = 0
+        skipped = 0
+
+        async def worker():
+            nonlocal processed
+            while (item := await queue.get()) is not None:
+                profile, latest_turn_at = item
+                try:
+                    await analysis_by_user(profile, llm_slot=limiter.slot, latest_turn_at=latest_turn_at)
+                except Exception as e:
+                    logger.error(f"【用户画像分析】:用户({profile.user_id})分析发生异常\n{e}")
+                watermark.complete(profile.id)
+                processed += 1
+                if processed % self._config.CHECKPOINT_INTERVAL == 0:
+                    checkpoint.cursor = watermark.cursor
+                    checkpoint.processed = processed_before + processed
+                    try:
+                        await self._save(checkpoint)
+                    except Exception as e:
+                        logger.error(f"【用户画像分析】:进度保存失败, 下次继续保存: {str(e)}")
+
+        workers = [asyncio.create_task(worker(), name=f"profile-analysis-{i}") for i in range(self._config.WORKERS)]
+        try:
+            cursor = checkpoint.cursor
+            while True:
+                async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                    page = await get_profiles_after_id_async(db, cursor, self._config.PAGE_SIZE)
+                    latest_turns = await get_latest_turn_time_by_user_ids_async(db, [p.user_id for p in page])
+                for profile in page:
+                    if shard is not None and zlib.crc32(profile.user_id.encode("utf-8")) % shard[1] != shard[0]:
+                        continue
+                    watermark.dispatch(profile.id)
+                    latest_turn_at = latest_turns.get(profile.user_id)
+                    if not has_new_turns(profile, latest_turn_at):
+                        watermark.complete(profile.id)
+                        skipped += 1
+                        continue
+                    await queue.put((profile, latest_turn_at))
+                if len(page) < self._config.PAGE_SIZE:
+                    break
+                cursor = page[-1].id
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except (asyncio.CancelledError, Exception):
+            # 超时被取消或出错时保存已完成的进度, 下次从这里继续
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            checkpoint.cursor = watermark.cursor
+            checkpoint.processed = processed_before + processed
+            await self._save(checkpoint)
+            logger.warning(f"【用户画像分析】:分析中断, 进度已保存, 已处理 {checkpoint.processed} 个用户")
+            raise
+
+        checkpoint.cursor = watermark.cursor
+        checkpoint.processed = processed_before + processed
+        checkpoint.status = CheckpointStatus.FINISHED.value
+        checkpoint.finished_at = datetime.now()
+        await self._save(checkpoint)
+        logger.info(f"【用户画像分析】:本轮分析完成, 共处理 {checkpoint.processed} 个用户, "
+                    f"本次跳过 {skipped} 个没有新对话的用户")
+        return processed
+
+
+profile_analysis_pipeline = ProfileAnalysisPipeline()
+
+
+async def analysis_all():
+    """分析所有用户画像(上次中断时从进度处继续)"""
+    return await profile_analysis_pipeline.run()
+
+
+def _shard_job_name(index: int, shards: int) -> str:
+    return JOB_NAME if shards <= 1 else f"{JOB_NAME}:{index}/{shards}"
+
+
+async def _shard_finished_since(job_name: str, since: datetime) -> bool:
+    """
+    分片是否在 since 之后完成过一轮
+    按完成时间判断: 之前中断的一轮在 since 之后续跑完成, 也算本轮已完成, 不会再从头跑一遍
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        checkpoint = await get_checkpoint_async(db, job_name)
+    return (checkpoint is not None and checkpoint.status == CheckpointStatus.FINISHED.value
+            and checkpoint.finished_at is not None and checkpoint.finished_at >= since)
+
+
+async def analysis_all_distributed(scheduled_at: datetime, config: type[ProfileAnalysisConfig] = ProfileAnalysisConfig) -> int:
+    """
+    多实例安全的用户画像分析, 所有实例在同一时刻调用
+
+    - 每个分片一个数据库租约, 同一分片同一时刻只有一个实例执行; 各实例按顺序抢占空闲分片
+    - 在 scheduled_at 之后完成(包括续跑之前中断的一轮)的分片直接跳过, 不会重复分析
+    - 持有者崩溃后租约在 TTL 后过期, 仍在等待的实例接管并从进度处继续
+    - 所有分片完成后返回, 调用方负责超时
+    :param scheduled_at: 本轮计划执行时间
+    :return: 本实例处理的用户数
+    """
+    shards = max(config.SHARDS, 1)
+    processed = 0
+    while True:
+        pending = 0
+        for index in range(shards):
+            job_name = _shard_job_name(index, shards)
+            if await _shard_finished_since(job_name, scheduled_at):
+                continue
+            pending += 1
+            ran, count = await run_with_lease(job_name, lambda: profile_analysis_pipeline.run(
+                job_name=job_name, shard=(index, shards) if shards > 1 else None))
+            if ran:
+                processed += count
+                pending -= 1
+        if pending == 0:
+            return processed
+        # 其它实例持有剩余分片, 等待其完成或租约过期后接管
+        await asyncio.sleep(LeaseConfig.TTL / 2)
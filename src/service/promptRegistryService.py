@@ -0,0 +1,152 @@
+import copy
+import json
+import logging
+import os
+import threading
+from string import Template
+from typing import Any, Dict
+
+from sqlmodel import Session
+
+from src.dao.aiCodeDao import get_code_by_code
+from src.dao.promptDao import get_prompt_by_code
+from src.exception.aiException import AIException
+from src.pojo.bo.promptCacheBo import CachedCode, CachedPrompt
+from src.pojo.po.aiCodePo import Code
+from src.pojo.po.promptPo import Prompt
+from src.utils.cacheUtils import TTLCache
+from src.utils.dataUtils import jstr_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class PromptRegistryConfig:
+    # 编码/提示词缓存的最大条目数
+    MAX_SIZE: int = int(os.getenv("PROMPT_REGISTRY_CACHE_SIZE", 512))
+    # 缓存过期时间（秒）, 多实例部署时其它实例的修改最多延迟该时间生效
+    TTL: float = float(os.getenv("PROMPT_REGISTRY_CACHE_TTL", 600))
+
+
+class PromptRegistry:
+    """
+    编码(Code)与提示词(Prompt)的进程内注册表
+
+    - 缓存数据库行的副本, 同时保存预编译的 Template 和解析好的 json, 渲染时不再查库、不再解析
+    - 编码和提示词各有一个版本号, 写接口调用 bump_* 使版本号加一, 旧版本的条目在下次读取时重新加载
+    - 版本号在查库之前读取, 与写操作并发的加载即使晚于 bump 写入缓存, 也会因版本过期被丢弃
+    """
+
+    def __init__(self, config: type[PromptRegistryConfig] = PromptRegistryConfig):
+        self._codes: TTLCache[str, CachedCode] = TTLCache(max_size=config.MAX_SIZE, ttl=config.TTL)
+        self._prompts: TTLCache[str, CachedPrompt] = TTLCache(max_size=config.MAX_SIZE, ttl=config.TTL)
+        self._lock = threading.Lock()
+        self._code_version = 0
+        self._prompt_version = 0
+
+    @property
+    def code_version(self) -> int:
+        return self._code_version
+
+    @property
+    def prompt_version(self) -> int:
+        return self._prompt_version
+
+    def bump_code_version(self) -> int:
+        """编码新增/修改/删除后调用, 使所有已缓存的编码失效"""
+        with self._lock:
+            self._code_version += 1
+            return self._code_version
+
+    def bump_prompt_version(self) -> int:
+        """提示词新增/修改/删除后调用, 使所有已缓存的提示词失效"""
+        with self._lock:
+            self._prompt_version += 1
+            return self._prompt_version
+
+    @staticmethod
+    def _compile_code(code: Code, version: int) -> CachedCode:
+        value: Any = code.value
+        if isinstance(value, str):
+            try:
+                value = jstr_to_dict(value)
+            except json.JSONDecodeError:
+                pass
+        template = Template(value) if isinstance(value, str) else None
+        return CachedCode(code=Code.model_validate(code.model_dump()), value=value, template=template, version=version)
+
+    @staticmethod
+    def _compile_prompt(prompt: Prompt, version: int) -> CachedPrompt:
+        return CachedPrompt(prompt=Prompt.model_validate(prompt.model_dump()),
+                            template=Template(prompt.content),
+                            placeholders=prompt.parse_placeholder_template(),
+                            version=version)
+
+    def get_code(self, session: Session, code_value: str) -> CachedCode:
+        """
+        获取编码(没找到直接报错)
+        :param session:
+        :param code_value: 码值
+        :return: 缓存的编码
+        """
+        cached = self._codes.get(code_value)
+        if cached is not None and cached.version == self._code_version:
+            return cached
+        version = self._code_version
+        code = get_code_by_code(session, code_value)
+        if code is None:
+            raise AIException.quick_raise(f"编码{code_value}不存在")
+        cached = self._compile_code(code, version)
+        self._codes.set(code_value, cached)
+        return cached
+
+    def get_prompt(self, session: Session, code: str) -> CachedPrompt:
+        """
+        获取提示词(没找到直接报错)
+        :param session:
+        :param code: 提示词编码
+        :return: 缓存的提示词
+        """
+        cached = self._prompts.get(code)
+        if cached is not None and cached.version == self._prompt_version:
+            return cached
+        version = self._prompt_version
+        prompt = get_prompt_by_code(session, code)
+        if prompt is None:
+            raise AIException.quick_raise(f"没有找到对应的提示词(code:{code})")
+        cached = self._compile_prompt(prompt, version)
+        self._prompts.set(code, cached)
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "code_version": self._code_version,
+            "prompt_version": self._prompt_version,
+            "codes": self._codes.stats(),
+            "prompts": self._prompts.stats(),
+        }
+
+
+prompt_registry = PromptRegistry()
+
+
+def get_code_value_cached(session: Session, code_value: str) -> Any:
+    """
+    带缓存获取编码值, json类型的值返回副本, 调用方修改不会影响缓存
+    :param session:
+    :param code_value: 码值
+    :return: 编码值
+    """
+    value = prompt_registry.get_code(session, code_value).value
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def invalidate_code_cache():
+    """编码写接口调用, 使编码缓存失效"""
+    version = prompt_registry.bump_code_version()
+    logger.debug(f"编码缓存已失效, 当前版本 {version}")
+
+
+def invalidate_prompt_cache():
+    """提示词写接口调用, 使提示词缓存失效"""
+    version = prompt_registry.bump_prompt_version()
+    logger.debug(f"提示词缓存已失效, 当前版本 {version}")
@@ -1,11 +1,11 @@
 from typing import Optional
 from sqlmodel import Session
 
-from src.dao.promptDao import get_prompt_by_code, increment_usage_count_by_code
-from src.pojo.po.promptPo import Prompt
-from src.exception.aiException import AIException
+from src.pojo.bo.promptCacheBo import CachedPrompt
+from src.service.promptRegistryService import prompt_registry
+from src.service.promptUsageService import prompt_usage_aggregator
 
-def get_prompt_by_code_service(session: Session, code: str) -> Prompt:
+def get_prompt_by_code_service(session: Session, code: str) -> CachedPrompt:
     """
     根据提示词编码查询提示词，并增加使用次数
 
@@ -14,21 +14,15 @@ def get_prompt_by_code_service(session: Session, code: str) -> Prompt:
         code: 提示词编码
 
     Returns:
-        提示词模型实例
+        缓存的提示词(内容模板已预编译)
 
     Raises:
         AIException: 如果找不到对应的提示词
     """
-    # 查询提示词
-    prompt = get_prompt_by_code(session, code)
-    if prompt is None:
-        raise AIException.quick_raise(f"没有找到对应的提示词(code:{code})")
+    # 从注册表获取提示词，未命中时查库
+    prompt = prompt_registry.get_prompt(session, code)
 
-    # 增加使用次数
-    updated_prompt = increment_usage_count_by_code(session, code)
-    if updated_prompt is None:
-        # 这种情况理论上不会发生，因为我们已经确认提示词存在
-        # 但为了健壮性，我们仍然处理这种情况
-        raise AIException.quick_raise(f"更新提示词使用次数失败(code:{code})")
+    # 使用次数在内存中累加，由后台任务批量落库
+    prompt_usage_aggregator.record(code)
 
-    return updated_prompt
+    return prompt
@@ -0,0 +1,82 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.dao.promptDao import batch_increment_usage_count_async
+from src.db.db import async_engine
+
+logger = logging.getLogger(__name__)
+
+
+class PromptUsageConfig:
+    # 使用次数落库间隔（秒）
+    FLUSH_INTERVAL: float = float(os.getenv("PROMPT_USAGE_FLUSH_INTERVAL", 10))
+
+
+class PromptUsageAggregator:
+    """
+    提示词使用次数聚合器
+
+    - 获取提示词时只在内存中累加次数, 不在请求链路上读写 prompt 表
+    - 定时任务(prompt_usage_flush)每隔 FLUSH_INTERVAL 秒把累计值用一条 UPDATE 写入(usage_count += n, last_called_at)
+    - 写入失败的计数合并回内存, 下个周期再写; 应用关闭时写入剩余计数
+    """
+
+    def __init__(self, config: type[PromptUsageConfig] = PromptUsageConfig):
+        self._config = config
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        # record 可能在线程池中的同步代码里调用, 用线程锁保护
+        self._lock = threading.Lock()
+
+    def record(self, code: str, n: int = 1):
+        """
+        记录一次提示词使用
+        :param code: 提示词编码
+        :param n: 使用次数
+        """
+        now = datetime.now()
+        with self._lock:
+            count, _ = self._pending.get(code, (0, now))
+            self._pending[code] = (count + n, now)
+
+    def _merge_back(self, usages: Dict[str, Tuple[int, datetime]]):
+        """写入失败时把计数合并回待写入队列"""
+        with self._lock:
+            for code, (n, called_at) in usages.items():
+                count, last = self._pending.get(code, (0, called_at))
+                self._pending[code] = (count + n, max(last, called_at))
+
+    async def flush(self) -> int:
+        """
+        把当前累计的使用次数写入数据库
+        :return: 写入的提示词数量
+        """
+        with self._lock:
+            usages, self._pending = self._pending, {}
+        if not usages:
+            return 0
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                await batch_increment_usage_count_async(db, usages)
+            return len(usages)
+        except Exception as e:
+            logger.error(f"提示词使用次数写入失败, 下个周期重试: {str(e)}")
+            self._merge_back(usages)
+            return 0
+
+    async def stop(self):
+        """写入剩余计数"""
+        cnt = await self.flush()
+        logger.info(f"提示词使用次数已写入, 共 {cnt} 个提示词")
+
+
+prompt_usage_aggregator = PromptUsageAggregator()
+
+
+async def stop_prompt_usage():
+    """在 FastAPI 关闭时写入剩余的使用次数"""
+    await prompt_usage_aggregator.stop()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.dao.sessionDao import batch_update_sessions_async
+from src.dao.sessionDetailDao import batch_insert_session_details_async
+from src.db.db import async_engine
+from src.pojo.po.sessionDetailPo import SessionDetail
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPersistConfig:
+    # 队列容量上限，超过后提交方等待 PUT_TIMEOUT 秒，仍满则直接同步落库
+    QUEUE_SIZE: int = int(os.getenv("SESSION_PERSIST_QUEUE_SIZE", 10000))
+    # 单批最多合并的记录数
+    BATCH_SIZE: int = int(os.getenv("SESSION_PERSIST_BATCH_SIZE", 200))
+    # 最长攒批时间（秒）
+    FLUSH_INTERVAL: float = float(os.getenv("SESSION_PERSIST_FLUSH_INTERVAL", 1.0))
+    # 队列已满时提交方的最长等待时间（秒）
+    PUT_TIMEOUT: float = float(os.getenv("SESSION_PERSIST_PUT_TIMEOUT", 0.5))
+    # 批量写入失败时的重试次数
+    MAX_RETRIES: int = int(os.getenv("SESSION_PERSIST_MAX_RETRIES", 3))
+
+
+# 队列元素: ("detail", 字段字典) 或 ("session", (会话ID, 更新字典))
+_DETAIL = "detail"
+_SESSION = "session"
+
+
+class SessionWriteBehindQueue:
+    """
+    会话记录的写后(write-behind)队列
+
+    - 对话过程中只把 SessionDetail 插入 / SessionPo 更新放入有界队列，不在请求链路上提交事务
+    - 后台任务按数量或时间阈值攒批，SessionDetail 以多行 INSERT 写入，同一会话的更新合并后写入
+    - 应用关闭时把队列中剩余的记录全部写完
+    """
+
+    def __init__(self, config: type[SessionPersistConfig] = SessionPersistConfig):
+        self._config = config
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self._config.QUEUE_SIZE)
+        self._worker = asyncio.create_task(self._run(), name="session-write-behind")
+        logger.info(f"会话写后队列已启动: queue_size={self._config.QUEUE_SIZE}, "
+                    f"batch_size={self._config.BATCH_SIZE}, flush_interval={self._config.FLUSH_INTERVAL}s")
+
+    async def stop(self):
+        """停止接收新记录，并把队列中剩余的记录全部落库"""
+        if not self.running:
+            return
+        self._closing = True
+        logger.info(f"会话写后队列关闭中，剩余待写入记录 {self._queue.qsize()} 条")
+        await self._worker
+        self._worker = None
+        logger.info("会话写后队列已关闭")
+
+    async def submit_detail(self, session_detail: SessionDetail):
+        """
+        提交一条待写入的会话详情
+        :param session_detail: 会话详情, 提交时即生成快照, 之后对该对象的修改不会被写入
+        """
+        session_detail.handle_dict()
+        session_detail.self_check()
+        await self._submit((_DETAIL, session_detail.model_dump()))
+
+    async def submit_session_update(self, session_id: str, update_data: Dict[str, Any]):
+        """
+        提交一条会话更新, 同一批次内同一会话的多次更新会合并
+        :param session_id: 会话ID
+        :param update_data: 要更新的字段
+        """
+        await self._submit((_SESSION, (session_id, dict(update_data))))
+
+    async def _submit(self, item: Tuple[str, Any]):
+        if not self.running or self._closing:
+            # 队列未启动(脚本调用)或正在关闭，直接同步写入，保证记录不丢
+            await self._write([item])
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=self._config.PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("会话写后队列已满，本条记录直接写入数据库")
+            await self._write([item])
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            if batch:
+                await self._write(batch)
+            if self._closing and self._queue.empty():
+                return
+
+    async def _collect_batch(self) -> List[Tuple[str, Any]]:
+        """取出一批记录, 达到 BATCH_SIZE 或等待超过 FLUSH_INTERVAL 即返回"""
+        batch: List[Tuple[str, Any]] = []
+        deadline = time.monotonic() + self._config.FLUSH_INTERVAL
+        while len(batch) < self._config.BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            if self._closing and self._queue.empty():
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=min(timeout, 0.2)))
+            except asyncio.TimeoutError:
+                continue
+        return batch
+
+    async def _write(self, batch: List[Tuple[str, Any]]):
+        details: List[Dict[str, Any]] = []
+        session_updates: Dict[str, Dict[str, Any]] = {}
+        for kind, payload in batch:
+            if kind == _DETAIL:
+                details.append(payload)
+            else:
+                session_id, update_data = payload
+                session_updates.setdefault(session_id, {}).update(update_data)
+
+        for attempt in range(1, self._config.MAX_RETRIES + 1):
+            try:
+                async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                    if session_updates:
+                        await batch_update_sessions_async(db, session_updates)
+                        session_updates = {}
+                    if details:
+                        await batch_insert_session_details_async(db, details)
+                        details = []
+                return
+            except Exception as e:
+                logger.error(f"会话记录批量写入失败(第{attempt}次): {str(e)}")
+                if attempt < self._config.MAX_RETRIES:
+                    await asyncio.sleep(min(2 ** attempt, 10))
+
+        logger.critical(f"会话记录批量写入达到最大重试次数，丢弃 {len(details)} 条会话详情、"
+                        f"{len(session_updates)} 条会话更新, 会话详情ID: {[d.get('id') for d in details]}")
+
+
+session_write_behind = SessionWriteBehindQueue()
+
+
+async def start_session_persist():
+    """在 FastAPI 启动时启动会话写后队列"""
+    await session_write_behind.start()
+
+
+async def stop_session_persist():
+    """在 FastAPI 关闭时把剩余记录写完"""
+    await session_write_behind.stop()
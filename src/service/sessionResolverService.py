@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.dao.sessionDao import create_session_async, get_recent_sessions_async
+from src.dao.sessionDetailDao import count_session_details_async
+from src.pojo.bo.sessionBo import ActiveSession
+from src.pojo.po.sessionPo import SessionPo
+from src.utils.cacheUtils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SessionResolverConfig:
+    # 单个会话的最大对话轮数, 超过后创建新会话
+    SESSION_MAX_NUM: int = int(os.getenv("SESSION_MAX_NUM", 50))
+    # 缓存的用户数上限
+    CACHE_SIZE: int = int(os.getenv("SESSION_RESOLVER_CACHE_SIZE", 10000))
+    # 缓存过期时间（秒）, 过期后重新查库校准轮数
+    CACHE_TTL: float = float(os.getenv("SESSION_RESOLVER_CACHE_TTL", 1800))
+    # 按用户分段加锁的锁数量
+    LOCK_STRIPES: int = 64
+
+
+class SessionResolver:
+    """
+    用户当前会话解析器
+
+    - 在内存中记录每个用户当前使用的会话和对话轮数, 命中时不查库
+    - 每提交一条会话详情轮数加一, 达到 SESSION_MAX_NUM 时创建新会话
+    - 未命中(首次访问、淘汰或过期)时才查询最近会话并 COUNT 详情数
+    - 同一用户的解析按分段锁串行, 避免并发请求同时创建多个新会话
+    """
+
+    def __init__(self, config: type[SessionResolverConfig] = SessionResolverConfig):
+        self._config = config
+        # user_id -> ActiveSession
+        self._active: TTLCache[str, ActiveSession] = TTLCache(max_size=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+        # session_id -> user_id, 按会话ID失效时使用
+        self._owners: TTLCache[str, str] = TTLCache(max_size=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+        self._locks = [asyncio.Lock() for _ in range(config.LOCK_STRIPES)]
+
+    def _lock_for(self, user_id: Optional[str]) -> asyncio.Lock:
+        return self._locks[hash(user_id) % len(self._locks)]
+
+    def _remember(self, user_id: Optional[str], state: ActiveSession):
+        self._active.set(user_id, state)
+        self._owners.set(state.session.id, user_id)
+
+    @staticmethod
+    async def _load(session: AsyncSession, user_id: Optional[str]) -> Optional[ActiveSession]:
+        """缓存未命中时查库获取用户最近的会话及其轮数"""
+        session_list = await get_recent_sessions_async(session, user_id, limit=1)
+        if not session_list:
+            return None
+        ai_session = session_list[0]
+        cnt = await count_session_details_async(session=session, session_id=ai_session.id)
+        return ActiveSession(session=SessionPo.model_validate(ai_session.model_dump()), turns=cnt)
+
+    async def resolve(self, session: AsyncSession, user_id: str = None, token: str = None) -> SessionPo:
+        """
+        获取用户当前会话, 没有或轮数已满时创建新会话
+        返回的会话对象由缓存持有, 调用方对 dify_conversation_id 的赋值会同步到缓存
+        :param session: db
+        :param user_id: 用户ID
+        :param token: token
+        :return: 当前会话
+        """
+        async with self._lock_for(user_id):
+            state = self._active.get(user_id)
+            if state is None:
+                state = await self._load(session, user_id)
+            if state is None or state.turns >= self._config.SESSION_MAX_NUM:
+                session_model = SessionPo.get_default()
+                session_model.user_id = user_id
+                session_model.token = token
+                created = await create_session_async(session, session_model)
+                state = ActiveSession(session=SessionPo.model_validate(created.model_dump()), turns=0)
+            self._remember(user_id, state)
+            return state.session
+
+    def record_turn(self, user_id: Optional[str], session_id: str):
+        """
+        会话详情提交落库后调用, 当前会话轮数加一
+        :param user_id: 用户ID
+        :param session_id: 会话详情所属的会话ID
+        """
+        state = self._active.get(user_id)
+        if state is not None and state.session.id == session_id:
+            state.turns += 1
+
+    def invalidate_user(self, user_id: Optional[str]):
+        """清除指定用户的缓存, 下次解析时重新查库"""
+        state = self._active.pop(user_id)
+        if state is not None:
+            self._owners.pop(state.session.id)
+
+    def invalidate_session(self, session_id: str):
+        """会话被修改或删除后调用, 清除持有该会话的用户缓存"""
+        user_id = self._owners.pop(session_id)
+        if user_id is not None:
+            self._active.pop(user_id)
+
+
+session_resolver = SessionResolver()
@@ -2,15 +2,18 @@ import os
 from datetime import datetime
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional, Dict, Any, List
 
-from src.dao.sessionDao import create_session, get_recent_sessions, get_session_by_id, update_session
-from src.dao.sessionDetailDao import get_session_details_by_session_id, create_session_detail, count_session_details
-from src.db.db import engine
+from src.dao.sessionDao import create_session, get_recent_sessions, get_session_by_id, update_session, \
+    create_session_async
+from src.dao.sessionDetailDao import get_session_details_by_session_id, count_session_details
 from src.exception.aiException import AIException
 from src.pojo.po.sessionDetailPo import SessionDetail, DialogCarrierEnum
 from src.pojo.po.sessionPo import SessionPo as SessionModel, SessionInfo, SessionPo
 from src.pojo.vo.difyResponse import DifyResponse
+from src.service.sessionPersistService import session_write_behind
+from src.service.sessionResolverService import session_resolver
 
 
 def create_session_default(session: Session,user_id: str = None , token: str = None):
@@ -46,6 +49,42 @@ def get_user_last_session(session: Session,user_id: str = None , token: str = No
     return create_session_default(session,user_id,token)
 
 
+async def create_session_default_async(session: AsyncSession,user_id: str = None , token: str = None):
+    """
+    默认的方式创建session(异步)
+    :param session: db
+    :param user_id: 用户ID
+    :param token: token
+    :return: 回显
+    """
+    session_model = SessionModel.get_default()
+    session_model.user_id = user_id
+    session_model.token = token
+    return await create_session_async(session,session_model)
+
+
+async def get_user_last_session_async(session: AsyncSession,user_id: str = None , token: str = None):
+    """
+    获取用户最近一次的会话(异步)，如果没有或者最近一次会话轮数大于50 创建一个新会话
+    用户当前会话和轮数缓存在内存中，只有未命中时才查库
+    :param session: db
+    :param user_id: 用户ID
+    :param token: token
+    :return: 回显
+    """
+    return await session_resolver.resolve(session, user_id, token)
+
+
+async def submit_session_detail(ai_session_detail: SessionDetail, user_id: Optional[str]):
+    """
+    会话详情交给写后队列异步落库，并累加当前会话的轮数
+    :param ai_session_detail: 会话详情记录
+    :param user_id: 用户ID, 会话详情表没有用户字段, 需调用方传入
+    """
+    await session_write_behind.submit_detail(ai_session_detail)
+    session_resolver.record_turn(user_id, ai_session_detail.session_id)
+
+
 
 def when_search_session(session: Session,session_id: str) -> Optional[SessionInfo]:
     """
@@ -65,47 +104,43 @@ def when_search_session(session: Session,session_id: str) -> Optional[SessionInf
 
 
 
-def dify_stream_handle(conversation_id: str,
+async def dify_stream_handle(conversation_id: str,
                        result,
                        ai_session: SessionPo = None,
                        ai_session_detail: SessionDetail = None,
                        ):
     """
-    处理Dify的流式数据
+    处理Dify的流式数据, 会话和会话详情交给写后队列异步落库
     :param conversation_id: 会话ID
     :param result: 返回结果
     :param ai_session:  会话记录
     :param ai_session_detail: 会话详情记录
     :return:
     """
-    with Session(engine) as session:
-        if ai_session:
-            if not ai_session.dify_conversation_id:
-                update_session(session,session_id=ai_session.id,update_data={'conversation_id':conversation_id})
-        if ai_session_detail:
-            if isinstance(result, DifyResponse) and 'dify error' in str(result.data):
-                ai_session_detail.when_error(result)
-            else:
-                ai_session_detail.when_success(result, result)
-            create_session_detail(session=session, session_detail=ai_session_detail)
+    if ai_session:
+        if not ai_session.dify_conversation_id and conversation_id:
+            ai_session.dify_conversation_id = conversation_id
+            await session_write_behind.submit_session_update(ai_session.id, {'dify_conversation_id': conversation_id})
+    if ai_session_detail:
+        if isinstance(result, DifyResponse) and 'dify error' in str(result.data):
+            ai_session_detail.when_error(result)
+        else:
+            ai_session_detail.when_success(result, result)
+        await submit_session_detail(ai_session_detail, ai_session.user_id if ai_session else None)
 
 async def session_handle(ai_session,ai_session_detail,dify_response: dict,result):
     """
-     session 的持久化处理 阻塞模式 4 dify
+     session 的持久化处理 阻塞模式 4 dify, 会话和会话详情交给写后队列异步落库
     :return:
     """
-    with Session(engine) as db:
-        if ai_session.dify_conversation_id is None:
-            # 获取到Dify的会话ID并持久化到本系统的会话表中
-            ai_session.dify_conversation_id = dify_response.get("conversation_id")
-            update_session(session=db, session_id=ai_session.id, update_data=ai_session.dict())
-        if isinstance(result,DifyResponse) and 'dify error' in str(result.data):
-            ai_session_detail.when_error(result)
-        else :
-            ai_session_detail.when_success(dify_response, result)
-        # 对话载体类型为 DIFY_ERP
-        ai_session_detail.dialog_carrier = DialogCarrierEnum.DIFY_ERP.value
-        create_session_detail(session=db, session_detail=ai_session_detail)
-        db.commit()
-
-
+    if ai_session.dify_conversation_id is None:
+        # 获取到Dify的会话ID并持久化到本系统的会话表中
+        ai_session.dify_conversation_id = dify_response.get("conversation_id")
+        await session_write_behind.submit_session_update(ai_session.id, {'dify_conversation_id': ai_session.dify_conversation_id})
+    if isinstance(result,DifyResponse) and 'dify error' in str(result.data):
+        ai_session_detail.when_error(result)
+    else :
+        ai_session_detail.when_success(dify_response, result)
+    # 对话载体类型为 DIFY_ERP
+    ai_session_detail.dialog_carrier = DialogCarrierEnum.DIFY_ERP.value
+    await submit_session_detail(ai_session_detail, ai_session.user_id)
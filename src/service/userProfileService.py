@@ -1,17 +1,21 @@
 import logging
+from contextlib import nullcontext
 from datetime import datetime
+from typing import AsyncContextManager, Callable, Optional
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.ai.aiService import do_api_2_llm
 from src.ai.pojo.promptBo import PromptContent
 from src.common.enum.codeEnum import CodeEnum
 from src.dao.userProfileDao import get_profile_by_user_id, create_user_profile, update_user_profile, \
-    get_all_user_profiles
+    get_profile_by_user_id_async, create_user_profile_async
 from src.db.db import engine
 from src.pojo.bo.aiBo import ModelConfig
 from src.pojo.po.promptPo import PromptCodeEnum
 from src.pojo.po.userProfilePo import UserProfile
 from src.service.aiCodeService import get_code_4_prompt
 from src.service.commonService import get_question_recommend_by_profile
+from src.service.knownUserService import known_users
 from src.service.promptService import get_prompt_by_code_service
 from src.service.sessionDetailService import get_history_qa_by_user_id, histories_2_simple_qa, get_history_normal
 import asyncio
@@ -28,55 +32,105 @@ def check_new_user(session: Session,user_id: str, user_source: str):
     :param user_source:用户来源
     :return:
     """
+    if user_id in known_users:
+        return None
     profile = get_profile_by_user_id(session=session, user_id= user_id)
     if profile is not None:
+        known_users.add(user_id)
         return None
 
     profile_new = UserProfile.get_profile(user_id=user_id, source=user_source)
-    return create_user_profile(session=session, user_profile= profile_new)
+    created = create_user_profile(session=session, user_profile= profile_new)
+    known_users.add(user_id)
+    return created
 
-async def analysis_all():
-    profiles = []
-    with Session(engine) as session:
-        profiles = get_all_user_profiles(session=session)
+async def check_new_user_async(session: AsyncSession,user_id: str, user_source: str):
+    """
+    检查是否为用户画像中不存在的新用户(异步)， if true, save |else None
+    :param session:
+    :param user_id: 用户ID
+    :param user_source:用户来源
+    :return:
+    """
+    # 绝大多数请求来自老用户, 命中已知用户集合时不查库
+    if user_id in known_users:
+        return None
+    profile = await get_profile_by_user_id_async(session=session, user_id= user_id)
+    if profile is not None:
+        known_users.add(user_id)
+        return None
 
-    for i in range(0, len(profiles), 4):
-        chunk = profiles[i:i + 4]
-        # 并发处理当前分块内的所有 profile
-        await asyncio.gather(*[analysis_by_user(profile) for profile in chunk])
+    profile_new = UserProfile.get_profile(user_id=user_id, source=user_source)
+    created = await create_user_profile_async(session=session, user_profile= profile_new)
+    known_users.add(user_id)
+    return created
 
+# 用户画像分析使用的模型
+ANALYSIS_MODEL = 'deepseek-reasoner'
+# 偏好问题推荐使用的模型(ModelConfig 默认模型)
+RECOMMEND_MODEL = 'deepseek-chat'
 
 
+def has_new_turns(profile: UserProfile, latest_turn_at: Optional[datetime]) -> bool:
+    """
+    上次分析之后用户是否有新的对话
+    :param profile: 用户画像
+    :param latest_turn_at: 用户最近一次成功对话的时间
+    :return:
+    """
+    if latest_turn_at is None:
+        return False
+    return profile.last_handle_time is None or latest_turn_at > profile.last_handle_time
+
 
-async def analysis_by_user(profile: UserProfile):
+async def analysis_by_user(profile: UserProfile, llm_slot: Optional[Callable[[str], AsyncContextManager]] = None,
+                           latest_turn_at: Optional[datetime] = None):
     """
-    基于用户开始进行完整的用户画像分析
+    基于用户开始进行完整的用户画像分析, 三项分析并发执行, 各自使用独立的数据库会话
+    没有新对话的用户直接跳过, 不调用LLM
+    同步的数据库操作都通过 asyncio.to_thread 放到线程池执行, 夜间分析不阻塞接口所在的事件循环
     :param profile: 用户画像
+    :param llm_slot: 按模型返回并发限制的异步上下文(如供应商信号量), 为空不限制
+    :param latest_turn_at: 用户最近一次成功对话的时间, 分析完成后记为新的水位线
     :return:
     """
     logger.info(f"【用户画像分析】:对用户{profile.user_id}的分析开始")
+    histories = await asyncio.to_thread(_load_new_histories, profile, latest_turn_at)
+    if not histories:
+        logger.info(f"【用户画像分析】:该用户({profile.user_id})暂无新的未分析对话,本次分析过程跳过.")
+        return
+
+    async def run(name: str, model: str, analysis, **kwargs):
+        try:
+            async with (llm_slot(model) if llm_slot else nullcontext()):
+                with Session(engine) as db:
+                    await analysis(session=db, profile=profile, **kwargs)
+        except Exception as e:
+            logger.error(f"【用户画像分析】【{name}】:用户({profile.user_id})分析发生异常\n{e}")
+
+    await asyncio.gather(run("语言风格", ANALYSIS_MODEL, analysis_language_style, histories=histories),
+                         run("偏好问题", RECOMMEND_MODEL, analysis_preference_questions),
+                         run("性格特征", ANALYSIS_MODEL, analysis_personality_traits, histories=histories))
+
+    update_data = {'last_handle_session_id': histories[0]['id'], 'update_time': datetime.now()}
+    if latest_turn_at is not None:
+        update_data['last_handle_time'] = latest_turn_at
+    await asyncio.to_thread(_update_profile, profile.id, update_data)
+
+
+def _load_new_histories(profile: UserProfile, latest_turn_at: Optional[datetime]) -> list:
+    """读取未分析的历史对话(在线程池中执行), 没有新对话时只推进水位线"""
     with Session(engine) as session:
         histories = get_history_qa_by_user_id(session=session, user_id=profile.user_id,
                                               last_handle_session_id=profile.last_handle_session_id)
-        try:
-            await analysis_language_style(session=session,profile=profile,histories=histories)
-        except Exception as e:
-            logger.error(f"【用户画像分析】【语言风格】:用户({profile.user_id})分析发生异常\n{e}")
-        try:
-            await analysis_preference_questions(session=session,profile=profile)
-        except Exception as e:
-            logger.error(f"【用户画像分析】【偏好问题】:用户({profile.user_id})分析发生异常\n{e}")
-        try:
-            await analysis_personality_traits(session=session,profile=profile,histories=histories)
-        except Exception as e:
-            logger.error(f"【用户画像分析】【性格特征】:用户({profile.user_id})分析发生异常\n{e}")
+        if not histories and latest_turn_at is not None:
+            update_user_profile(session=session, profile_id=profile.id, update_data={'last_handle_time': latest_turn_at})
+        return histories
 
-        if histories:
-            update_user_profile(session=session, profile_id=profile.id, update_data={
-                                                                                     'last_handle_session_id':histories[0]['id'],
-                                                                                     'update_time': datetime.now()})
-        else:
-            print()
+
+def _update_profile(profile_id: str, update_data: dict):
+    with Session(engine) as session:
+        update_user_profile(session=session, profile_id=profile_id, update_data=update_data)
 
 
 
@@ -89,8 +143,8 @@ async def analysis_language_style(session: Session,profile: UserProfile,historie
     :return:
     """
     if histories is None:
-        histories = get_history_qa_by_user_id(session=session, user_id=profile.user_id,
-                                              last_handle_session_id=profile.last_handle_session_id)
+        histories = await asyncio.to_thread(get_history_qa_by_user_id, session=session, user_id=profile.user_id,
+                                            last_handle_session_id=profile.last_handle_session_id)
     # todo 后期加循环，一次处理完所有未处理的对话。目前prompt限制  limit 50 once
     user_prompt = "结合AI之前对我总结的语言风格,以及我与AI新的历史问答记录,再次生成一份新的语言风格总结。以下是旧的语言风格总结内容:"
     if not histories :
@@ -98,13 +152,15 @@ async def analysis_language_style(session: Session,profile: UserProfile,historie
         return
     histories = histories_2_simple_qa(histories=histories)
     variable = {'user_info':profile.user_info,'histories':histories}
-    prompt = get_code_4_prompt(session=session, code_value=CodeEnum.UP_LANGUAGE_STYLE_ANALYSIS_PROMPT_CODE.value, variable=variable)
+    prompt = await asyncio.to_thread(get_code_4_prompt, session=session,
+                                     code_value=CodeEnum.UP_LANGUAGE_STYLE_ANALYSIS_PROMPT_CODE.value, variable=variable)
     messages = [PromptContent.as_system(prompt),
                 PromptContent.as_user(user_prompt + nvl(profile.language_style,""))]
-    result =await  do_api_2_llm(ModelConfig(model='deepseek-reasoner',messages=messages,stream=False))
-    update_user_profile(session=session, profile_id=profile.id, update_data={'language_style':result,
-                                                                             # 'last_handle_session_id':profile.last_handle_session_id,
-                                                                             'update_time':datetime.now()})
+    result =await  do_api_2_llm(ModelConfig(model=ANALYSIS_MODEL,messages=messages,stream=False))
+    await asyncio.to_thread(update_user_profile, session=session, profile_id=profile.id,
+                            update_data={'language_style':result,
+                                         # 'last_handle_session_id':profile.last_handle_session_id,
+                                         'update_time':datetime.now()})
     logger.info(f"【用户画像分析】【语言风格】:用户({profile.user_id})分析完成")
 
 
@@ -113,17 +169,20 @@ async def analysis_preference_questions(session: Session,profile: UserProfile):
     if not questions:
         logger.info(f"【用户画像分析】【偏好问题】:该用户({profile.user_id})暂无新的未分析对话,本次分析过程跳过.")
         return
-    update_user_profile(session=session, profile_id=profile.id, update_data={'preference_questions':questions})
+    await asyncio.to_thread(update_user_profile, session=session, profile_id=profile.id,
+                            update_data={'preference_questions':questions})
     logger.info(f"【用户画像分析】【偏好问题】:用户({profile.user_id})分析完成")
 
 
 async def analysis_personality_traits(session: Session,profile: UserProfile,histories: list = None):
     if histories is None:
-        histories = get_history_qa_by_user_id(session=session, user_id=profile.user_id,
-                                              last_handle_session_id=profile.last_handle_session_id)
-    prompt = get_prompt_by_code_service(session=session, code=PromptCodeEnum.PERSONALITY_TRAITS_PROMPT.value)
+        histories = await asyncio.to_thread(get_history_qa_by_user_id, session=session, user_id=profile.user_id,
+                                            last_handle_session_id=profile.last_handle_session_id)
+    prompt = await asyncio.to_thread(get_prompt_by_code_service, session=session,
+                                     code=PromptCodeEnum.PERSONALITY_TRAITS_PROMPT.value)
     messages = prompt.get_messages(variable={**profile.model_dump(),'histories':histories})
-    result = await do_api_2_llm(ModelConfig(model='deepseek-reasoner', messages=messages, stream=False))
-    update_user_profile(session=session, profile_id=profile.id,update_data={'personality_traits':result})
+    result = await do_api_2_llm(ModelConfig(model=ANALYSIS_MODEL, messages=messages, stream=False))
+    await asyncio.to_thread(update_user_profile, session=session, profile_id=profile.id,
+                            update_data={'personality_traits':result})
     logger.info(f"【用户画像分析】【性格特征】:用户({profile.user_id})分析完成")
 
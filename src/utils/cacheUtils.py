@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    进程内 TTL + LRU 缓存
+
+    - 每个条目有过期时间，过期后读取视为未命中
+    - 超过容量时淘汰最久未访问的条目
+    - 加锁保护，可同时被事件循环和线程池中的同步代码使用
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        """
+        :param max_size: 最大条目数
+        :param ttl: 默认过期时间（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        读取缓存，未命中或已过期返回 default
+        :param key: 键
+        :param default: 默认值
+        :return: 缓存值
+        """
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expire_at, value = item
+            if expire_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        """
+        写入缓存
+        :param key: 键
+        :param value: 值
+        :param ttl: 本条目的过期时间（秒），不传使用默认值
+        """
+        expire_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expire_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key: K, loader: Callable[[], V], ttl: Optional[float] = None) -> V:
+        """
+        读取缓存，未命中时调用 loader 加载并写入（loader 返回 None 时不缓存）
+        :param key: 键
+        :param loader: 加载函数
+        :param ttl: 过期时间（秒）
+        :return: 缓存值
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def pop(self, key: K) -> Optional[V]:
+        """删除指定键，返回被删除的值"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else None
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """缓存统计信息"""
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
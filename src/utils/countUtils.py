@@ -0,0 +1,121 @@
+import logging
+import os
+from typing import Hashable, Optional, Tuple
+
+from sqlalchemy import Select, column, func, table
+from sqlalchemy.engine import Dialect
+from sqlmodel import Session, SQLModel, select
+
+from src.utils.cacheUtils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CountConfig:
+    # 是否缓存统计结果
+    CACHE_ENABLED: bool = os.getenv("COUNT_CACHE_ENABLED", "true").lower() == "true"
+    # 统计结果缓存时间（秒）, 管理后台频繁轮询, 允许短时间不准
+    CACHE_TTL: float = float(os.getenv("COUNT_CACHE_TTL", 10))
+    # 最多缓存的统计条件数
+    CACHE_SIZE: int = int(os.getenv("COUNT_CACHE_SIZE", 1024))
+    # 无条件统计全表时, information_schema 估算行数超过该值直接返回估算值, 0 表示不使用估算
+    ESTIMATE_THRESHOLD: int = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", 100000))
+
+
+# information_schema.TABLES 中 InnoDB 的估算行数
+_information_tables = table("TABLES", column("TABLE_SCHEMA"), column("TABLE_NAME"), column("TABLE_ROWS"),
+                            schema="information_schema")
+
+
+class CountCache:
+    """
+    统计数量
+
+    - 统计语句全部是 SELECT COUNT(*), 不把行读回应用
+    - 结果按 SQL + 参数缓存 CACHE_TTL 秒, 相同条件的重复轮询不访问数据库
+    - 无条件统计大表时用 information_schema 的估算行数(InnoDB 误差可达 40%), 小表仍精确统计
+    """
+
+    def __init__(self, config: type[CountConfig] = CountConfig):
+        self._config = config
+        self._cache: TTLCache[Hashable, int] = TTLCache(max_size=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+
+    @staticmethod
+    def _signature(statement: Select, dialect: Dialect) -> Tuple:
+        # 必须用实际数据库的方言编译, 通用方言无法编译 MySQL 的 MATCH 等方言专有语法
+        compiled = statement.compile(dialect=dialect)
+        return str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items()))
+
+    def _cached(self, key: Hashable, loader) -> int:
+        if not self._config.CACHE_ENABLED:
+            return loader()
+        return self._cache.get_or_load(key, loader)
+
+    def count(self, session: Session, statement: Select) -> int:
+        """
+        执行 COUNT 语句(select(func.count())...), 结果按语句缓存
+        :param session: 数据库会话
+        :param statement: COUNT 语句
+        :return: 数量
+        """
+        def load() -> int:
+            return session.exec(statement).one()
+
+        if not self._config.CACHE_ENABLED:
+            return load()
+        try:
+            key = self._signature(statement, session.get_bind().dialect)
+        except Exception as e:
+            logger.warning(f"统计语句无法生成缓存键, 本次不缓存: {str(e)}")
+            return load()
+        return self._cached(key, load)
+
+    def count_query(self, session: Session, query: Select) -> int:
+        """
+        统计任意查询的结果行数, 去掉排序后作为子查询 COUNT
+        :param session: 数据库会话
+        :param query: 查询
+        :return: 数量
+        """
+        return self.count(session, select(func.count()).select_from(query.order_by(None).subquery()))
+
+    def estimate_rows(self, session: Session, table_name: str) -> Optional[int]:
+        """
+        information_schema 中的估算行数, 查不到时返回 None
+        """
+        statement = select(_information_tables.c.TABLE_ROWS).where(
+            _information_tables.c.TABLE_SCHEMA == func.database(),
+            _information_tables.c.TABLE_NAME == table_name
+        )
+
+        def load():
+            try:
+                return session.exec(statement).first()
+            except Exception as e:
+                logger.warning(f"读取表{table_name}的估算行数失败: {str(e)}")
+                return None
+
+        rows = self._cached(("estimate", table_name), load)
+        return int(rows) if rows is not None else None
+
+    def count_table(self, session: Session, model_class: type[SQLModel]) -> int:
+        """
+        统计全表行数, 估算超过 ESTIMATE_THRESHOLD 时返回估算值
+        :param session: 数据库会话
+        :param model_class: 模型类
+        :return: 数量
+        """
+        if self._config.ESTIMATE_THRESHOLD > 0:
+            estimate = self.estimate_rows(session, model_class.__tablename__)
+            if estimate is not None and estimate >= self._config.ESTIMATE_THRESHOLD:
+                return estimate
+        return self.count(session, select(func.count()).select_from(model_class))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+count_cache = CountCache()
@@ -44,6 +44,14 @@ def get_now_4_prompt() -> str:
     """
     return f"(当前日期：{datetime.now()}) "
 
+
+def get_today_4_prompt() -> str:
+    """
+     用于提示词的当前日期(精确到天), 同一天内生成的提示词相同, 便于缓存LLM结果
+    :return:
+    """
+    return f"(当前日期：{datetime.now().date()}) "
+
 # 示例用法
 if __name__ == "__main__":
     # 示例：2025-06-01 00:00:00 UTC+8
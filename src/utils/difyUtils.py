@@ -1,34 +1,149 @@
 import json
+import logging
+import os
+from typing import AsyncGenerator, List, Optional
 
+logger = logging.getLogger(__name__)
 
-def get_value_from_stream_response_by_key(response: str, key: str) -> str:
+# 单个SSE事件的最大字节数, 超过后丢弃该事件, 防止异常响应撑爆内存
+SSE_MAX_EVENT_SIZE = int(os.getenv("DIFY_SSE_MAX_EVENT_SIZE", 16 * 1024 * 1024))
+
+
+class SSEEvent:
     """
-    从SSE流式响应中提取指定key的值
-    :param response: 原始SSE响应字符串
-    :param key: 需要提取的key
-    :return:
+    一个完整的SSE事件, data 为json时已解析为 payload(只解析一次)
     """
-    # 1. 提取JSON部分（去掉"data: "前缀，如果存在）
-    json_str = response[6:].strip() if response.startswith("data: ") else response.strip()
-    # 2. 验证并解析JSON
-    try:
-        json_data = json.loads(json_str)
-    except json.JSONDecodeError:
-        return ""  # 无效JSON直接返回空
+    __slots__ = ("event", "data", "payload")
+
+    def __init__(self, event: Optional[str], data: str, payload: Optional[dict]):
+        self.event = event
+        self.data = data
+        self.payload = payload
 
-    # 3. 提取answer字段（如果存在）
-    return json_data.get(key, "")
+    def get(self, key: str, default=None):
+        """从解析后的 payload 中取值, data 不是json对象时返回 default"""
+        if not isinstance(self.payload, dict):
+            return default
+        return self.payload.get(key, default)
 
 
-def dify_stream_response_handler(response: str) -> str:
+class SSEDecoder:
     """
-    处理Dify的SSE流式响应，提取有效的answer字段内容。
+    增量SSE解析器
+
+    - 按字节缓冲, 不受网络分块边界影响, 也不受 aiohttp 按行读取的长度限制
+    - 按 SSE 规范以空行作为事件边界, 多个 data 行合并为一个事件
+    - 每个事件的 data 只做一次 json 解析
     """
-    return get_value_from_stream_response_by_key(response, "answer")
+
+    def __init__(self, max_event_size: int = SSE_MAX_EVENT_SIZE):
+        self._max_event_size = max_event_size
+        self._buffer = bytearray()
+        self._event: Optional[str] = None
+        self._data_lines: List[str] = []
+        self._event_size = 0
+        self._discarding = False
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """
+        输入一块原始字节, 返回其中已完整的事件
+        :param chunk: 网络读取到的字节块
+        :return: 完整的事件列表
+        """
+        idx = chunk.rfind(b"\n")
+        if idx < 0:
+            self._buffer.extend(chunk)
+            self._check_size()
+            return []
+        lines = (bytes(self._buffer) + chunk[:idx]).split(b"\n")
+        self._buffer = bytearray(chunk[idx + 1:])
+        events = []
+        for line in lines:
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def close(self) -> List[SSEEvent]:
+        """
+        流结束时调用, 处理缓冲区中剩余的数据
+        :return: 最后一个未以空行结束的事件
+        """
+        events = []
+        if self._buffer:
+            line, self._buffer = bytes(self._buffer), bytearray()
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _check_size(self):
+        if self._discarding:
+            self._buffer = bytearray()
+        elif len(self._buffer) + self._event_size > self._max_event_size:
+            logger.warning(f"SSE事件超过 {self._max_event_size} 字节, 丢弃该事件")
+            self._buffer = bytearray()
+            self._reset()
+            self._discarding = True
+
+    def _reset(self):
+        self._event = None
+        self._data_lines = []
+        self._event_size = 0
+
+    def _process_line(self, line: bytes) -> Optional[SSEEvent]:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if not line:
+            if self._discarding:
+                self._discarding = False
+                self._reset()
+                return None
+            return self._dispatch()
+        if self._discarding or line.startswith(b":"):
+            return None
+        field, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+        if field == b"data":
+            self._data_lines.append(value.decode("utf-8", errors="replace"))
+            self._event_size += len(value)
+            if self._event_size > self._max_event_size:
+                logger.warning(f"SSE事件超过 {self._max_event_size} 字节, 丢弃该事件")
+                self._reset()
+                self._discarding = True
+        elif field == b"event":
+            self._event = value.decode("utf-8", errors="replace")
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data_lines:
+            self._reset()
+            return None
+        data = "\n".join(self._data_lines)
+        payload = None
+        if data[:1] in ("{", "["):
+            try:
+                payload = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning(f"SSE事件的data不是合法json: {data[:200]}")
+        event = SSEEvent(self._event, data, payload)
+        self._reset()
+        return event
 
 
-def dify_get_conversation_id_from_stream(response: str) -> str:
+async def iter_sse_events(stream) -> AsyncGenerator[SSEEvent, None]:
     """
-    从SSE流式响应中提取conversation_id字段
+    从 aiohttp 的响应流中逐个读取完整的SSE事件
+    :param stream: aiohttp 响应的 response.content(StreamReader)
+    :return: SSE事件
     """
-    return get_value_from_stream_response_by_key(response, "conversation_id")
\ No newline at end of file
+    decoder = SSEDecoder()
+    async for chunk in stream.iter_any():
+        for event in decoder.feed(chunk):
+            yield event
+    for event in decoder.close():
+        yield event
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.mysql import match
+from sqlmodel import SQLModel
+
+
+class FulltextConfig:
+    # 是否使用 MySQL FULLTEXT 索引, 默认关闭(只用 like). 开启前需要:
+    # 1. 执行 ddl.sql 中的 ALTER TABLE ... ADD FULLTEXT INDEX, 否则查询报 Can't find FULLTEXT index
+    # 2. 服务端设置 innodb_ft_enable_stopword=OFF 后再建索引, 否则停用词(is、in 等)及包含停用词的 ngram 匹配不到, 结果比 like 少
+    ENABLED: bool = os.getenv("FULLTEXT_SEARCH_ENABLED", "false").lower() == "true"
+    # 与 MySQL 的 ngram_token_size 保持一致, 短于该长度的词无法通过索引匹配, 退回 like
+    NGRAM_TOKEN_SIZE: int = int(os.getenv("FULLTEXT_NGRAM_TOKEN_SIZE", 2))
+
+
+# 布尔模式中有特殊含义的字符
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def split_terms(keyword: Optional[str]) -> List[str]:
+    """按空白切分关键词, 去掉布尔模式的运算符"""
+    return [term for term in _BOOLEAN_OPERATORS.sub(" ", keyword or "").split() if term]
+
+
+def boolean_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    生成布尔模式的查询串, 每个词作为短语且必须出现: +"词1" +"词2"
+    :return: 有词短于 NGRAM_TOKEN_SIZE 或没有词时返回 None, 由调用方退回 like
+    """
+    if not terms or any(len(term) < FulltextConfig.NGRAM_TOKEN_SIZE for term in terms):
+        return None
+    return " ".join(f'+"{term}"' for term in terms)
+
+
+def fulltext_columns(model_class: type[SQLModel]) -> list:
+    """模型 FULLTEXT 索引的列, 顺序与索引定义一致(MATCH 的列必须与索引完全相同)"""
+    return [getattr(model_class, field) for field in getattr(model_class, "fulltext_search_fields", [])]
+
+
+def fulltext_match(model_class: type[SQLModel], query: str):
+    """MATCH(索引列) AGAINST(query IN BOOLEAN MODE), 既可作条件也可作相关度"""
+    return match(*fulltext_columns(model_class), against=query).in_boolean_mode()
+
+
+def text_search_condition(model_class: type[SQLModel], field: str, value: str):
+    """
+    文本字段的模糊查询条件
+
+    字段在模型的 fulltext_search_fields 中且关键词够长时, 先用 FULLTEXT 索引缩小范围, 再对候选行执行原来的 like,
+    结果与单独 like 一致, 但不再扫全表; 其它情况直接 like
+    :param model_class: 模型类
+    :param field: 字段名
+    :param value: 关键词
+    :return: 查询条件
+    """
+    column = getattr(model_class, field)
+    condition = column.like(f"%{value}%")
+    if not FulltextConfig.ENABLED or field not in getattr(model_class, "fulltext_search_fields", []):
+        return condition
+    query = boolean_query(split_terms(value))
+    if query is None:
+        return condition
+    return and_(fulltext_match(model_class, query), condition)
+
+
+def keyword_condition(model_class: type[SQLModel], terms: Sequence[str], fields: Sequence[str]):
+    """每个词至少出现在 fields 的一个字段中(like)"""
+    return and_(*[or_(*[getattr(model_class, field).like(f"%{term}%") for field in fields]) for term in terms])
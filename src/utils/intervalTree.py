@@ -0,0 +1,170 @@
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from src.utils.cacheUtils import TTLCache
+
+T = TypeVar('T')
+
+
+class IntervalTree(Generic[T]):
+    """
+    静态区间树(闭区间)
+
+    - 区间按开始值排序存成数组, 数组本身看作一棵隐式平衡二叉树(区间中点为根), 每个节点记录子树内最大的结束值
+    - 查询先二分排除开始值大于查询结束值的区间, 再跳过最大结束值小于查询开始值的子树, 复杂度 O(log n + k)
+    - 构建后不可修改, 数据变化时重新构建
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, T]]):
+        """
+        :param intervals: (开始, 结束, 值), 开始不大于结束
+        """
+        self._intervals = sorted(intervals, key=lambda item: item[0])
+        self._starts = [item[0] for item in self._intervals]
+        self._max_end: List[Any] = [None] * len(self._intervals)
+        if self._intervals:
+            self._build(0, len(self._intervals))
+
+    def _build(self, lo: int, hi: int) -> Any:
+        mid = (lo + hi) // 2
+        max_end = self._intervals[mid][1]
+        if lo < mid:
+            max_end = max(max_end, self._build(lo, mid))
+        if mid + 1 < hi:
+            max_end = max(max_end, self._build(mid + 1, hi))
+        self._max_end[mid] = max_end
+        return max_end
+
+    def overlap(self, start: Any, end: Any) -> List[T]:
+        """
+        与 [start, end] 有交集的区间的值, 按区间开始值排序
+        """
+        result: List[T] = []
+        # 下标不小于 limit 的区间开始值大于 end, 不可能相交
+        limit = bisect_right(self._starts, end)
+        self._collect(0, len(self._intervals), limit, start, result)
+        return result
+
+    def _collect(self, lo: int, hi: int, limit: int, start: Any, result: List[T]):
+        # 与构建时相同的划分, 保证 _max_end[mid] 正好是 [lo, hi) 的最大结束值
+        if lo >= hi or lo >= limit:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] < start:
+            return
+        self._collect(lo, mid, limit, start, result)
+        if mid < limit and self._intervals[mid][1] >= start:
+            result.append(self._intervals[mid][2])
+        self._collect(mid + 1, hi, limit, start, result)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+
+class _IntervalGroup(Generic[T]):
+    """一个分组的区间: 按 id 保存, 修改后下次查询时重建区间树"""
+
+    def __init__(self, items: Dict[Hashable, Tuple[Any, Any, T]]):
+        self.items = items
+        self.tree: Optional[IntervalTree[T]] = None
+
+    def overlap(self, start: Any, end: Any) -> List[T]:
+        if self.tree is None:
+            self.tree = IntervalTree(self.items.values())
+        return self.tree.overlap(start, end)
+
+
+class GroupedIntervalIndex(Generic[T]):
+    """
+    按分组(如用户)维护的区间索引, 每个分组一棵区间树
+
+    - 分组在第一次查询时由调用方从数据库加载(load), 之后写入数据库时同步调用 upsert/remove
+    - 分组放在 TTL + LRU 缓存中, 过期后重新加载, 多实例部署时其它实例的修改最多延迟一个 TTL 可见
+    - 正在加载的分组有版本号, 加载期间该分组有写入时放弃本次加载结果, 避免用旧数据覆盖新数据;
+      版本号只在有加载进行时保留, 分组的全部加载结束后即删除, 不随用户数增长
+    """
+
+    def __init__(self, max_groups: int = 1024, ttl: float = 60):
+        self._groups: TTLCache[Hashable, _IntervalGroup[T]] = TTLCache(max_size=max_groups, ttl=ttl)
+        # 分组 -> 加载开始后的写入次数, 分组 -> 进行中的加载数
+        self._versions: Dict[Hashable, int] = {}
+        self._loading: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, group: Hashable) -> int:
+        """加载前登记一次加载并读取分组版本号, 之后必须调用 load 或 cancel_load"""
+        with self._lock:
+            self._loading[group] = self._loading.get(group, 0) + 1
+            return self._versions.get(group, 0)
+
+    def load(self, group: Hashable, intervals: Iterable[Tuple[Hashable, Any, Any, T]], version: int) -> bool:
+        """
+        写入分组的全部区间
+        :param group: 分组
+        :param intervals: (id, 开始, 结束, 值)
+        :param version: 加载前通过 version() 读取的版本号
+        :return: 是否写入(加载期间有修改时不写入)
+        """
+        items = {item_id: (start, end, value) for item_id, start, end, value in intervals}
+        with self._lock:
+            try:
+                if self._versions.get(group, 0) != version:
+                    return False
+                self._groups.set(group, _IntervalGroup(items))
+                return True
+            finally:
+                self._finish_load(group)
+
+    def cancel_load(self, group: Hashable):
+        """加载失败时调用, 结束 version() 登记的加载"""
+        with self._lock:
+            self._finish_load(group)
+
+    def _finish_load(self, group: Hashable):
+        remaining = self._loading.get(group, 0) - 1
+        if remaining > 0:
+            self._loading[group] = remaining
+        else:
+            # 没有进行中的加载, 版本号不再需要
+            self._loading.pop(group, None)
+            self._versions.pop(group, None)
+
+    def _bump(self, group: Hashable):
+        if group in self._loading:
+            self._versions[group] = self._versions.get(group, 0) + 1
+
+    def overlap(self, group: Hashable, start: Any, end: Any) -> Optional[List[T]]:
+        """
+        分组内与 [start, end] 有交集的区间的值
+        :return: 分组未加载时返回 None
+        """
+        with self._lock:
+            interval_group = self._groups.get(group)
+            if interval_group is None:
+                return None
+            return interval_group.overlap(start, end)
+
+    def upsert(self, group: Hashable, item_id: Hashable, start: Any, end: Any, value: T):
+        """新增或修改区间, 分组未加载时只更新进行中加载的版本号"""
+        with self._lock:
+            self._bump(group)
+            interval_group = self._groups.get(group)
+            if interval_group is not None:
+                interval_group.items[item_id] = (start, end, value)
+                interval_group.tree = None
+
+    def remove(self, group: Hashable, item_id: Hashable):
+        """删除区间, 分组未加载时只更新进行中加载的版本号"""
+        with self._lock:
+            self._bump(group)
+            interval_group = self._groups.get(group)
+            if interval_group is not None and interval_group.items.pop(item_id, None) is not None:
+                interval_group.tree = None
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+
+    def stats(self) -> dict:
+        return self._groups.stats()
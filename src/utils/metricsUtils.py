@@ -0,0 +1,344 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_buckets(value: str) -> Tuple[float, ...]:
+    return tuple(sorted(float(item) for item in value.split(",") if item.strip()))
+
+
+class MetricsConfig:
+    # 是否采集指标, 关闭后 /metrics 只返回空内容
+    ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # 接口、出站请求、数据库取连接的耗时分桶（秒）
+    LATENCY_BUCKETS: Tuple[float, ...] = _parse_buckets(
+        os.getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30"))
+    # LLM 请求耗时、首 token 耗时分桶（秒）
+    LLM_BUCKETS: Tuple[float, ...] = _parse_buckets(
+        os.getenv("METRICS_LLM_BUCKETS", "0.25,0.5,1,2,3,5,10,20,30,60,120,300"))
+
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类: 按标签值分组保存, 标签通过关键字参数传入, 缺省为空串"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple("" if labels.get(name) is None else str(labels.get(name)) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(指标名后缀, 标签串, 值)"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", _format_labels(self.label_names, key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值, 也可以注册函数在抓取时读取"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], Optional[float]]] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], Optional[float]], **labels):
+        """抓取时调用 function 取值, 返回 None 或抛异常时不输出该标签组"""
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                value = function()
+            except Exception as e:
+                logger.warning(f"读取指标{self.name}失败: {str(e)}")
+                continue
+            if value is not None:
+                values[key] = value
+        return [("", _format_labels(self.label_names, key), value) for key, value in sorted(values.items())]
+
+
+class _HistogramValue:
+    def __init__(self, bucket_count: int):
+        # 每个桶单独计数, 输出时再累加成 le 的累计值
+        self.buckets = [0] * bucket_count
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """分桶统计, 桶上界 le 为闭区间, 最后一个桶为 +Inf"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = MetricsConfig.LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[LabelValues, _HistogramValue] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = _HistogramValue(len(self.buckets))
+            histogram.buckets[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted((key, (list(value.buckets), value.sum, value.count)) for key, value in self._values.items())
+        result = []
+        names = self.label_names + ("le",)
+        for key, (buckets, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, buckets):
+                cumulative += bucket
+                result.append(("_bucket", _format_labels(names, key + (_format_value(bound),)), cumulative))
+            labels = _format_labels(self.label_names, key)
+            result.append(("_sum", labels, total))
+            result.append(("_count", labels, count))
+        return result
+
+
+class MetricsRegistry:
+    """
+    指标注册表, 按 Prometheus 文本格式(0.0.4)输出
+
+    - 不依赖 prometheus_client, 多进程部署(多个 worker)时每个进程单独统计, 由 Prometheus 按实例聚合
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = MetricsConfig.LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        if not MetricsConfig.ENABLED:
+            return ""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# 文本格式的 Content-Type
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# 接口
+http_requests_total = metrics.counter(
+    "http_requests_total", "接口请求数", ("method", "route", "status"))
+http_request_duration_seconds = metrics.histogram(
+    "http_request_duration_seconds", "接口耗时, SSE 接口为返回响应头的耗时", ("method", "route", "status"))
+sse_streams_in_flight = metrics.gauge(
+    "sse_streams_in_flight", "正在推送的 SSE 流", ("route",))
+sse_stream_duration_seconds = metrics.histogram(
+    "sse_stream_duration_seconds", "SSE 流从开始到结束的总耗时", ("route",), MetricsConfig.LLM_BUCKETS)
+
+# 数据库连接池
+db_pool_checkout_seconds = metrics.histogram(
+    "db_pool_checkout_seconds", "从连接池获取连接的耗时(含等待空闲连接和新建连接)", ("engine", "status"))
+db_pool_connections = metrics.gauge(
+    "db_pool_connections", "连接池中的连接数, state=in_use 为已借出, idle 为空闲", ("engine", "state"))
+db_pool_size = metrics.gauge(
+    "db_pool_size", "连接池配置的常驻连接数", ("engine",))
+
+# 出站 HTTP 请求
+http_client_request_duration_seconds = metrics.histogram(
+    "http_client_request_duration_seconds", "调用外部接口的耗时, 流式接口为整个流的耗时", ("api_code", "status"))
+
+# LLM
+llm_request_duration_seconds = metrics.histogram(
+    "llm_request_duration_seconds", "LLM 请求耗时, 流式请求为整个流的耗时", ("provider", "model", "stream", "status"),
+    MetricsConfig.LLM_BUCKETS)
+llm_time_to_first_token_seconds = metrics.histogram(
+    "llm_time_to_first_token_seconds", "流式 LLM 请求收到第一个内容块的耗时", ("provider", "model"),
+    MetricsConfig.LLM_BUCKETS)
+llm_tokens_total = metrics.counter(
+    "llm_tokens_total", "LLM 消耗的 token 数, 以接口返回的 usage 为准", ("provider", "model", "type"))
+
+
+def register_pool_metrics(name: str, get_pool: Callable[[], object]):
+    """
+    注册连接池的抓取时指标, 每次抓取都通过 get_pool 取当前连接池(dispose 后连接池会被替换)
+    :param name: 引擎名称, 作为 engine 标签
+    :param get_pool: 返回 QueuePool 的函数
+    """
+
+    def read(method: str) -> Callable[[], Optional[float]]:
+        def value() -> Optional[float]:
+            function = getattr(get_pool(), method, None)
+            return function() if callable(function) else None
+
+        return value
+
+    db_pool_connections.set_function(read("checkedout"), engine=name, state="in_use")
+    db_pool_connections.set_function(read("checkedin"), engine=name, state="idle")
+    db_pool_size.set_function(read("size"), engine=name)
+
+
+class TimedPoolMixin:
+    """
+    连接池混入类: 记录获取连接的耗时, 与 QueuePool / AsyncAdaptedQueuePool 组合使用
+    子类通过 metrics_engine 指定 engine 标签
+    """
+    metrics_engine = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return super()._do_get()
+        except Exception:
+            # 连接池耗尽超时或新建连接失败
+            status = "error"
+            raise
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - start, engine=self.metrics_engine, status=status)
+
+
+class MetricsMiddleware:
+    """
+    接口指标中间件(纯 ASGI, 不缓冲响应体, SSE 流不受影响)
+
+    - 路由标签使用路由模板(/user/{id}), 不使用实际路径, 避免标签数量无限增长; 未匹配到接口的请求记为 <unmatched>
+    - 响应为 text/event-stream 时计入 sse_streams_in_flight, 流结束后减去
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not MetricsConfig.ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = {"status": "500", "streaming": False, "recorded": False}
+
+        def route() -> str:
+            matched = scope.get("route")
+            return getattr(matched, "path", None) or "<unmatched>"
+
+        def record(status: str):
+            if state["recorded"]:
+                return
+            state["recorded"] = True
+            labels = dict(method=scope["method"], route=route(), status=status)
+            http_requests_total.inc(**labels)
+            http_request_duration_seconds.observe(time.perf_counter() - start, **labels)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                state["status"] = str(message["status"])
+                content_type = dict(message.get("headers") or []).get(b"content-type", b"")
+                if content_type.startswith(b"text/event-stream"):
+                    state["streaming"] = True
+                    record(state["status"])
+                    sse_streams_in_flight.inc(route=route())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if state["streaming"]:
+                sse_streams_in_flight.dec(route=route())
+                sse_stream_duration_seconds.observe(time.perf_counter() - start, route=route())
+            else:
+                record(state["status"])
@@ -1,10 +1,17 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
 from typing import TypeVar, Generic, List, Dict, Any, Optional, Sequence
 from pydantic import BaseModel, Field
 from sqlmodel import Session, select, SQLModel
-from sqlalchemy import func, Select
+from sqlalchemy import Select, and_, or_
 
 # 导入Code模型用于创建具体的分页响应类
 from src.pojo.po.aiCodePo import Code
+from src.exception.aiException import AIException
+from src.utils.countUtils import count_cache
+from src.utils.fulltextUtils import text_search_condition
 
 T = TypeVar('T')
 
@@ -69,9 +76,8 @@ def paginate_query(
     if page_request.search_params:
         query = apply_search_filters(query, model_class, page_request.search_params)
 
-    # 计算总记录数
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.exec(count_query).one()
+    # 计算总记录数(按查询条件短时间缓存)
+    total = count_cache.count_query(session, query)
 
     # 应用排序
     if page_request.sort_field and hasattr(model_class, page_request.sort_field):
@@ -133,7 +139,7 @@ def apply_search_filters(query: Select, model_class: type[SQLModel], search_para
         if field in model_fields and value is not None:
             # 根据字段是否在like_search_fields中决定查询方式
             if field in like_search_fields and isinstance(value, str):
-                query = query.where(getattr(model_class, field).like(f"%{value}%"))
+                query = query.where(text_search_condition(model_class, field, value))
             else:
                 # 对于其他字段，使用精确匹配
                 query = query.where(getattr(model_class, field) == value)
@@ -219,3 +225,165 @@ def create_code_page_response(
         total_pages=total_pages,
         data=data
     )
+
+class CursorPageRequest(BaseModel):
+    """
+    游标分页请求参数模型
+    """
+    cursor: Optional[str] = Field(default=None, description="上一页返回的 next_cursor，为空表示第一页")
+    page_size: int = Field(default=10, ge=1, le=100, description="每页记录数，默认10，最大100")
+    sort_field: Optional[str] = Field(default=None, description="排序字段，默认主键")
+    sort_order: Optional[str] = Field(default="asc", description="排序方向，asc或desc")
+    search_params: Optional[Dict[str, Any]] = Field(default=None, description="搜索参数")
+    with_total: bool = Field(default=False, description="是否返回总记录数")
+
+class CursorPageResponse(BaseModel, Generic[T]):
+    """
+    游标分页响应模型
+    """
+    page_size: int = Field(description="每页记录数")
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标，没有下一页时为空")
+    has_more: bool = Field(description="是否还有下一页")
+    total: Optional[int] = Field(default=None, description="总记录数，with_total为false时为空")
+    data: List[T] = Field(description="当前页数据")
+
+    model_config = {"arbitrary_types_allowed": True}
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+    return value
+
+def encode_cursor(sort_field: str, sort_order: str, sort_value: Any, row_id: Any) -> str:
+    """
+    把最后一条记录的排序值和主键编码成不透明的游标
+
+    Args:
+        sort_field: 排序字段
+        sort_order: 排序方向
+        sort_value: 最后一条记录的排序字段值
+        row_id: 最后一条记录的主键
+
+    Returns:
+        url安全的base64字符串
+    """
+    raw = json.dumps({"f": sort_field, "o": sort_order, "k": _encode_cursor_value(sort_value),
+                      "id": _encode_cursor_value(row_id)}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+
+    Returns:
+        {"f": 排序字段, "o": 排序方向, "k": 排序值, "id": 主键}
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return {"f": data["f"], "o": data["o"], "k": _decode_cursor_value(data["k"]), "id": _decode_cursor_value(data["id"])}
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise AIException.quick_raise("分页游标无效", code=400)
+
+def _seek_condition(sort_column, id_column, descending: bool, sort_value: Any, row_id: Any):
+    """
+    (排序字段, 主键) 在上一页最后一条之后的条件，展开成 OR 以便使用索引
+    MySQL 升序时 NULL 在最前，降序时 NULL 在最后
+    """
+    if sort_column is id_column:
+        return id_column < row_id if descending else id_column > row_id
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < row_id)
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id), sort_column.is_(None))
+    if sort_value is None:
+        return or_(and_(sort_column.is_(None), id_column > row_id), sort_column.is_not(None))
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
+
+def paginate_by_cursor(
+    session: Session,
+    model_class: type[SQLModel],
+    page_request: CursorPageRequest,
+    base_query: Optional[Select] = None
+) -> CursorPageResponse:
+    """
+    通用游标分页查询函数
+
+    按 (排序字段, 主键) 定位上一页的最后一条，用 WHERE 条件直接跳到下一页，不使用 OFFSET，
+    翻到多深都只读取一页的数据；默认不统计总数
+
+    Args:
+        session: 数据库会话
+        model_class: 模型类，需有单列主键
+        page_request: 游标分页请求参数
+        base_query: 基础查询，如果提供则在此基础上进行分页，否则创建新查询
+
+    Returns:
+        游标分页响应对象
+    """
+    primary_keys = list(model_class.__table__.primary_key.columns)
+    if len(primary_keys) != 1:
+        raise AIException.quick_raise(f"{model_class.__name__}没有单列主键，不支持游标分页")
+    id_field = primary_keys[0].name
+    id_column = getattr(model_class, id_field)
+
+    sort_field = page_request.sort_field
+    if not sort_field or sort_field not in model_class.__table__.columns:
+        sort_field = id_field
+    sort_column = id_column if sort_field == id_field else getattr(model_class, sort_field)
+    sort_order = "desc" if (page_request.sort_order or "").lower() == "desc" else "asc"
+    descending = sort_order == "desc"
+
+    query = select(model_class) if base_query is None else base_query
+    if page_request.search_params:
+        query = apply_search_filters(query, model_class, page_request.search_params)
+
+    total = None
+    if page_request.with_total:
+        total = count_cache.count_query(session, query)
+
+    if page_request.cursor:
+        cursor = decode_cursor(page_request.cursor)
+        if cursor["f"] != sort_field or cursor["o"] != sort_order:
+            raise AIException.quick_raise("分页游标与排序条件不一致", code=400)
+        query = query.where(_seek_condition(sort_column, id_column, descending, cursor["k"], cursor["id"]))
+
+    if sort_column is id_column:
+        query = query.order_by(id_column.desc() if descending else id_column.asc())
+    elif descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # 多取一条判断是否还有下一页
+    results = list(session.exec(query.limit(page_request.page_size + 1)).all())
+    has_more = len(results) > page_request.page_size
+    results = results[:page_request.page_size]
+
+    next_cursor = None
+    if has_more:
+        last = results[-1]
+        next_cursor = encode_cursor(sort_field, sort_order, getattr(last, sort_field), getattr(last, id_field))
+
+    return CursorPageResponse(
+        page_size=page_request.page_size,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        total=total,
+        data=results
+    )
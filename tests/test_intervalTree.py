@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from src.utils.intervalTree import GroupedIntervalIndex, IntervalTree
+
+
+def _brute_force(intervals, start, end):
+    return sorted(value for s, e, value in intervals if s <= end and e >= start)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_overlap_matches_brute_force(seed):
+    rng = random.Random(seed)
+    intervals = []
+    for value in range(rng.randint(0, 200)):
+        start = rng.randint(0, 1000)
+        intervals.append((start, start + rng.choice([0, 1, 5, 50, 400]), value))
+    tree = IntervalTree(intervals)
+    assert len(tree) == len(intervals)
+    for _ in range(200):
+        start = rng.randint(-50, 1100)
+        end = start + rng.randint(0, 300)
+        assert sorted(tree.overlap(start, end)) == _brute_force(intervals, start, end)
+
+
+def test_overlap_is_closed_and_sorted_by_start():
+    tree = IntervalTree([(5, 10, "b"), (1, 4, "a"), (10, 12, "c")])
+    assert tree.overlap(4, 5) == ["a", "b"]
+    assert tree.overlap(10, 10) == ["b", "c"]
+    assert tree.overlap(13, 20) == []
+    assert IntervalTree([]).overlap(0, 1) == []
+
+
+def test_load_discarded_when_upsert_races():
+    index = GroupedIntervalIndex()
+    version = index.version("u")
+    # 加载读取数据库期间写入了新区间
+    index.upsert("u", 2, 5, 6, "new")
+    assert not index.load("u", [(1, 0, 1, "old")], version)
+    assert index.overlap("u", 0, 10) is None
+    assert not index._versions and not index._loading
+
+    version = index.version("u")
+    assert index.load("u", [(1, 0, 1, "old"), (2, 5, 6, "new")], version)
+    assert index.overlap("u", 0, 10) == ["old", "new"]
+
+
+def test_concurrent_loads_only_latest_snapshot_wins():
+    index = GroupedIntervalIndex()
+    first = index.version("u")
+    index.remove("u", 1)
+    second = index.version("u")
+    assert not index.load("u", [(1, 0, 1, "stale")], first)
+    assert index.load("u", [], second)
+    assert index.overlap("u", 0, 10) == []
+    assert not index._versions and not index._loading
+
+
+def test_writes_without_loads_keep_no_versions():
+    index = GroupedIntervalIndex()
+    for user in range(100):
+        index.upsert(user, 1, 0, 1, "v")
+        index.remove(user, 1)
+    assert not index._versions and not index._loading
+
+
+def test_cancel_load_releases_bookkeeping():
+    index = GroupedIntervalIndex()
+    index.version("u")
+    index.upsert("u", 1, 0, 1, "v")
+    index.cancel_load("u")
+    assert not index._versions and not index._loading
+
+
+def test_upsert_and_remove_update_loaded_group():
+    index = GroupedIntervalIndex()
+    assert index.load("u", [(1, 0, 5, "a")], index.version("u"))
+    index.upsert("u", 2, 3, 8, "b")
+    assert index.overlap("u", 4, 4) == ["a", "b"]
+    index.upsert("u", 1, 9, 9, "a")
+    assert index.overlap("u", 4, 4) == ["b"]
+    index.remove("u", 2)
+    assert index.overlap("u", 0, 10) == ["a"]
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.exception.aiException import AIException
+from src.mySchedules.jobScheduler import CronExpression, IntervalTrigger, JobScheduler
+
+
+def _next(expr: str, after: datetime) -> datetime:
+    return CronExpression(expr).next_after(after)
+
+
+def test_every_15_minutes():
+    cron = CronExpression("*/15 * * * *")
+    assert cron.minutes == frozenset({0, 15, 30, 45})
+    assert cron.next_after(datetime(2026, 10, 17, 10, 7)) == datetime(2026, 10, 17, 10, 15)
+    assert cron.next_after(datetime(2026, 10, 17, 10, 50)) == datetime(2026, 10, 17, 11, 0)
+    # 严格晚于 after
+    assert cron.next_after(datetime(2026, 10, 17, 10, 15)) == datetime(2026, 10, 17, 10, 30)
+    assert cron.next_after(datetime(2026, 10, 17, 23, 45, 30)) == datetime(2026, 10, 18, 0, 0)
+
+
+def test_start_with_step():
+    assert CronExpression("5/20 * * * *").minutes == frozenset({5, 25, 45})
+
+
+def test_day_of_month_or_day_of_week():
+    # 每月13号或每周五
+    cron = CronExpression("0 0 13 * 5")
+    # 2026-10-17 周六, 下一个周五 10-23 早于 11-13
+    assert cron.next_after(datetime(2026, 10, 17)) == datetime(2026, 10, 23)
+    # 2026-12-12 周六, 13号(周日)早于下一个周五
+    assert cron.next_after(datetime(2026, 12, 12)) == datetime(2026, 12, 13)
+
+
+def test_only_day_of_week_restricted():
+    # 日为 * 时只看周: 每周一
+    assert _next("0 9 * * 1", datetime(2026, 10, 17)) == datetime(2026, 10, 19, 9, 0)
+    # 7 和 0 都是周日
+    assert _next("0 9 * * 7", datetime(2026, 10, 17)) == datetime(2026, 10, 18, 9, 0)
+    assert _next("0 9 * * 0", datetime(2026, 10, 17)) == datetime(2026, 10, 18, 9, 0)
+
+
+def test_only_day_of_month_restricted():
+    assert _next("0 0 1 * *", datetime(2026, 10, 17)) == datetime(2026, 11, 1)
+
+
+def test_month_and_year_rollover():
+    assert _next("0 0 1 * *", datetime(2026, 12, 31, 23, 59)) == datetime(2027, 1, 1)
+    # 4月没有31号, 跳到5月31号
+    assert _next("30 23 31 * *", datetime(2026, 4, 1)) == datetime(2026, 5, 31, 23, 30)
+    assert _next("0 0 * 3 *", datetime(2026, 10, 17)) == datetime(2027, 3, 1)
+
+
+def test_feb_29():
+    assert _next("0 0 29 2 *", datetime(2026, 1, 1)) == datetime(2028, 2, 29)
+    assert _next("0 0 29 2 *", datetime(2028, 2, 29)) == datetime(2032, 2, 29)
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+                                  "* * * * 8", "*/0 * * * *", "5-1 * * * *", "a * * * *"])
+def test_invalid_expression(expr):
+    with pytest.raises(AIException):
+        CronExpression(expr)
+
+
+def test_expression_without_matching_time():
+    with pytest.raises(AIException):
+        _next("0 0 31 2 *", datetime(2026, 1, 1))
+
+
+def test_back_to_back_runs_respect_max_concurrency():
+    async def scenario():
+        scheduler = JobScheduler()
+        calls = []
+
+        async def job():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        scheduler.register("x", job, IntervalTrigger(3600), max_concurrency=1)
+        first = await scheduler.run_now("x")
+        second = await scheduler.run_now("x")
+        assert second.status == "skipped"
+        await asyncio.gather(*scheduler._runs)
+        await asyncio.sleep(0)
+        assert first.status == "success"
+        assert calls == [1]
+        assert scheduler.get_job("x").running == 0
+
+    asyncio.run(scenario())
+
+
+def test_unknown_job_is_404():
+    with pytest.raises(AIException) as error:
+        JobScheduler().get_job("missing")
+    assert error.value.code == 404
@@ -0,0 +1,51 @@
+import pytest
+
+from src.ai.semanticCache import SemanticCache, SemanticCacheConfig
+
+QUESTION = "帮我查一下2024年3月华东区域所有门店的销售额和毛利率，按门店排序并给出环比变化"
+
+
+class _EnabledConfig(SemanticCacheConfig):
+    ENABLED = True
+    CAPACITY = 64
+    TTL = 600
+    THRESHOLD = 0.97
+    THRESHOLDS = {"erp": None}
+    EMBEDDER = ""
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(_EnabledConfig)
+    cache.store("erp", "ns", QUESTION, "march-east")
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    QUESTION.replace("3月", "4月"),
+    QUESTION.replace("华东", "华南"),
+    QUESTION.replace("2024", "2023"),
+    QUESTION.replace("3月", "13月"),
+])
+def test_near_miss_does_not_hit(cache, question):
+    assert cache.lookup("erp", "ns", question) is None
+
+
+@pytest.mark.parametrize("question", [
+    QUESTION,
+    QUESTION.replace("，", " ") + "？",
+    QUESTION.replace("帮我查一下", "请查") + "吧",
+])
+def test_same_question_in_other_words_hits(cache, question):
+    assert cache.lookup("erp", "ns", question) == "march-east"
+
+
+def test_other_namespace_does_not_hit(cache):
+    assert cache.lookup("erp", "other", QUESTION) is None
+
+
+def test_unlisted_api_code_is_not_cached(cache):
+    cache.store("ypj", "ns", QUESTION, "value")
+    assert cache.lookup("ypj", "ns", QUESTION) is None
+    assert not cache.enabled_for("ypj")
+    assert not cache.enabled_for(None)